@@ -0,0 +1,80 @@
+"""Micro-benchmark of HTML-like label generation throughput.
+
+Reports the best time to build and serialize a table in the style of an object node,
+the overall row throughput, and the memory retained by the table per row.
+
+Run with ``python scripts/bench_html_like.py [ROWS ...]``.
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+from sphinx_graph import html_like as html
+
+
+def build_table(rows: int) -> html.Table:
+    """Build a table in the style of an object node."""
+    table = html.Table(border=0, cellspacing=0)
+    table.add_row([html.TableCell(html.u("Builder.build()"), align="CENTER")])
+    table.add_row(
+        [
+            html.TableCell(
+                html.multiline("Builds the documentation.\nIn two lines.", "LEFT"),
+                align="LEFT",
+                cellpadding=10,
+            )
+        ]
+    )
+    for num in range(1, rows + 1):
+        cell_kwargs = {"bgcolor": "lightblue"} if num % 5 == 0 else {}
+        table.add_row(
+            [
+                html.TableCell(
+                    f"    Builder.method_{num}()",
+                    align="LEFT",
+                    port=str(num),
+                    border=1,
+                    **cell_kwargs,
+                )
+            ]
+        )
+    return table
+
+
+def best(func, repeat: int = 5) -> float:
+    """The best time of a function call, in seconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def retained(rows: int) -> int:
+    """The memory retained by a built table, in bytes."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = build_table(rows)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del table
+    return after - before
+
+
+def main(sizes: list[int]) -> None:
+    print(
+        f"{'rows':>8} {'build ms':>10} {'serialize ms':>13} "
+        f"{'rows/s':>10} {'bytes/row':>10} {'label size':>11}"
+    )
+    for rows in sizes:
+        table = build_table(rows)
+        build = best(lambda rows=rows: build_table(rows))
+        serialize = best(lambda table=table: html.html(str(table)))
+        print(
+            f"{rows:>8} {build * 1e3:>10.2f} {serialize * 1e3:>13.2f} "
+            f"{rows / (build + serialize):>10.0f} {retained(rows) / rows:>10.0f} "
+            f"{len(html.html(str(table))):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 5000, 20000])
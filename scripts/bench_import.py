@@ -0,0 +1,82 @@
+"""Track the import time of the package, using ``python -X importtime``.
+
+For each scenario, reports the cumulative import time of the package's modules,
+and fails (exit code 1) if a heavy dependency is imported when it should not be,
+or the time exceeds the budget.
+
+Run with ``python scripts/bench_import.py [--budget-ms MS]``.
+"""
+
+import argparse
+import subprocess
+import sys
+
+HEAVY = ("graphviz", "pydantic", "tomllib")
+
+SCENARIOS: list[tuple[str, list[str], tuple[str, ...]]] = [
+    # name, python arguments, heavy modules allowed to be imported
+    ("import", ["-c", "import sphinx_graph"], ()),
+    ("version", ["-c", "from sphinx_graph import __version__"], ()),
+    ("cli", ["-c", "import sphinx_graph.__main__"], ()),
+    (
+        "check",
+        ["-m", "sphinx_graph", "--check"],
+        ("pydantic", "tomllib"),
+    ),
+]
+
+
+def importtime(args: list[str]) -> dict[str, tuple[int, int]]:
+    """Run python with ``-X importtime``, returning (self, cumulative) us per module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=50.0,
+        help="the maximum time to import the package modules, for scenarios "
+        "that should not import heavy dependencies",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'scenario':<10} {'package ms':>11} {'total ms':>9}  heavy imports")
+    for name, python_args, allowed in SCENARIOS:
+        times = importtime(python_args)
+        package = sum(
+            self_us
+            for module, (self_us, _) in times.items()
+            if module.split(".")[0] == "sphinx_graph"
+        )
+        total = sum(self_us for self_us, _ in times.values())
+        heavy = sorted(
+            module for module in times if module in HEAVY and module not in allowed
+        )
+        print(
+            f"{name:<10} {package / 1000:>11.2f} {total / 1000:>9.2f}  "
+            f"{', '.join(heavy) or '-'}"
+        )
+        if heavy or (not allowed and package / 1000 > args.budget_ms):
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
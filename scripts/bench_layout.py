@@ -0,0 +1,107 @@
+"""Benchmark the Graphviz layout time and output size of each layout profile.
+
+The graph is grown by replicating the bundled dataset,
+and each profile is rendered at each scale, reporting the wall time of Graphviz
+and the size of the output.
+Profiles that exceed the time budget at a scale are not run at larger scales.
+
+Run with ``python scripts/bench_layout.py [--scales 1,2,4] [--budget-s S] [--json PATH]``.
+Requires Graphviz to be installed.
+"""
+
+import argparse
+import json
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tomllib
+
+from sphinx_graph import DATA_PATH, Data, build_graph
+from sphinx_graph.layout import PROFILES, get_profile
+from sphinx_graph.render import run_dot
+from sphinx_graph.synthetic import replicate
+
+
+def bench(data: Data, profile: str, format: str, outdir: Path) -> dict:
+    """Render the graph with a profile, returning the timings and sizes."""
+    source = build_graph(data, layout=profile).source
+    outpath = outdir.joinpath(f"{profile}.{format}")
+    start = time.perf_counter()
+    run_dot(source, outpath, format=format, engine=get_profile(profile).engine)
+    seconds = time.perf_counter() - start
+    return {
+        "profile": profile,
+        "nodes": len(data.objects) + len(data.events),
+        "dot_bytes": len(source.encode()),
+        "seconds": seconds,
+        "output_bytes": outpath.stat().st_size,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scales",
+        default="1,2,4,8",
+        help="comma-separated replication factors of the bundled dataset",
+    )
+    parser.add_argument(
+        "--profiles",
+        default=",".join(PROFILES),
+        help="comma-separated layout profiles to compare",
+    )
+    parser.add_argument("--format", default="svg", help="the output format")
+    parser.add_argument(
+        "--budget-s",
+        type=float,
+        default=60.0,
+        help="the time budget for a single render, in seconds",
+    )
+    parser.add_argument("--json", type=Path, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    raw = tomllib.loads(DATA_PATH.read_text("utf8"))
+    profiles = [p for p in args.profiles.split(",") if p]
+    over_budget: set[str] = set()
+    results = []
+    print(
+        f"{'scale':>5} {'nodes':>6} {'profile':<8} {'seconds':>9} "
+        f"{'dot KiB':>8} {'out KiB':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tempdir:
+        for scale in (int(s) for s in args.scales.split(",") if s):
+            data = Data(**replicate(raw, scale))
+            for profile in profiles:
+                if profile in over_budget:
+                    continue
+                result = {
+                    "scale": scale,
+                    **bench(data, profile, args.format, Path(tempdir)),
+                }
+                results.append(result)
+                flag = ""
+                if result["seconds"] > args.budget_s:
+                    over_budget.add(profile)
+                    flag = "  over budget"
+                print(
+                    f"{scale:>5} {result['nodes']:>6} {profile:<8} "
+                    f"{result['seconds']:>9.2f} {result['dot_bytes'] / 1024:>8.0f} "
+                    f"{result['output_bytes'] / 1024:>8.0f}{flag}"
+                )
+
+    if args.json:
+        args.json.write_text(
+            json.dumps(
+                {"format": args.format, "budget_s": args.budget_s, "results": results},
+                indent=2,
+            ),
+            "utf8",
+        )
+    within = [p for p in profiles if p not in over_budget]
+    print(f"within budget at all scales: {', '.join(within) or '-'}")
+    return 0 if within else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Benchmark the memory and load time of the pydantic models, against compact records.
+
+The data is grown by replicating the bundled dataset,
+and loaded from its TOML source into each representation,
+reporting the memory retained by the loaded data (measured with ``tracemalloc``),
+the time to load it, and the time to build the DOT source from it
+(which is checked to be identical for both).
+
+Run with ``python scripts/bench_memory.py [SCALES]``, e.g. ``1,10,50``.
+"""
+
+from collections.abc import Callable
+import gc
+import sys
+import time
+import tomllib
+import tracemalloc
+
+from sphinx_graph import DATA_PATH, Data, build_graph
+from sphinx_graph.compact import CompactData, load_compact
+from sphinx_graph.synthetic import replicate, to_toml
+
+
+def measure(load: Callable[[], object]) -> tuple[object, int, float]:
+    """Load the data, returning it, with the memory it retains and the load time
+    (timed separately, since tracing slows it down).
+    """
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    data = load()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, retained, elapsed
+
+
+def main(scales: list[int]) -> None:
+    raw = tomllib.loads(DATA_PATH.read_text("utf8"))
+    print(
+        f"{'scale':>6} {'objects':>8} {'calls':>8} {'pydantic':>10} {'compact':>10} "
+        f"{'ratio':>6} {'load p':>8} {'load c':>8} {'build p':>8} {'build c':>8}"
+    )
+    print(
+        f"{'':>6} {'':>8} {'':>8} {'MiB':>10} {'MiB':>10} {'':>6} " + "ms".rjust(8) * 4
+    )
+    for scale in scales:
+        source = to_toml(replicate(raw, scale)).encode()
+
+        def load_pydantic(source: bytes = source) -> Data:
+            return Data(**tomllib.loads(source.decode("utf8")))
+
+        def load_records(source: bytes = source) -> CompactData:
+            return load_compact(source=source)
+
+        data, data_bytes, data_s = measure(load_pydantic)
+        compact, compact_bytes, compact_s = measure(load_records)
+        assert isinstance(data, Data) and isinstance(compact, CompactData)
+
+        start = time.perf_counter()
+        dot_source = build_graph(data).source
+        build_s = time.perf_counter() - start
+        start = time.perf_counter()
+        assert build_graph(compact).source == dot_source
+        compact_build_s = time.perf_counter() - start
+
+        calls = sum(len(obj.calls) for obj in data.objects.values())
+        print(
+            f"{scale:>6} {len(data.objects):>8} {calls:>8} "
+            f"{data_bytes / 2**20:>10.2f} {compact_bytes / 2**20:>10.2f} "
+            f"{data_bytes / compact_bytes:>5.1f}x "
+            f"{data_s * 1e3:>8.1f} {compact_s * 1e3:>8.1f} "
+            f"{build_s * 1e3:>8.1f} {compact_build_s * 1e3:>8.1f}"
+        )
+        del data, compact
+
+
+if __name__ == "__main__":
+    main([int(s) for s in (sys.argv[1] if len(sys.argv) > 1 else "1,10,50").split(",")])
@@ -0,0 +1,161 @@
+"""Benchmark each stage of the pipeline, on synthetic data of growing size.
+
+The stages are timed separately:
+TOML load, validation, ``build_graph`` (link, IR and DOT statements),
+DOT serialization (joining the statements) and, optionally, rendering with Graphviz.
+
+Results are written as JSON, and can be compared against a previous run,
+failing (exit code 1) if any stage regresses by more than the threshold.
+
+Run with ``python scripts/bench_pipeline.py [--sizes 100,1000] [--render]
+[--output results.json] [--compare baseline.json]``.
+"""
+
+import argparse
+import json
+from pathlib import Path
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tomllib
+
+from sphinx_graph import Data, __version__, build_graph
+from sphinx_graph.render import run_dot
+from sphinx_graph.synthetic import count_calls, generate_calls, to_toml
+
+STAGES = ("toml", "validate", "build_graph", "serialize", "render")
+
+
+def best(func, budget_s: float = 1.0, max_repeat: int = 20) -> float:
+    """The best time of repeated calls of a function, in seconds,
+    repeating up to ``max_repeat`` times, or until the budget is spent.
+    """
+    times: list[float] = []
+    start = time.perf_counter()
+    while len(times) < max_repeat and (
+        not times or time.perf_counter() - start < budget_s
+    ):
+        begin = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - begin)
+    return min(times)
+
+
+def bench_size(calls: int, render: bool, tempdir: Path) -> list[dict]:
+    """Time each stage of the pipeline, for data with about this number of calls."""
+    raw = generate_calls(calls)
+    toml = to_toml(raw)
+    parsed = tomllib.loads(toml)
+    data = Data(**parsed)
+    graph = build_graph(data)
+    source = graph.source
+
+    timings = {
+        "toml": best(lambda: tomllib.loads(toml)),
+        "validate": best(lambda: Data(**parsed)),
+        "build_graph": best(lambda: build_graph(data)),
+        # the source of a graph is joined from its statements on each access
+        "serialize": best(lambda: graph.source),
+    }
+    if render:
+        outpath = tempdir.joinpath("graph.svg")
+        timings["render"] = best(
+            lambda: run_dot(source, outpath, format="svg"), max_repeat=1
+        )
+    return [
+        {
+            "calls": count_calls(raw),
+            "objects": len(data.objects),
+            "toml_bytes": len(toml.encode()),
+            "dot_bytes": len(source.encode()),
+            "stage": stage,
+            "seconds": seconds,
+        }
+        for stage, seconds in timings.items()
+    ]
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> bool:
+    """Print the ratio of each timing to the baseline, returning whether any regressed."""
+    previous = {(r["calls"], r["stage"]): r["seconds"] for r in baseline["results"]}
+    regressed = False
+    print(f"\ncompared to baseline (sphinx_graph {baseline.get('version', '?')}):")
+    for result in results:
+        if (base := previous.get((result["calls"], result["stage"]))) is None:
+            continue
+        ratio = result["seconds"] / base if base else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(
+            f"{result['calls']:>8} {result['stage']:<12} {base * 1e3:>10.2f} ms -> "
+            f"{result['seconds'] * 1e3:>10.2f} ms {ratio:>6.2f}x{flag}"
+        )
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="100,1000,10000,100000",
+        help="comma-separated numbers of calls",
+    )
+    parser.add_argument(
+        "--render", action="store_true", help="also time rendering with Graphviz"
+    )
+    parser.add_argument(
+        "--render-max",
+        type=int,
+        default=10000,
+        help="the maximum number of calls to render",
+    )
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="a previous JSON results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="the slowdown ratio above which a stage is a regression",
+    )
+    args = parser.parse_args()
+    if args.render and shutil.which("dot") is None:
+        parser.error("--render requires Graphviz to be installed")
+
+    results: list[dict] = []
+    print(f"{'calls':>8} {'objects':>8} " + " ".join(f"{s:>12}" for s in STAGES))
+    print(f"{'':>8} {'':>8} " + " ".join(f"{'ms':>12}" for _ in STAGES))
+    with tempfile.TemporaryDirectory() as tempdir:
+        for calls in (int(s) for s in args.sizes.split(",") if s):
+            rows = bench_size(
+                calls, args.render and calls <= args.render_max, Path(tempdir)
+            )
+            results.extend(rows)
+            timings = {row["stage"]: row["seconds"] for row in rows}
+            print(
+                f"{rows[0]['calls']:>8} {rows[0]['objects']:>8} "
+                + " ".join(
+                    f"{timings[s] * 1e3:>12.2f}" if s in timings else f"{'-':>12}"
+                    for s in STAGES
+                )
+            )
+
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), "utf8")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text("utf8"))
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Benchmark loading the data from TOML with validation, against loading a snapshot.
+
+Compares the bundled dataset, and a synthetic dataset made by
+replicating the bundled one (10x by default).
+
+Run with ``python scripts/bench_snapshot.py [SCALE]``.
+"""
+
+from pathlib import Path
+import sys
+import tempfile
+import timeit
+import tomllib
+
+from sphinx_graph import DATA_PATH, Data
+from sphinx_graph.snapshot import load_data, snapshot_path
+from sphinx_graph.synthetic import replicate, to_toml
+
+
+def best(func, repeat: int = 5) -> float:
+    """The best time of a function call, in seconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def bench(label: str, path: Path) -> None:
+    source = path.read_bytes()
+    Data(**tomllib.loads(source.decode("utf8")))
+    snapshot_path(path).unlink(missing_ok=True)
+    load_data(path)  # write the snapshot
+
+    cold = best(lambda: Data(**tomllib.loads(path.read_bytes().decode("utf8"))))
+    snapshot = best(lambda: load_data(path))
+    hashed = best(lambda: load_data(path, source=path.read_bytes()))
+    print(
+        f"{label:<12} {len(source) / 1024:>8.0f} {cold * 1e3:>12.2f} "
+        f"{snapshot * 1e3:>12.2f} {hashed * 1e3:>12.2f} {cold / snapshot:>8.1f}x"
+    )
+
+
+def main(scale: int) -> None:
+    print(
+        f"{'dataset':<12} {'KiB':>8} {'toml+valid':>12} "
+        f"{'snapshot':>12} {'snap+hash':>12} {'speedup':>9}"
+    )
+    print(f"{'':<12} {'':>8} {'ms':>12} {'ms':>12} {'ms':>12}")
+    with tempfile.TemporaryDirectory() as tempdir:
+        bundled = Path(tempdir, "bundled.toml")
+        bundled.write_bytes(DATA_PATH.read_bytes())
+        bench("bundled", bundled)
+
+        data = tomllib.loads(DATA_PATH.read_text("utf8"))
+        synthetic = Path(tempdir, "synthetic.toml")
+        synthetic.write_text(to_toml(replicate(data, scale)), "utf8")
+        bench(f"{scale}x", synthetic)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
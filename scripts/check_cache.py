@@ -0,0 +1,77 @@
+"""Check that the render cache only removes the artifacts it wrote.
+
+Files that are not cache entries, in a directory used as the cache,
+must survive both ``--clear-cache`` and the pruning of stale entries.
+
+Run with ``python scripts/check_cache.py``; it exits with an error if a check fails.
+"""
+
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+
+from sphinx_graph.cache import RenderCache
+
+YEAR = 365 * 24 * 60 * 60
+
+
+def add_foreign(directory: Path) -> list[Path]:
+    """Add files the cache did not write, one of them older than the maximum age."""
+    paths = [directory / "important.txt", directory / "notes.md", directory / "t.tex"]
+    for path in paths:
+        path.write_text("keep me", "utf8")
+    old = time.time() - YEAR
+    os.utime(paths[-1], (old, old))
+    return paths
+
+
+def check_clear_cache(directory: Path) -> None:
+    foreign = add_foreign(directory)
+    cache = RenderCache(directory)
+    artifact = directory / "artifact"
+    artifact.write_text("<svg/>", "utf8")
+    cached = cache.store(cache.key(b"data", format="svg", engine=None), "svg", artifact)
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "sphinx_graph",
+            "--cache-dir",
+            str(directory),
+            "--clear-cache",
+            "-f",
+            "json",
+            "-d",
+            str(directory),
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    assert not cached.exists(), "the cache entry was not cleared"
+    for path in foreign:
+        assert path.exists(), f"--clear-cache removed {path.name}"
+
+
+def check_prune(directory: Path) -> None:
+    foreign = add_foreign(directory)
+    cache = RenderCache(directory, max_size=0, max_age=0)
+    artifact = directory / "artifact"
+    artifact.write_text("<svg/>", "utf8")
+    cached = cache.store(cache.key(b"data", format="svg", engine=None), "svg", artifact)
+    assert not cached.exists(), "the stale cache entry was not pruned"
+    for path in foreign:
+        assert path.exists(), f"pruning removed {path.name}"
+
+
+def main() -> None:
+    for check in (check_clear_cache, check_prune):
+        with tempfile.TemporaryDirectory() as directory:
+            check(Path(directory))
+        print(f"{check.__name__}: ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,439 @@
-from . import build_main
+import argparse
+import json
+from pathlib import Path
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .fragments import FragmentSet
+    from .reachability import Focus
+    from .trace import TraceProfile
+
+
+def check(*, as_json: bool = False, fragments: "FragmentSet | None" = None) -> int:
+    """Validate the data and report dangling references, returning the exit code.
+
+    :param as_json: Print the report as JSON to stdout, rather than as warnings.
+    :param fragments: Data fragments to merge into the data, and validate.
+    """
+    from .check import check_diagnostics
+    from .snapshot import load_data
+
+    try:
+        data = load_data()
+        if fragments:
+            data = fragments.merge(data)
+    except ValueError as exc:  # including validation errors
+        if as_json:
+            print(json.dumps({"error": str(exc), "diagnostics": []}, indent=2))
+        else:
+            print(f"Error: invalid data: {exc}", file=sys.stderr)
+        return 1
+    diagnostics = check_diagnostics(data)
+    if as_json:
+        print(json.dumps({"diagnostics": diagnostics.as_dicts()}, indent=2))
+        return 1 if diagnostics else 0
+    for diagnostic in diagnostics:
+        print(f"Warning: {diagnostic.message}", file=sys.stderr)
+    print(
+        f"Checked {len(data.objects)} objects, {len(data.events)} events, "
+        f"{len(data.transforms)} transforms, {len(data.post_transforms)} post transforms: "
+        f"{len(diagnostics)} dangling reference(s)"
+    )
+    return 1 if diagnostics else 0
+
+
+def query(
+    focus: "Focus",
+    kinds: list[str] | None = None,
+    fragments: "FragmentSet | None" = None,
+) -> int:
+    """Print the nodes in the neighbourhood of a node, without rendering,
+    as lines of ``<distance> <kind> <name>``, returning the exit code.
+    """
+    from .reachability import ReachabilityIndex
+    from .snapshot import load_data
+
+    try:
+        data = load_data()
+        if fragments:
+            data = fragments.merge(data)
+        index = ReachabilityIndex.from_data(data)
+        nodes = index.neighbourhood(*focus)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    for name, distance in nodes.items():
+        if kinds is None or index.kind(name) in kinds:
+            print(f"{distance}\t{index.kind(name)}\t{name}")
+    return 0
+
+
+def trace(
+    srcdir: Path,
+    builder: str = "html",
+    jobs: int | None = None,
+    fragments: "FragmentSet | None" = None,
+) -> "TraceProfile":
+    """Trace a build of a Sphinx project, into a temporary output directory."""
+    import tempfile
+
+    from .snapshot import load_data
+    from .trace import trace_build
+
+    data = load_data()
+    if fragments:
+        data = fragments.merge(data)
+    sphinx_args = ["-j", str(jobs)] if jobs else []
+    with tempfile.TemporaryDirectory() as outdir:
+        return trace_build(
+            data, srcdir, Path(outdir), builder=builder, sphinx_args=sphinx_args
+        )
+
+
+def main(argv: list[str] | None = None) -> None:  # noqa: PLR0912,PLR0915
+    """Command-line entry point."""
+    from .layout import PROFILES
+
+    parser = argparse.ArgumentParser(
+        prog="sphinx_graph", description="Build a graph of the Sphinx build process."
+    )
+    parser.add_argument("-n", "--name", default="sphinx_graph", help="output name")
+    parser.add_argument(
+        "-d", "--directory", type=Path, default=None, help="output directory"
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        action="append",
+        help="output format, can be given multiple times or comma-separated "
+        "(default: svg)",
+    )
+    parser.add_argument(
+        "-b",
+        "--builder",
+        action="append",
+        help="render a view per Sphinx builder, e.g. html,latex,epub, "
+        "to <name>.<builder>.<format> (can be given multiple times "
+        "or comma-separated)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="maximum number of concurrent Graphviz processes",
+    )
+    parser.add_argument(
+        "-l",
+        "--layout",
+        default="default",
+        choices=PROFILES,
+        metavar="PROFILE",
+        help="layout profile: "
+        + ", ".join(
+            f"{name} ({profile.description})" for name, profile in PROFILES.items()
+        ),
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always rebuild and re-render"
+    )
+    parser.add_argument(
+        "--cache-dir", type=Path, default=None, help="directory of cached renders"
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="remove all cached renders before building",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="PATH",
+        help="report the time and memory of each stage of the pipeline, "
+        "as a table on stderr, or as JSON written to PATH",
+    )
+    parser.add_argument(
+        "--trace-build",
+        type=Path,
+        default=None,
+        metavar="SRCDIR",
+        help="run sphinx-build on the project in SRCDIR, recording the time spent "
+        "in each object, then render the graph as a heatmap of the timings; "
+        "the trace is written to <name>.trace.json",
+    )
+    parser.add_argument(
+        "--trace-builder",
+        default="html",
+        metavar="BUILDER",
+        help="with --trace-build, the Sphinx builder (default: html)",
+    )
+    parser.add_argument(
+        "--trace-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help="with --trace-build, build in parallel with N processes",
+    )
+    parser.add_argument(
+        "--timeline",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="with --trace-build or --overlay, write the timeline of the build "
+        "(the worker processes of parallel builds, and the serial phases) "
+        "to PATH, in the Chrome trace format (also read by speedscope)",
+    )
+    parser.add_argument(
+        "--overlay",
+        type=Path,
+        default=None,
+        metavar="TRACE",
+        help="render the graph as a heatmap of the timings in a trace file",
+    )
+    parser.add_argument(
+        "--overlay-metric",
+        choices=("self", "cumulative"),
+        default="self",
+        help="color the nodes by their self or cumulative time (default: self)",
+    )
+    parser.add_argument(
+        "--focus",
+        default=None,
+        metavar="NAME",
+        help="only render the neighbourhood of an object (by its full path) "
+        "or an event",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=1,
+        help="with --focus, the maximum number of edges from the node, "
+        "or -1 for all reachable nodes (default: 1)",
+    )
+    parser.add_argument(
+        "--direction",
+        choices=("up", "down", "both"),
+        default="both",
+        help="with --focus, follow edges to their targets (down), "
+        "their sources (up), or both (default: both)",
+    )
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="with --focus, print the nodes of the neighbourhood instead of rendering",
+    )
+    parser.add_argument(
+        "--kind",
+        action="append",
+        choices=("object", "event", "transforms", "post_transforms"),
+        help="with --list, only print nodes of this kind (can be given multiple times)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="load the data as compact records, without validating it, "
+        "to use less memory for very large data (check it first with --check)",
+    )
+    parser.add_argument(
+        "--fragments",
+        action="append",
+        type=Path,
+        metavar="PATH",
+        help="merge a data fragment, or a directory of *.toml fragments, "
+        "into the data (can be given multiple times)",
+    )
+    parser.add_argument(
+        "--entry-points",
+        action="store_true",
+        help="merge the data fragments of installed packages, "
+        "from the sphinx_graph.fragments entry point group",
+    )
+    parser.add_argument(
+        "--watch",
+        nargs="?",
+        type=Path,
+        const=True,
+        default=None,
+        metavar="DATA",
+        help="keep running, and re-render whenever the data changes "
+        "(or the TOML file DATA, in place of the bundled data)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="with --watch, the time to wait for edits to settle (default: 0.2)",
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        type=int,
+        const=8000,
+        default=None,
+        metavar="PORT",
+        help="serve the graph over HTTP on PORT (default: 8000), "
+        "rendering each requested view once",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="with --serve, the address to listen on (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="validate the data and report dangling references, without rendering",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="with --check, print the report as JSON",
+    )
+    args = parser.parse_args(argv)
+
+    builders = [b for value in args.builder or () for b in value.split(",") if b]
+    if builders and (
+        args.check
+        or args.focus
+        or args.watch is not None
+        or args.serve is not None
+        or args.overlay
+        or args.trace_build
+    ):
+        parser.error(
+            "--builder cannot be combined with --check, --focus, --watch, --serve "
+            "or timings"
+        )
+
+    fragments = None
+    if args.fragments or args.entry_points:
+        from .fragments import FragmentSet
+
+        fragments = FragmentSet.discover(
+            args.fragments or (), entry_points=args.entry_points
+        )
+
+    if args.check:
+        sys.exit(check(as_json=args.json, fragments=fragments))
+
+    focus = None
+    if args.focus:
+        from .reachability import Focus
+
+        focus = Focus(
+            args.focus, None if args.depth < 0 else args.depth, args.direction
+        )
+        if args.list:
+            sys.exit(query(focus, args.kind, fragments))
+    elif args.list:
+        parser.error("--list requires --focus")
+
+    formats = [f for value in args.format or ["svg"] for f in value.split(",") if f]
+    if args.watch is not None:
+        from .main import DATA_PATH
+        from .watch import DEBOUNCE_S, watch_formats
+
+        watch_formats(
+            formats,
+            args.name,
+            args.directory,
+            path=DATA_PATH if args.watch is True else args.watch,
+            fragments=list(fragments.sources) if fragments else (),
+            layout=args.layout,
+            debounce=DEBOUNCE_S if args.debounce is None else args.debounce,
+        )
+        return
+
+    from .cache import RenderCache
+    from .instrument import StageRecorder
+    from .main import build_formats
+
+    cache = RenderCache(args.cache_dir)
+    if args.clear_cache:
+        cache.invalidate()
+    if args.serve is not None:
+        from .server import GraphService, serve
+
+        service = GraphService.load(
+            fragments,
+            cache=False if args.no_cache else cache,
+            max_workers=args.jobs,
+        )
+        serve(service, args.host, args.serve)
+        return
+    recorder = None
+    if args.profile is not None:
+        recorder = StageRecorder(trace_memory=True)
+    overlay = None
+    if args.trace_build or args.overlay:
+        from .overlay import TimingOverlay
+        from .trace import TRACE_SUFFIX, TraceProfile
+
+        if args.trace_build:
+            profile = trace(
+                args.trace_build, args.trace_builder, args.trace_jobs, fragments
+            )
+            trace_path = (args.directory or Path.cwd()).joinpath(
+                args.name + TRACE_SUFFIX
+            )
+            profile.save(trace_path)
+            print(trace_path)
+        else:
+            profile = TraceProfile.load(args.overlay)
+        overlay = TimingOverlay(profile, metric=args.overlay_metric)
+        if args.timeline:
+            profile.save_chrome_trace(args.timeline)
+            print(args.timeline)
+    try:
+        if builders:
+            from .builders import build_builders
+
+            outpaths = {
+                f"{builder}.{format}": outpath
+                for builder, paths in build_builders(
+                    builders,
+                    formats,
+                    args.name,
+                    args.directory,
+                    cache=False if args.no_cache else cache,
+                    max_workers=args.jobs,
+                    layout=args.layout,
+                    instrument=recorder,
+                    fragments=fragments,
+                    compact=args.compact,
+                ).items()
+                for format, outpath in paths.items()
+            }
+        else:
+            outpaths = build_formats(
+                formats,
+                args.name,
+                args.directory,
+                cache=False if args.no_cache else cache,
+                max_workers=args.jobs,
+                layout=args.layout,
+                instrument=recorder,
+                overlay=overlay,
+                focus=focus,
+                fragments=fragments,
+                compact=args.compact,
+            )
+    except ValueError as exc:  # e.g. an unknown focus, or conflicting fragments
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+    for outpath in outpaths.values():
+        print(outpath)
+    if recorder is None:
+        return
+    if args.profile == "-":
+        recorder.print_report()
+    else:
+        Path(args.profile).write_text(recorder.to_json(indent=2), "utf8")
+
 
 if __name__ == "__main__":
-    print(build_main())
+    main()
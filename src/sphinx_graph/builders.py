@@ -0,0 +1,290 @@
+"""Views of the graph for individual Sphinx builders.
+
+The data describes every builder at once: post transforms record the
+``formats`` and ``builders`` they run for, and builder subclasses override
+methods of :class:`sphinx.builders.Builder` (e.g. ``write_doc_serialized``).
+A :class:`BuilderView` restricts the data to what one builder runs:
+the post transforms that apply to it, and the objects of its own builder classes,
+dropping those of other builders (and their overrides).
+
+:func:`build_builders` loads the data once, and renders a view per builder,
+running Graphviz for each view in a bounded pool,
+so that rendering N views costs one load plus N layouts in parallel.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, TypeVar
+
+from .cache import RenderCache, get_cache
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+    from .fragments import FragmentSet
+    from .instrument import Instrumentation
+    from .layout import LayoutProfile
+    from .models import Data
+
+    _D = TypeVar("_D", Data, CompactData)
+
+
+_BASE_BUILDER = "sphinx.builders.Builder"
+_HTML = "sphinx.builders.html.StandaloneHTMLBuilder"
+
+
+class BuilderView(NamedTuple):
+    """The view of the graph for a Sphinx builder."""
+
+    name: str
+    """The name of the builder, e.g. ``dirhtml``."""
+    format: str
+    """The output format of the builder, matched against post transform formats."""
+    classes: tuple[str, ...] = ()
+    """The fully qualified names of the builder class and its base classes,
+    excluding :class:`sphinx.builders.Builder`.
+    """
+
+    @classmethod
+    def from_builder(cls, builder: type) -> BuilderView:
+        """The view for a builder class, e.g. of a third-party extension."""
+        return cls(
+            builder.name,  # type: ignore[attr-defined]
+            builder.format,  # type: ignore[attr-defined]
+            tuple(
+                f"{base.__module__}.{base.__qualname__}"
+                for base in builder.__mro__
+                if base.__module__ != "builtins"
+                and f"{base.__module__}.{base.__qualname__}" != _BASE_BUILDER
+            ),
+        )
+
+    def runs_post_transform(
+        self, formats: Iterable[str], builders: Iterable[str]
+    ) -> bool:
+        """Whether a post transform, restricted to formats and builders, runs."""
+        formats, builders = tuple(formats), tuple(builders)
+        return (not formats or self.format in formats) and (
+            not builders or self.name in builders
+        )
+
+
+BUILDER_VIEWS: dict[str, BuilderView] = {
+    view.name: view
+    for view in (
+        BuilderView("html", "html", (_HTML,)),
+        BuilderView(
+            "dirhtml", "html", ("sphinx.builders.dirhtml.DirectoryHTMLBuilder", _HTML)
+        ),
+        BuilderView(
+            "singlehtml",
+            "html",
+            ("sphinx.builders.singlehtml.SingleFileHTMLBuilder", _HTML),
+        ),
+        BuilderView(
+            "epub",
+            "html",
+            (
+                "sphinx.builders.epub3.Epub3Builder",
+                "sphinx.builders._epub_base.EpubBuilder",
+                _HTML,
+            ),
+        ),
+        BuilderView("latex", "latex", ("sphinx.builders.latex.LaTeXBuilder",)),
+        BuilderView("text", "text", ("sphinx.builders.text.TextBuilder",)),
+        BuilderView("man", "man", ("sphinx.builders.manpage.ManualPageBuilder",)),
+        BuilderView("texinfo", "texinfo", ("sphinx.builders.texinfo.TexinfoBuilder",)),
+        BuilderView("xml", "xml", ("sphinx.builders.xml.XMLBuilder",)),
+    )
+}
+"""The views of the builders of Sphinx, by name."""
+
+
+def get_view(view: str | BuilderView) -> BuilderView:
+    """Get a builder view by name (an unknown name is its own format).
+
+    An unknown builder has no builder classes,
+    so only the objects of the known builders are excluded from it.
+    """
+    if isinstance(view, BuilderView):
+        return view
+    return BUILDER_VIEWS.get(view) or BuilderView(view, view)
+
+
+def builder_data(
+    data: _D, view: str | BuilderView, *, others: Iterable[BuilderView] = ()
+) -> _D:
+    """Restrict the data to what a builder runs.
+
+    Post transforms are kept only if they run for the format and name of the builder.
+    Objects of the classes of other builders are removed,
+    so that the methods they override are shown as overridable, without the overrides.
+    The data is always restricted with :func:`.filter_data`, even if no object is
+    removed, so every view keeps the events and transforms referenced by its objects,
+    the same as the whole graph does.
+
+    :param others: Builders whose classes are excluded,
+        in addition to those of :data:`BUILDER_VIEWS`.
+    """
+    from .graph import filter_data
+
+    view = get_view(view)
+    own = set(view.classes)
+    excluded = {
+        cls
+        for other in (*BUILDER_VIEWS.values(), *others)
+        for cls in other.classes
+        if cls not in own
+    }
+    data = filter_data(
+        data, [path for path in data.objects if path.rpartition(".")[0] not in excluded]
+    )
+    return data.model_copy(
+        update={
+            "post_transforms": {
+                path: tr_data
+                for path, tr_data in data.post_transforms.items()
+                if view.runs_post_transform(tr_data.formats, tr_data.builders)
+            }
+        }
+    )
+
+
+def build_builders(  # noqa: PLR0912,PLR0913,PLR0915
+    views: Sequence[str | BuilderView],
+    formats: Sequence[str] = ("svg",),
+    name: str = "sphinx_graph",
+    directory: Path | None = None,
+    *,
+    cache: RenderCache | bool = True,
+    max_workers: int | None = None,
+    layout: str | LayoutProfile | None = None,
+    instrument: Instrumentation | None = None,
+    fragments: FragmentSet | None = None,
+    compact: bool = False,
+) -> dict[str, dict[str, Path]]:
+    """Render a view of the graph per builder,
+    to ``<directory>/<name>.<builder>.<format>`` for each format.
+
+    The data is read, validated, merged with the fragments and linked once,
+    then each view is built from it, and rendered by Graphviz in a bounded pool
+    while the next view is built.
+
+    :param views: The builders, by name (see :data:`BUILDER_VIEWS`) or view.
+    :param cache: A cache of previous renders, or whether to use the default cache.
+        Only the views and formats that are not already cached are built.
+    :param max_workers: The maximum number of concurrent Graphviz processes
+        (defaults to the number of renders).
+    :param instrument: Receives the ``read``, ``cache``, ``load``, ``link``,
+        ``views`` and ``render`` stages.
+    :param fragments: Data fragments to merge into the data
+        (see :mod:`sphinx_graph.fragments`).
+    :param compact: Load the data as compact records, without validating it
+        (see :mod:`sphinx_graph.compact`).
+    :raises ValueError: If a fragment is invalid or conflicting.
+    :returns: A mapping of each builder to a mapping of each format to its output path.
+    """
+    from .export import EXPORT_FORMATS
+    from .instrument import stage
+    from .layout import get_profile
+    from .main import read_source
+
+    profile = get_profile(layout)
+    resolved = {view.name: view for view in map(get_view, views)}
+
+    with stage(instrument, "read"):
+        source = read_source()
+    directory = directory or Path.cwd()
+    outpaths = {
+        builder: {
+            format: directory.joinpath(f"{name}.{builder}.{format}")
+            for format in formats
+        }
+        for builder in resolved
+    }
+    missing = {
+        builder: {f: path for f, path in paths.items() if f not in EXPORT_FORMATS}
+        for builder, paths in outpaths.items()
+    }
+
+    keys: dict[str, dict[str, str]] = {}
+    cache = get_cache(cache) if any(missing.values()) else None
+    if cache:
+        with stage(instrument, "cache"):
+            extra = {"fragments": fragments.digest()} if fragments else {}
+            for builder, view in resolved.items():
+                keys[builder], missing[builder] = cache.fetch_formats(
+                    source,
+                    missing[builder],
+                    engine=profile.engine,
+                    layout=profile.key(),
+                    builder=repr(tuple(view)),
+                    **extra,
+                )
+    exports = any(f in EXPORT_FORMATS for f in formats)
+    if not exports and not any(missing.values()):
+        return outpaths
+
+    with stage(instrument, "load"):
+        if compact:
+            from .compact import load_compact
+
+            model = load_compact(source=source)
+        else:
+            from .snapshot import load_data
+
+            model = load_data(source=source, instrument=instrument)
+    if fragments:
+        model = fragments.merge(model, instrument=instrument)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .graph import build_graph
+    from .linker import link, warning
+    from .render import run_dot
+
+    # the diagnostics of the views are a subset of those of the whole data
+    with stage(instrument, "link"):
+        for diagnostic in link(model).diagnostics:
+            warning(diagnostic.message)
+
+    renders = sum(map(len, missing.values()))
+    with ThreadPoolExecutor(max_workers or renders or 1) as executor:
+        futures = []
+        with stage(instrument, "views"):
+            for builder, view in resolved.items():
+                if not missing[builder] and not exports:
+                    continue
+                view_data = builder_data(model, view, others=resolved.values())
+                if exports:
+                    from .export import write_export
+
+                    for format, outpath in outpaths[builder].items():
+                        if format in EXPORT_FORMATS:
+                            write_export(view_data, outpath, format=format)
+                if not missing[builder]:
+                    continue
+                dot_source = build_graph(
+                    view_data, link(view_data), layout=profile
+                ).source
+                futures.extend(
+                    executor.submit(
+                        run_dot,
+                        dot_source,
+                        outpath,
+                        format=format,
+                        engine=profile.engine,
+                    )
+                    for format, outpath in missing[builder].items()
+                )
+        with stage(instrument, "render"):
+            for future in futures:
+                future.result()
+
+    if cache:
+        with stage(instrument, "store"):
+            for builder, paths in missing.items():
+                for format, outpath in paths.items():
+                    cache.store(keys[builder][format], format, outpath)
+    return outpaths
@@ -0,0 +1,197 @@
+"""A content-addressed, on-disk cache of rendered graph artifacts."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from functools import cache
+import hashlib
+import os
+from pathlib import Path
+import re
+import shutil
+import time
+
+_ENTRY_NAME = re.compile(r"[0-9a-f]{64}\.[\w-]+")
+"""The names of the artifacts written by :class:`RenderCache`."""
+
+
+def default_cache_dir() -> Path:
+    """The default directory for cached artifacts.
+
+    Can be set with the ``SPHINX_GRAPH_CACHE_DIR`` environment variable,
+    otherwise ``$XDG_CACHE_HOME/sphinx_graph`` (or ``~/.cache/sphinx_graph``).
+    """
+    if env_dir := os.environ.get("SPHINX_GRAPH_CACHE_DIR"):
+        return Path(env_dir)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home().joinpath(".cache")
+    return Path(base).joinpath("sphinx_graph")
+
+
+@cache
+def graphviz_version() -> str:
+    """The version of the installed Graphviz executables (runs ``dot -V`` once),
+    or ``unknown`` if they are not installed,
+    in which case rendering fails, and reports that instead.
+    """
+    import graphviz
+
+    try:
+        return ".".join(str(part) for part in graphviz.version())
+    except graphviz.ExecutableNotFound:
+        return "unknown"
+
+
+def get_cache(cache: RenderCache | bool) -> RenderCache | None:
+    """Get the cache to use, from a cache or whether to use the default cache."""
+    if cache is True:
+        return RenderCache()
+    return cache or None
+
+
+class RenderCache:
+    """A cache of rendered artifacts, keyed by a hash of everything that affects them.
+
+    Entries are stored as ``<key>.<format>`` files in a single directory.
+    Each hit refreshes the entry's modification time,
+    so that eviction by age and size is least-recently-used.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        *,
+        max_size: int = 100 * 1024 * 1024,
+        max_age: float = 30 * 24 * 60 * 60,
+    ) -> None:
+        """Create a new cache.
+
+        :param directory: The directory to store artifacts in.
+        :param max_size: The maximum total size of the artifacts, in bytes.
+        :param max_age: The maximum time since an artifact was last used, in seconds.
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_size = max_size
+        self.max_age = max_age
+
+    def key(
+        self, source: bytes, *, format: str, engine: str | None = "dot", **extra: str
+    ) -> str:
+        """Compute the cache key for a render.
+
+        :param source: The raw bytes of the data the graph is built from.
+        :param format: The output format.
+        :param engine: The Graphviz layout engine,
+            or ``None`` for formats that are written without Graphviz,
+            whose key does not depend on its version.
+        :param extra: Any further options that affect the output.
+        """
+        from . import __version__
+
+        hasher = hashlib.sha256(source)
+        for part in (
+            __version__,
+            graphviz_version() if engine else "",
+            engine or "",
+            format,
+            *(f"{k}={v}" for k, v in sorted(extra.items())),
+        ):
+            hasher.update(b"\0" + part.encode())
+        return hasher.hexdigest()
+
+    def path(self, key: str, format: str) -> Path:
+        """The path of an artifact in the cache."""
+        return self.directory.joinpath(f"{key}.{format}")
+
+    def fetch(self, key: str, format: str, target: Path) -> bool:
+        """Copy a cached artifact to ``target``, returning whether it was found."""
+        cached = self.path(key, format)
+        try:
+            os.utime(cached)
+        except FileNotFoundError:
+            return False
+        if target.resolve() != cached.resolve():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(cached, target)
+        return True
+
+    def fetch_formats(
+        self,
+        source: bytes,
+        outpaths: dict[str, Path],
+        *,
+        engine: str = "dot",
+        **extra: str,
+    ) -> tuple[dict[str, str], dict[str, Path]]:
+        """Fetch cached artifacts for multiple formats.
+
+        :param outpaths: A mapping of each format to its output path.
+        :param extra: Any further options that affect the output.
+        :returns: The key for each format, and the output paths that were not cached.
+        """
+        keys = {
+            format: self.key(source, format=format, engine=engine, **extra)
+            for format in outpaths
+        }
+        missing = {
+            format: outpath
+            for format, outpath in outpaths.items()
+            if not self.fetch(keys[format], format, outpath)
+        }
+        return keys, missing
+
+    def store(self, key: str, format: str, artifact: Path) -> Path:
+        """Add an artifact to the cache, then evict stale entries."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        cached = self.path(key, format)
+        # write to a temporary file first, so readers never see a partial artifact
+        temp = cached.with_name(f".{cached.name}.{os.getpid()}.tmp")
+        shutil.copyfile(artifact, temp)
+        temp.replace(cached)
+        self.prune()
+        return cached
+
+    def entries(self) -> Iterator[Path]:
+        """The artifacts in the cache.
+
+        Only files named like those the cache writes (``<sha256>.<format>``)
+        are entries, so other files in the directory are never removed.
+        """
+        if not self.directory.is_dir():
+            return
+        for path in self.directory.iterdir():
+            if _ENTRY_NAME.fullmatch(path.name) and path.is_file():
+                yield path
+
+    def invalidate(self, key: str | None = None) -> int:
+        """Remove entries from the cache, returning the number removed.
+
+        :param key: Only remove artifacts for this key, otherwise remove all.
+        """
+        removed = 0
+        for path in self.entries():
+            if key is None or path.name.partition(".")[0] == key:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def prune(self) -> int:
+        """Evict entries that are too old, then the least recently used entries,
+        until the cache is within its size limit.
+
+        :returns: The number of entries removed.
+        """
+        entries = []
+        for path in self.entries():
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if now - mtime <= self.max_age and total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
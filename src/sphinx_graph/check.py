@@ -0,0 +1,15 @@
+"""Check the data for dangling references, without building a graph.
+
+This does not import graphviz, so is cheap to run, e.g. in CI.
+"""
+
+from .linker import Diagnostics, link
+from .models import Data
+
+
+def check_diagnostics(data: Data) -> Diagnostics:
+    """Link the data, returning the report of references that do not resolve to a node.
+
+    These are the same references that are warned about when building the graph.
+    """
+    return link(data).diagnostics
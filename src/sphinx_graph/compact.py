@@ -0,0 +1,241 @@
+"""A compact, trusted representation of the data, for very large datasets.
+
+The records mirror the fields of the pydantic models in :mod:`sphinx_graph.models`,
+so can be used in their place by :func:`.build_graph` and its helpers,
+but are frozen dataclasses with slots, hold tuples rather than lists,
+and intern the fully qualified names that are repeated throughout the data
+(object paths, call targets, overrides, events and callbacks).
+Identical calls (e.g. emitting the same event) share a single record.
+
+The data is *not* validated, so should only be loaded from trusted sources;
+validate it with the pydantic models first (e.g. ``python -m sphinx_graph --check``).
+Use ``python scripts/bench_memory.py`` to compare the memory of both representations.
+
+This module does not import pydantic.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import dataclasses
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import sys
+import tomllib
+from typing import TYPE_CHECKING, Any, Literal, Self, TypeVar
+
+if TYPE_CHECKING:
+    from .models import Data, Fragment
+
+_intern = sys.intern
+
+_R = TypeVar("_R")
+
+
+class _Record:
+    """Methods shared with the pydantic models, used by the graph helpers."""
+
+    __slots__ = ()
+
+    def model_copy(self, *, update: dict[str, Any] | None = None) -> Self:
+        """A copy of the record, with some fields replaced."""
+        update = {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in (update or {}).items()
+        }
+        return dataclasses.replace(self, **update)  # type: ignore[type-var]
+
+    def model_dump(self) -> dict[str, Any]:
+        """The record as a dictionary, with lists, like that of the pydantic model."""
+        return json.loads(self.model_dump_json())
+
+    def model_dump_json(self) -> str:
+        """The record as JSON, e.g. for fingerprints."""
+        return json.dumps(dataclasses.asdict(self), separators=(",", ":"))  # type: ignore[call-overload]
+
+
+@dataclass(frozen=True, slots=True)
+class CompactCall(_Record):
+    """A call from one object to another (see :class:`.Call`)."""
+
+    text: str
+    type: Literal[
+        "standard",
+        "enter",
+        "exit",
+        "emit",
+        "apply_transforms",
+        "apply_post_transforms",
+    ] = "standard"
+    is_ref: bool | None = None
+    context: Literal["for", "with", "if", "elif", "else", "fork", None] = None
+    obj_type: Literal["function", "method", None] = None
+    warn_no_object: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class CompactObject(_Record):
+    """A python object (see :class:`.Object`)."""
+
+    description: str = ""
+    type: Literal["function", "method"] = "method"
+    calls: tuple[CompactCall, ...] = ()
+    overridable: bool = False
+    overrides: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class CompactEventCallback(_Record):
+    """A callback for a sphinx event (see :class:`.EventCallback`)."""
+
+    priority: int
+    doc: str = ""
+    hide: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class CompactEvent(_Record):
+    """A sphinx event (see :class:`.Event`)."""
+
+    callbacks: dict[str, CompactEventCallback]
+
+
+@dataclass(frozen=True, slots=True)
+class CompactTransform(_Record):
+    """A transform (see :class:`.Transform`)."""
+
+    priority: int
+    hide: bool = False
+    doc: str = ""
+    emit: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactPostTransform(_Record):
+    """A post transform (see :class:`.PostTransform`)."""
+
+    priority: int
+    formats: tuple[str, ...] = ()
+    builders: tuple[str, ...] = ()
+    hide: bool = False
+    doc: str = ""
+    emit: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class CompactData(_Record):
+    """The data to build the graph from (see :class:`.Data`)."""
+
+    comment: str
+    objects: dict[str, CompactObject]
+    events: dict[str, CompactEvent]
+    transforms: dict[str, CompactTransform]
+    post_transforms: dict[str, CompactPostTransform]
+
+    @classmethod
+    def from_raw(cls, raw: dict[str, Any]) -> CompactData:
+        """Convert the parsed TOML of the data, without validating it."""
+        return _Loader().data(raw)
+
+    @classmethod
+    def from_data(cls, data: Data | Fragment) -> CompactData:
+        """Convert validated data, or a data fragment (with an empty comment)."""
+        return cls.from_raw(data.model_dump(exclude_defaults=True))
+
+
+class _Loader:
+    """Converts raw data to records, sharing identical calls."""
+
+    def __init__(self) -> None:
+        self._calls: dict[tuple, CompactCall] = {}
+
+    def call(self, raw: dict[str, Any]) -> CompactCall:
+        key = tuple(sorted(raw.items()))
+        if (call := self._calls.get(key)) is None:
+            fields = {
+                k: _intern(v) if isinstance(v, str) else v for k, v in raw.items()
+            }
+            call = self._calls[key] = CompactCall(**fields)
+        return call
+
+    def object(self, raw: dict[str, Any]) -> CompactObject:
+        return CompactObject(
+            description=raw.get("description", ""),
+            type=_intern(raw.get("type", "method")),  # type: ignore[arg-type]
+            calls=tuple(self.call(call) for call in raw.get("calls", ())),
+            overridable=raw.get("overridable", False),
+            overrides=tuple(_intern(path) for path in raw.get("overrides", ())),
+        )
+
+    def event(self, raw: dict[str, Any]) -> CompactEvent:
+        return CompactEvent(
+            {
+                _intern(path): CompactEventCallback(**callback)
+                for path, callback in raw["callbacks"].items()
+            }
+        )
+
+    def post_transform(self, raw: dict[str, Any]) -> CompactPostTransform:
+        return CompactPostTransform(
+            **{
+                **raw,
+                "formats": tuple(raw.get("formats", ())),
+                "builders": tuple(raw.get("builders", ())),
+            }
+        )
+
+    def table(
+        self, raw: dict[str, Any], name: str, convert: Callable[[Any], _R]
+    ) -> dict[str, _R]:
+        """Convert each entry of a table, reporting the entry that is malformed.
+
+        :raises ValueError: If the table or an entry does not have the expected shape.
+        """
+        table = raw.get(name, {})
+        if not isinstance(table, dict):
+            raise ValueError(f"{name} is not a table")
+        records = {}
+        for key, value in table.items():
+            try:
+                records[_intern(key)] = convert(value)
+            except (AttributeError, KeyError, TypeError, ValueError) as exc:
+                raise ValueError(
+                    f"{name} {key!r} is malformed: {type(exc).__name__}: {exc}"
+                ) from None
+        return records
+
+    def data(self, raw: dict[str, Any]) -> CompactData:
+        return CompactData(
+            comment=raw.get("comment", ""),
+            objects=self.table(raw, "objects", self.object),
+            events=self.table(raw, "events", self.event),
+            transforms=self.table(
+                raw, "transforms", lambda transform: CompactTransform(**transform)
+            ),
+            post_transforms=self.table(raw, "post_transforms", self.post_transform),
+        )
+
+
+def load_compact(
+    path: Path | None = None, *, source: bytes | None = None
+) -> CompactData:
+    """Load the data from a TOML file, as compact records, without validating it.
+
+    Data that does not have the shape of the models is reported,
+    but the types of the values are not checked.
+
+    :param path: The TOML file (defaults to the bundled data).
+    :param source: The contents of the file, if already read.
+    :raises ValueError: If the data is not valid TOML, or an entry is malformed,
+        naming the entry (and the file, if given).
+    """
+    if source is None:
+        from .main import DATA_PATH
+
+        path = path or DATA_PATH
+        source = path.read_bytes()
+    try:
+        return CompactData.from_raw(tomllib.loads(source.decode("utf8")))
+    except ValueError as exc:  # including TOML errors
+        raise ValueError(f"Invalid data{f' {path}' if path else ''}: {exc}") from None
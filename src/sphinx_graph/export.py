@@ -0,0 +1,152 @@
+"""Export the graph for layout in the browser, bypassing Graphviz.
+
+The graph is serialized to JSON, in the Cytoscape.js ``elements`` format,
+with the label rows of each node in its ``data``.
+A self-contained HTML viewer can also be written,
+which embeds the JSON and a small script (``viewer.js``) to lay it out and draw it.
+
+This module does not import graphviz.
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .ir import GraphIR, NodeKind, RowKind
+from .linker import LinkResult, link, warning
+from .models import Data
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+
+
+EXPORT_FORMATS = ("json", "html")
+"""The output formats that are written without running Graphviz."""
+
+VIEWER_PATH = Path(__file__).with_name("viewer.js")
+"""The path to the script that lays out and draws exported graphs."""
+
+
+def to_cytoscape(ir: GraphIR) -> dict[str, Any]:
+    """Convert the IR to a JSON-compatible graph, in the Cytoscape.js elements format.
+
+    Edge targets that do not have a node of their own are added as ``external`` nodes.
+    """
+    nodes: list[dict[str, Any]] = []
+    seen: set[int] = set()
+    for node in range(ir.node_count):
+        rows: list[dict[str, Any]] = []
+        label = ""
+        for row in ir.rows(node):
+            kind = RowKind(ir.row_kind[row])
+            if kind == RowKind.TITLE:
+                label = ir.row_text[row]
+                continue
+            item: dict[str, Any] = {"kind": kind.name.lower(), "text": ir.row_text[row]}
+            if value := ir.row_value[row]:
+                item["value"] = value
+            if port := ir.row_port[row]:
+                item["port"] = port
+            if indent := ir.row_indent[row]:
+                item["indent"] = indent
+            rows.append(item)
+        seen.add(ir.node_name[node])
+        nodes.append(
+            {
+                "data": {
+                    "id": ir.node_id(node),
+                    "kind": NodeKind(ir.node_kind[node]).name.lower(),
+                    "label": label,
+                    "rows": rows,
+                }
+            }
+        )
+
+    edges: list[dict[str, Any]] = []
+    for edge in range(len(ir.edge_kind)):
+        target = ir.edge_target[edge]
+        if target not in seen:
+            seen.add(target)
+            name = ir.names[target]
+            nodes.append(
+                {"data": {"id": name, "kind": "external", "label": name, "rows": []}}
+            )
+        source, port, target_id, kind = ir.edge(edge)
+        edges.append(
+            {
+                "data": {
+                    "id": f"e{edge}",
+                    "source": source,
+                    "target": target_id,
+                    "port": port,
+                    "kind": kind.name.lower(),
+                }
+            }
+        )
+    return {"comment": ir.comment, "elements": {"nodes": nodes, "edges": edges}}
+
+
+def dumps_json(ir: GraphIR) -> str:
+    """Serialize the IR to compact JSON."""
+    return json.dumps(to_cytoscape(ir), separators=(",", ":"), ensure_ascii=False)
+
+
+def viewer_html(ir: GraphIR, title: str = "Sphinx build process") -> str:
+    """A self-contained HTML page, which lays out and draws the graph in the browser."""
+    # escape "</" so the JSON cannot close the script element
+    graph_json = dumps_json(ir).replace("</", "<\\/")
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+html, body {{ margin: 0; height: 100%; }}
+#graph {{ width: 100vw; height: 100vh; cursor: grab; }}
+</style>
+</head>
+<body>
+<div id="graph"></div>
+<script type="application/json" id="graph-data">{graph_json}</script>
+<script>
+{VIEWER_PATH.read_text("utf8")}
+</script>
+<script>
+SphinxGraph.render(
+  document.getElementById("graph"),
+  JSON.parse(document.getElementById("graph-data").textContent)
+);
+</script>
+</body>
+</html>
+"""
+
+
+def write_export(
+    data: Data | CompactData,
+    outpath: Path,
+    *,
+    format: str,
+    linked: LinkResult | None = None,
+) -> Path:
+    """Write the graph as JSON or a self-contained HTML viewer, atomically.
+
+    :param format: One of :data:`EXPORT_FORMATS`.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {format!r}, expected {EXPORT_FORMATS}")
+    if linked is None:
+        linked = link(data)
+        for diagnostic in linked.diagnostics:
+            warning(diagnostic.message)
+    ir = GraphIR.from_data(data, linked)
+    content = dumps_json(ir) if format == "json" else viewer_html(ir, data.comment)
+    outpath.parent.mkdir(parents=True, exist_ok=True)
+    temp = outpath.with_name(f".{outpath.name}.{os.getpid()}.tmp")
+    temp.write_text(content, "utf8")
+    temp.replace(outpath)
+    return outpath
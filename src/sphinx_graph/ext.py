@@ -0,0 +1,426 @@
+"""A Sphinx extension, with a directive to embed the process graph in documents.
+
+Graphs are rendered at write time, to files named by a fingerprint of the data
+and the directive options, and of the versions of this package and Graphviz,
+so they are only re-rendered when any of them changes;
+renders that are no longer used are removed at the end of the build.
+The data is read once per build.
+The data hash each document was read with is stored in the build environment,
+and documents are marked as outdated (via ``env-get-outdated``) when the data changes.
+
+Data fragments (see :mod:`sphinx_graph.fragments`) are merged into the data
+with ``sphinx_graph_fragments`` (paths relative to the configuration directory)
+and ``sphinx_graph_entry_points``.
+
+With ``sphinx_graph_html_format = "json"``, Graphviz is not run for HTML:
+the graph is written as JSON, and laid out in the browser by ``viewer.js``.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import hashlib
+import os
+from pathlib import Path
+import subprocess
+from typing import TYPE_CHECKING, Any, ClassVar, NamedTuple
+
+from docutils import nodes
+from docutils.parsers.rst import directives
+from sphinx.util import logging
+from sphinx.util.docutils import SphinxDirective
+
+from . import __version__
+from .cache import get_cache, graphviz_version
+from .export import EXPORT_FORMATS
+from .graph import filter_data
+from .layout import LayoutProfile, get_profile
+from .main import read_source
+from .models import Data
+from .reachability import DIRECTIONS, Focus, focus_data
+
+if TYPE_CHECKING:
+    from sphinx.application import Sphinx
+    from sphinx.builders import Builder
+    from sphinx.config import Config
+    from sphinx.environment import BuildEnvironment
+    from sphinx.writers.html5 import HTML5Translator
+    from sphinx.writers.latex import LaTeXTranslator
+    from sphinx.writers.text import TextTranslator
+
+    from .fragments import FragmentSet
+logger = logging.getLogger(__name__)
+
+VIEWER_NAME = "sphinx_graph_viewer.js"
+"""The name of the viewer script, in the HTML static directory."""
+
+
+class process_graph(nodes.General, nodes.Element):  # noqa: N801
+    """A node for an embedded process graph."""
+
+
+def data_hash(source: bytes) -> str:
+    """A hash of the raw data that the graph is built from."""
+    return hashlib.sha256(source).hexdigest()
+
+
+def get_fragments(config: Config) -> FragmentSet:
+    """Read the configured data fragments."""
+    from .fragments import FragmentSet
+
+    return FragmentSet.discover(
+        config.sphinx_graph_fragments,
+        entry_points=config.sphinx_graph_entry_points,
+    )
+
+
+class DataSource(NamedTuple):
+    """The raw data and the configured data fragments, as read for a build."""
+
+    source: bytes
+    fragments: FragmentSet
+    hash: str
+    """A hash of the raw data, and the fragments."""
+
+
+_SOURCES: dict[int, DataSource] = {}
+"""The data read for each build, by the ID of its configuration."""
+
+
+def get_source(config: Config) -> DataSource:
+    """Read the raw data and the configured data fragments, once per build.
+
+    The parallel processes of the build inherit what was read before they start.
+    """
+    if (data_source := _SOURCES.get(id(config))) is None:
+        source = read_source()
+        fragments = get_fragments(config)
+        digest = source + fragments.digest().encode() if fragments else source
+        data_source = DataSource(source, fragments, data_hash(digest))
+        _SOURCES[id(config)] = data_source
+    return data_source
+
+
+def reset_source(app: Sphinx) -> None:
+    """Read the data again for a new build."""
+    _SOURCES.pop(id(app.config), None)
+
+
+def config_data_hash(config: Config) -> str:
+    """A hash of the raw data, and the configured data fragments."""
+    return get_source(config).hash
+
+
+@lru_cache(maxsize=4)
+def load_data(source: bytes) -> Data:
+    """Load the data, memoized for the lifetime of the process."""
+    from .snapshot import load_data
+
+    return load_data(source=source)
+
+
+@lru_cache(maxsize=4)
+def merged_data(data_source: DataSource) -> Data:
+    """Load the data and merge the fragments, memoized for the lifetime of the process."""
+    return data_source.fragments.merge(load_data(data_source.source))
+
+
+def env_docs(env: BuildEnvironment) -> dict[str, str]:
+    """A mapping of each document containing a graph, to the data hash it was read with."""
+    if not hasattr(env, "process_graph_docs"):
+        env.process_graph_docs = {}  # type: ignore[attr-defined]
+    return env.process_graph_docs  # type: ignore[attr-defined]
+
+
+def env_fingerprints(env: BuildEnvironment) -> dict[str, list[str]]:
+    """A mapping of each document containing a graph, to the fingerprints of its graphs."""
+    if not hasattr(env, "process_graph_fingerprints"):
+        env.process_graph_fingerprints = {}  # type: ignore[attr-defined]
+    return env.process_graph_fingerprints  # type: ignore[attr-defined]
+
+
+def output_name(fingerprint: str, format: str, profile: LayoutProfile) -> str:
+    """The file name of a rendered graph.
+
+    This includes the versions of this package, and of Graphviz if it is run,
+    and the attributes of the layout profile,
+    so that upgrading either re-renders the graphs, rather than reusing them.
+    """
+    parts = [fingerprint, __version__, profile.key()]
+    if format not in EXPORT_FORMATS:
+        parts.append(graphviz_version())
+    digest = hashlib.sha256("\0".join(parts).encode()).hexdigest()[:32]
+    return f"process-graph-{digest}.{format}"
+
+
+class ProcessGraphDirective(SphinxDirective):
+    """Embed the process graph, optionally filtered to a subset of objects,
+    or to the neighbourhood of a node.
+    """
+
+    has_content = False
+    option_spec: ClassVar[dict[str, Any]] = {
+        "objects": directives.unchanged,
+        "focus": directives.unchanged_required,
+        "depth": int,
+        "direction": lambda arg: directives.choice(arg, DIRECTIONS),
+        "alt": directives.unchanged,
+        "align": lambda arg: directives.choice(arg, ("left", "center", "right")),
+        "class": directives.class_option,
+        "name": directives.unchanged,
+    }
+
+    def run(self) -> list[nodes.Node]:
+        current_hash = config_data_hash(self.config)
+        objects = (self.options.get("objects") or "").split()
+        focus = ""
+        if "focus" in self.options:
+            depth = self.options.get("depth", 1)
+            focus = Focus(
+                self.options["focus"],
+                None if depth < 0 else depth,
+                self.options.get("direction", "both"),
+            ).key()
+        layout = self.config.sphinx_graph_layout
+        fingerprint = hashlib.sha256(
+            "\0".join([current_hash, layout, focus, *objects]).encode()
+        ).hexdigest()[:32]
+        env_docs(self.env)[self.env.docname] = current_hash
+        env_fingerprints(self.env).setdefault(self.env.docname, []).append(fingerprint)
+
+        node = process_graph()
+        node["fingerprint"] = fingerprint
+        node["objects"] = objects
+        node["focus"] = focus
+        node["classes"] += self.options.get("class", [])
+        for key in ("alt", "align"):
+            if key in self.options:
+                node[key] = self.options[key]
+        self.add_name(node)
+        return [node]
+
+
+def render(builder: Builder, node: process_graph, format: str) -> str:
+    """Render the graph for a node, if not already rendered.
+
+    Renders are written atomically, so concurrent writers never see partial files.
+
+    :returns: The file name of the rendered graph, within the builder's image directory.
+    """
+    profile = get_profile(builder.config.sphinx_graph_layout)
+    fname = output_name(node["fingerprint"], format, profile)
+    outpath = Path(builder.outdir, builder.imagedir, fname)
+    if outpath.exists():
+        return fname
+
+    data_source = get_source(builder.config)
+    source, fragments = data_source.source, data_source.fragments
+    key = ""
+    cache = None
+    if format not in EXPORT_FORMATS:
+        cache = get_cache(builder.config.sphinx_graph_cache)
+    if cache:
+        key = cache.key(
+            source,
+            format=format,
+            engine=profile.engine,
+            layout=profile.key(),
+            objects=" ".join(node["objects"]),
+            focus=node["focus"],
+            **({"fragments": fragments.digest()} if fragments else {}),
+        )
+        if cache.fetch(key, format, outpath):
+            return fname
+
+    data = merged_data(data_source)
+    if node["objects"]:
+        data = filter_data(data, node["objects"])
+    if node["focus"]:
+        data = focus_data(data, Focus.from_key(node["focus"]))
+    if format in EXPORT_FORMATS:
+        from .export import write_export
+
+        write_export(data, outpath, format=format)
+        return fname
+
+    from .stream import render_stream
+
+    temp = outpath.with_name(f".{fname}.{os.getpid()}.tmp")
+    render_stream(data, temp, format=format, layout=profile)
+    temp.replace(outpath)
+
+    if cache:
+        cache.store(key, format, outpath)
+    return fname
+
+
+def html_visit_process_graph(self: HTML5Translator, node: process_graph) -> None:
+    format = self.builder.config.sphinx_graph_html_format
+    try:
+        fname = render(self.builder, node, format)
+    except (OSError, ValueError, subprocess.CalledProcessError) as exc:
+        logger.warning("process-graph could not be rendered: %s", exc, location=node)
+        raise nodes.SkipNode from exc
+
+    src = f"{self.builder.imgpath}/{fname}"
+    alt = self.encode(node.get("alt", "Sphinx build process"))
+    classes = " ".join(["process-graph", *node["classes"]])
+    if "align" in node:
+        self.body.append(f'<div align="{node["align"]}" class="align-{node["align"]}">')
+    if format == "json":
+        self.body.append(
+            f'<div class="process-graph-interactive {classes}" data-src="{src}" '
+            f'role="img" aria-label="{alt}" style="width: 100%; height: 80vh;">'
+            "</div>\n"
+        )
+    elif format == "svg":
+        self.body.append(
+            f'<div class="process-graph"><object data="{src}" '
+            f'type="image/svg+xml" class="{classes}">\n'
+            f'<p class="warning">{alt}</p></object></div>\n'
+        )
+    else:
+        self.body.append(
+            f'<div class="process-graph">'
+            f'<img src="{src}" alt="{alt}" class="{classes}" /></div>\n'
+        )
+    if "align" in node:
+        self.body.append("</div>\n")
+    raise nodes.SkipNode
+
+
+def latex_visit_process_graph(self: LaTeXTranslator, node: process_graph) -> None:
+    try:
+        fname = render(self.builder, node, "pdf")
+    except (OSError, ValueError, subprocess.CalledProcessError) as exc:
+        logger.warning("process-graph could not be rendered: %s", exc, location=node)
+        raise nodes.SkipNode from exc
+    self.body.append(f"\n\\sphinxincludegraphics[]{{{fname}}}\n")
+    raise nodes.SkipNode
+
+
+def text_visit_process_graph(self: TextTranslator, node: process_graph) -> None:
+    self.add_text(f"[graph: {node['alt']}]" if "alt" in node else "[graph]")
+    raise nodes.SkipNode
+
+
+def skip_process_graph(self: Any, node: process_graph) -> None:
+    raise nodes.SkipNode
+
+
+def add_viewer(app: Sphinx) -> None:
+    """Load the script that lays out JSON graphs, if the HTML format is JSON."""
+    if app.builder.format == "html" and app.config.sphinx_graph_html_format == "json":
+        app.add_js_file(VIEWER_NAME)
+
+
+def copy_viewer(app: Sphinx, exception: Exception | None) -> None:
+    """Copy the script that lays out JSON graphs to the static directory."""
+    if (
+        exception is None
+        and app.builder.format == "html"
+        and app.config.sphinx_graph_html_format == "json"
+    ):
+        from sphinx.util.fileutil import copy_asset_file
+
+        from .export import VIEWER_PATH
+
+        static = Path(app.builder.outdir, "_static")
+        static.mkdir(parents=True, exist_ok=True)
+        copy_asset_file(VIEWER_PATH, static / VIEWER_NAME)
+
+
+def get_outdated(
+    app: Sphinx,
+    env: BuildEnvironment,
+    added: set[str],
+    changed: set[str],
+    removed: set[str],
+) -> list[str]:
+    """Re-read documents containing graphs, if the data has changed since they were read."""
+    current_hash = config_data_hash(app.config)
+    return [
+        docname
+        for docname, read_hash in env_docs(env).items()
+        if read_hash != current_hash and docname not in removed
+    ]
+
+
+def purge_doc(app: Sphinx, env: BuildEnvironment, docname: str) -> None:
+    env_docs(env).pop(docname, None)
+    env_fingerprints(env).pop(docname, None)
+
+
+def merge_info(
+    app: Sphinx, env: BuildEnvironment, docnames: set[str], other: BuildEnvironment
+) -> None:
+    for get in (env_docs, env_fingerprints):
+        other_docs = get(other)
+        get(env).update(
+            {
+                docname: other_docs[docname]
+                for docname in docnames
+                if docname in other_docs
+            }
+        )
+
+
+def remove_stale(app: Sphinx, exception: Exception | None) -> None:
+    """Remove the rendered graphs that are no longer used by any document."""
+    if exception is not None:
+        return
+    if app.builder.format == "html":
+        format = app.config.sphinx_graph_html_format
+    elif app.builder.format == "latex":
+        format = "pdf"
+    else:
+        return
+    profile = get_profile(app.config.sphinx_graph_layout)
+    used = {
+        output_name(fingerprint, format, profile)
+        for fingerprints in env_fingerprints(app.env).values()
+        for fingerprint in fingerprints
+    }
+    imagedir = Path(app.builder.outdir, app.builder.imagedir)
+    for path in imagedir.glob(f"process-graph-*.{format}"):
+        if path.name not in used:
+            path.unlink(missing_ok=True)
+
+
+def resolve_fragments(app: Sphinx, config: Config) -> None:
+    """Make the paths of the data fragments relative to the configuration directory."""
+    config.sphinx_graph_fragments = [
+        str(Path(app.confdir, path)) for path in config.sphinx_graph_fragments
+    ]
+
+
+def setup(app: Sphinx) -> dict[str, Any]:
+    """Setup the extension."""
+    app.add_config_value("sphinx_graph_html_format", "svg", "html", types=[str])
+    app.add_config_value("sphinx_graph_cache", True, "", types=[bool])
+    app.add_config_value("sphinx_graph_layout", "default", "env", types=[str])
+    app.add_config_value("sphinx_graph_fragments", [], "env", types=[list])
+    app.add_config_value("sphinx_graph_entry_points", False, "env", types=[bool])
+    app.add_node(
+        process_graph,
+        html=(html_visit_process_graph, None),
+        latex=(latex_visit_process_graph, None),
+        text=(text_visit_process_graph, None),
+        man=(skip_process_graph, None),
+        texinfo=(skip_process_graph, None),
+    )
+    app.add_directive("process-graph", ProcessGraphDirective)
+    app.connect("config-inited", resolve_fragments)
+    app.connect("builder-inited", reset_source)
+    app.connect("builder-inited", add_viewer)
+    app.connect("build-finished", copy_viewer)
+    app.connect("build-finished", remove_stale)
+    app.connect("env-get-outdated", get_outdated)
+    app.connect("env-purge-doc", purge_doc)
+    app.connect("env-merge-info", merge_info)
+    return {
+        "version": __version__,
+        "env_version": 2,
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
@@ -0,0 +1,246 @@
+"""Data fragments: TOML files with extra objects, events and transforms,
+merged into the data, for example to add the callbacks of other extensions.
+
+A fragment has the same tables as the data (``objects``, ``events``, ``transforms``
+and ``post_transforms``), all optional.
+An event which is already in the data has the callbacks of the fragment added to it.
+Defining the same object, transform or callback differently in two places is an error.
+
+Fragments are found in directories (all ``*.toml`` files, in name order),
+or from the ``sphinx_graph.fragments`` entry point group,
+whose entry points refer to a path (or a list of paths) to a fragment or directory:
+
+.. code-block:: toml
+
+   [project.entry-points."sphinx_graph.fragments"]
+   my_extension = "my_extension:GRAPH_FRAGMENTS"
+
+Each fragment is parsed and validated once per content hash, and cached on disk,
+so that changing one fragment only re-parses that one.
+If there are many to parse, they are parsed in parallel processes.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from functools import cache
+import hashlib
+import os
+from pathlib import Path
+import tomllib
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from .cache import default_cache_dir
+from .instrument import Instrumentation, stage
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+    from .models import Data, Fragment
+
+    _D = TypeVar("_D", Data, CompactData)
+
+ENTRY_POINT_GROUP = "sphinx_graph.fragments"
+
+PARALLEL_MIN_BYTES = 256 * 1024
+"""The total size of fragments to parse, above which they are parsed in parallel
+(below it, starting the processes costs more than it saves).
+"""
+
+_PARSED: dict[str, Fragment] = {}
+"""Fragments parsed by this process, by content hash."""
+
+
+def _expand(path: Path) -> list[Path]:
+    return sorted(path.glob("*.toml")) if path.is_dir() else [path]
+
+
+@cache
+def _entry_point_paths() -> tuple[Path, ...]:
+    """The paths from the entry points (found once, since scanning them is slow)."""
+    from importlib.metadata import entry_points
+
+    paths: list[Path] = []
+    for entry_point in sorted(
+        entry_points(group=ENTRY_POINT_GROUP), key=lambda ep: ep.name
+    ):
+        value = entry_point.load()
+        if isinstance(value, str | os.PathLike):
+            value = [value]
+        paths.extend(map(Path, value))
+    return tuple(paths)
+
+
+def discover_fragments(
+    paths: Iterable[str | os.PathLike[str]] = (), *, entry_points: bool = False
+) -> list[Path]:
+    """Find the fragment files, from paths to fragments or directories of them.
+
+    :param entry_points: Also find the fragments of installed packages,
+        from the ``sphinx_graph.fragments`` entry point group.
+    """
+    found = [fragment for path in paths for fragment in _expand(Path(path))]
+    if entry_points:
+        found.extend(f for path in _entry_point_paths() for f in _expand(path))
+    return found
+
+
+def _parse(path: Path, source: bytes) -> Fragment:
+    from .models import Fragment
+
+    try:
+        return Fragment(**tomllib.loads(source.decode("utf8")))
+    except ValueError as exc:  # including TOML and validation errors
+        raise ValueError(f"Invalid data fragment {path}: {exc}") from None
+
+
+def _cache_path(sha256: str) -> Path:
+    return default_cache_dir().joinpath("fragments", f"{sha256}.snapshot")
+
+
+class FragmentSet:
+    """The fragments to merge into the data, read but not yet parsed.
+
+    :param paths: The fragment files, in the order they are merged.
+    """
+
+    def __init__(self, paths: Sequence[Path]) -> None:
+        self.sources = {path: path.read_bytes() for path in paths}
+        self.hashes = {
+            path: hashlib.sha256(source).hexdigest()
+            for path, source in self.sources.items()
+        }
+
+    @classmethod
+    def discover(
+        cls, paths: Iterable[str | os.PathLike[str]] = (), *, entry_points: bool = False
+    ) -> FragmentSet:
+        """Read the fragments found by :func:`discover_fragments`."""
+        return cls(discover_fragments(paths, entry_points=entry_points))
+
+    def __bool__(self) -> bool:
+        return bool(self.sources)
+
+    def digest(self) -> str:
+        """A hash of the fragments, for cache keys."""
+        return hashlib.sha256(
+            "\0".join(f"{path.name}:{h}" for path, h in self.hashes.items()).encode()
+        ).hexdigest()
+
+    def parse(self, *, max_workers: int | None = None) -> dict[Path, Fragment]:
+        """Parse and validate each fragment, unless already cached.
+
+        :param max_workers: The maximum number of processes to parse with.
+        :raises ValueError: If a fragment is not valid TOML, or not a valid fragment.
+        """
+        from .snapshot import SnapshotHeader, _read, _versions, _write
+
+        version = _versions()
+        parsed: dict[Path, Fragment] = {}
+        missing: dict[Path, bytes] = {}
+        for path, source in self.sources.items():
+            sha256 = self.hashes[path]
+            header = SnapshotHeader(version, -1, len(source), sha256)
+            if sha256 in _PARSED:
+                parsed[path] = _PARSED[sha256]
+            elif (result := _read(_cache_path(sha256), header)) is not None:
+                parsed[path] = _PARSED[sha256] = result[1]
+            else:
+                missing[path] = source
+
+        workers = min(max_workers or os.cpu_count() or 1, len(missing))
+        if workers > 1 and sum(map(len, missing.values())) >= PARALLEL_MIN_BYTES:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(workers) as executor:
+                results = executor.map(_parse, missing.keys(), missing.values())
+                parsed.update(zip(missing, results, strict=True))
+        else:
+            parsed.update(
+                (path, _parse(path, source)) for path, source in missing.items()
+            )
+
+        for path, source in missing.items():
+            sha256 = self.hashes[path]
+            _PARSED[sha256] = parsed[path]
+            header = SnapshotHeader(version, -1, len(source), sha256)
+            _write(_cache_path(sha256), header, parsed[path])
+        return {path: parsed[path] for path in self.sources}
+
+    def merge(
+        self,
+        data: _D,
+        *,
+        max_workers: int | None = None,
+        instrument: Instrumentation | None = None,
+    ) -> _D:
+        """Parse the fragments, and merge them into the data.
+
+        If the data is compact records (see :mod:`sphinx_graph.compact`),
+        the fragments are converted to records before they are merged.
+
+        :param instrument: Receives the ``fragments`` stage.
+        :raises ValueError: If a fragment is invalid, or conflicts with the data
+            or another fragment.
+        """
+        if not self:
+            return data
+        with stage(instrument, "fragments"):
+            parsed = self.parse(max_workers=max_workers)
+            from .compact import CompactData
+
+            if isinstance(data, CompactData):
+                return merge_fragments(
+                    data,
+                    [
+                        (path, CompactData.from_data(fragment))
+                        for path, fragment in parsed.items()
+                    ],
+                )
+            return merge_fragments(data, parsed.items())
+
+
+def merge_fragments(
+    data: _D, fragments: Iterable[tuple[Path, Fragment | CompactData]]
+) -> _D:
+    """Merge fragments into the data, in order.
+
+    Definitions which are equal to an existing one are ignored
+    (they are compared by their fields, so records and models compare equal).
+
+    :raises ValueError: Listing every conflicting definition.
+    """
+    tables = {
+        "objects": dict(data.objects),
+        "transforms": dict(data.transforms),
+        "post_transforms": dict(data.post_transforms),
+    }
+    events = dict(data.events)
+    origins: dict[tuple[str, str], Path] = {}
+    conflicts: list[str] = []
+
+    def _add(table: str, merged: dict, key: str, value: Any, origin: Path) -> None:
+        if key not in merged:
+            merged[key] = value
+            origins[(table, key)] = origin
+        elif merged[key].model_dump() != value.model_dump():
+            first = origins.get((table, key), "the data")
+            conflicts.append(f"{table} {key!r} is defined in {first} and {origin}")
+
+    for origin, fragment in fragments:
+        for table, merged in tables.items():
+            for key, value in getattr(fragment, table).items():
+                _add(table, merged, key, value, origin)
+        for name, event in fragment.events.items():
+            if name not in events:
+                events[name] = event.model_copy(update={"callbacks": {}})
+            callbacks = dict(events[name].callbacks)
+            for path, callback in event.callbacks.items():
+                _add(f"events.{name}.callbacks", callbacks, path, callback, origin)
+            events[name] = events[name].model_copy(update={"callbacks": callbacks})
+
+    if conflicts:
+        raise ValueError(
+            "Conflicting definitions in the data fragments:\n  "
+            + "\n  ".join(conflicts)
+        )
+    return data.model_copy(update={**tables, "events": events})
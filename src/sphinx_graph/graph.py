@@ -0,0 +1,355 @@
+"""Build a Graphviz graph from the data."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, TypeVar
+
+from graphviz import Digraph
+
+from . import html_like as html
+from .instrument import Instrumentation, stage
+from .ir import EdgeKind, GraphIR, NodeKind, RowKind, path2name  # noqa: F401
+from .layout import LayoutProfile, get_profile
+from .linker import (  # noqa: F401
+    POST_TRANSFORMS_ID,
+    TRANSFORMS_ID,
+    LinkResult,
+    link,
+    warning,
+)
+from .models import Data, Object
+from .overlay import Overlay
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+
+_D = TypeVar("_D", Data, "CompactData")
+
+
+def build_graph(
+    data: Data | CompactData,
+    linked: LinkResult | None = None,
+    *,
+    layout: str | LayoutProfile | None = None,
+    instrument: Instrumentation | None = None,
+    overlay: Overlay | None = None,
+) -> Digraph:
+    """Build a graph of the build process of a Sphinx project.
+
+    :param linked: The result of linking the data, if already computed.
+        Otherwise the data is linked, and any diagnostics are warned about.
+    :param layout: The layout profile (see :mod:`sphinx_graph.layout`).
+    :param instrument: Receives the ``build_graph`` stage,
+        and its ``link``, ``ir`` and ``emit`` sub-stages.
+    :param overlay: Adds attributes to the nodes and edges,
+        e.g. a :class:`.TimingOverlay` of a traced build.
+    """
+    with stage(instrument, "build_graph"):
+        if linked is None:
+            with stage(instrument, "link"):
+                linked = link(data)
+            for diagnostic in linked.diagnostics:
+                warning(diagnostic.message)
+        with stage(instrument, "ir"):
+            ir = GraphIR.from_data(data, linked)
+        with stage(instrument, "emit"):
+            return emit_graph(ir, layout=layout, overlay=overlay)
+
+
+def new_graph(
+    comment: str, layout: str | LayoutProfile | None = None, **kwargs
+) -> Digraph:
+    """Create an empty graph, with the attributes and engine of a layout profile."""
+    profile = get_profile(layout)
+    return Digraph(
+        comment=comment,
+        graph_attr={"rankdir": "LR", **profile.graph_attr},
+        engine=profile.engine,
+        **kwargs,
+    )
+
+
+def emit_graph(
+    ir: GraphIR,
+    *,
+    layout: str | LayoutProfile | None = None,
+    overlay: Overlay | None = None,
+) -> Digraph:
+    """Emit a Graphviz graph from the IR."""
+    graph = new_graph(ir.comment, layout)
+    for node in range(ir.node_count):
+        add_node(ir, node, graph, overlay)
+    return graph
+
+
+def filter_data(data: _D, objects: Iterable[str]) -> _D:
+    """Restrict the data to a subset of objects.
+
+    Events and transforms are kept only if they are referenced by the objects
+    (or, for events, emitted by the kept transforms).
+    References to objects that are filtered out keep their labels,
+    but are not warned about, and overrides are restricted to the kept objects.
+
+    :param objects: The fully qualified names of the objects to keep.
+    """
+    kept = {path: data.objects[path] for path in objects if path in data.objects}
+    new_objects: dict[str, Object] = {}
+    events: set[str] = set()
+    call_types: set[str] = set()
+    for path, object_data in kept.items():
+        calls = []
+        for call in object_data.calls:
+            call_types.add(call.type)
+            if call.type == "emit":
+                events.add(call.text)
+            elif (obj := data.objects.get(call.text)) and call.text not in kept:
+                call = call.model_copy(  # noqa: PLW2901
+                    update={"obj_type": obj.type, "warn_no_object": False}
+                )
+            calls.append(call)
+        new_objects[path] = object_data.model_copy(
+            update={
+                "calls": calls,
+                "overridable": object_data.overridable or bool(object_data.overrides),
+                "overrides": [o for o in object_data.overrides if o in kept],
+            }
+        )
+    transforms = data.transforms if "apply_transforms" in call_types else {}
+    post_transforms = (
+        data.post_transforms if "apply_post_transforms" in call_types else {}
+    )
+    for tr_data in (*transforms.values(), *post_transforms.values()):
+        if tr_data.emit and not tr_data.hide:
+            events.add(tr_data.emit)
+    return data.model_copy(
+        update={
+            "objects": new_objects,
+            "events": {k: v for k, v in data.events.items() if k in events},
+            "transforms": transforms,
+            "post_transforms": post_transforms,
+        }
+    )
+
+
+def add_node(
+    ir: GraphIR, node: int, graph: Digraph, overlay: Overlay | None = None
+) -> None:
+    """Add a node of the IR, with its outgoing edges."""
+    match ir.node_kind[node]:
+        case NodeKind.OBJECT:
+            add_object_node(ir, node, graph, overlay)
+        case NodeKind.EVENT:
+            add_event_node(ir, node, graph, overlay)
+        case NodeKind.TRANSFORMS:
+            add_transforms_node(ir, node, graph, overlay)
+        case NodeKind.POST_TRANSFORMS:
+            add_post_transforms_node(ir, node, graph, overlay)
+
+
+def add_object_node(
+    ir: GraphIR, node: int, graph: Digraph, overlay: Overlay | None = None
+) -> None:
+    """Add a node for an object, with edges for its calls and overrides."""
+    table = html.Table(border=0, cellspacing=0)
+    for row in ir.rows(node):
+        kind = ir.row_kind[row]
+        text = ir.row_text[row]
+        match kind:
+            case RowKind.TITLE:
+                table.add_row([html.TableCell(html.u(text), align="CENTER")])
+            case RowKind.DESCRIPTION:
+                table.add_row(
+                    [
+                        html.TableCell(
+                            html.multiline(text, "LEFT"),
+                            align="LEFT",
+                            cellpadding=10,
+                        )
+                    ]
+                )
+            case RowKind.OVERRIDABLE:
+                table.add_row(
+                    [html.TableCell(html.i(text), align="LEFT", cellpadding=10)]
+                )
+            case RowKind.OVERRIDE:
+                table.add_row(
+                    [
+                        html.TableCell(
+                            text, align="LEFT", border=1, port=ir.row_port[row]
+                        )
+                    ]
+                )
+            case _:
+                cell_kwargs = {}
+                if kind == RowKind.ENTER:
+                    text = f"{ir.row_value[row]} {text}:"
+                elif kind == RowKind.EMIT:
+                    text = f"emit {text}"
+                    cell_kwargs["bgcolor"] = "lightblue"
+                elif kind in (RowKind.APPLY_TRANSFORMS, RowKind.APPLY_POST_TRANSFORMS):
+                    cell_kwargs["bgcolor"] = "lightyellow"
+                table.add_row(
+                    [
+                        html.TableCell(
+                            " " * ir.row_indent[row] * 4 + text,
+                            align="LEFT",
+                            port=ir.row_port[row],
+                            border=1,
+                            **cell_kwargs,
+                        )
+                    ]
+                )
+    _add_labelled_node(ir, node, table, graph, overlay)
+
+
+def add_event_node(
+    ir: GraphIR, node: int, graph: Digraph, overlay: Overlay | None = None
+) -> None:
+    """Add a node for an event, with its callbacks."""
+    columns = 2 + (overlay.columns(ir, node) if overlay is not None else 0)
+    table = html.Table(border=0, cellspacing=0)
+    for row in ir.rows(node):
+        text = ir.row_text[row]
+        match ir.row_kind[row]:
+            case RowKind.TITLE:
+                table.add_row(
+                    [
+                        html.TableCell(
+                            html.u(text),
+                            align="CENTER",
+                            colspan=columns,
+                            bgcolor="lightblue",
+                        )
+                    ]
+                )
+            case RowKind.CALLBACK:
+                cells = [
+                    html.TableCell(text, align="LEFT", border=1, cellpadding=3),
+                    html.TableCell(ir.row_value[row], align="CENTER", border=1),
+                ]
+                if columns > 2:  # noqa: PLR2004
+                    cells.extend(_overlay_cells(overlay, ir, node, row))
+                table.add_row(cells)
+            case RowKind.DOC:
+                table.add_row([_doc_cell(text, colspan=columns)])
+    _add_labelled_node(ir, node, table, graph, overlay)
+
+
+def add_transforms_node(
+    ir: GraphIR, node: int, graph: Digraph, overlay: Overlay | None = None
+) -> None:
+    """Add a node for the transforms, with edges for the events they emit."""
+    columns = 2 + (overlay.columns(ir, node) if overlay is not None else 0)
+    table = html.Table(border=0, cellspacing=0)
+    for row in ir.rows(node):
+        text = ir.row_text[row]
+        match ir.row_kind[row]:
+            case RowKind.TITLE:
+                table.add_row(
+                    [
+                        html.TableCell(
+                            html.u(text),
+                            align="CENTER",
+                            colspan=columns,
+                            bgcolor="lightyellow",
+                        )
+                    ]
+                )
+            case RowKind.TRANSFORM:
+                cells = [
+                    html.TableCell(text, align="LEFT", border=1, cellpadding=3),
+                    html.TableCell(
+                        ir.row_value[row],
+                        align="CENTER",
+                        border=1,
+                        port=ir.row_port[row],
+                    ),
+                ]
+                if columns > 2:  # noqa: PLR2004
+                    cells.extend(_overlay_cells(overlay, ir, node, row))
+                table.add_row(cells)
+            case RowKind.DOC:
+                table.add_row([_doc_cell(text, colspan=columns)])
+    _add_labelled_node(ir, node, table, graph, overlay)
+
+
+def add_post_transforms_node(
+    ir: GraphIR, node: int, graph: Digraph, overlay: Overlay | None = None
+) -> None:
+    """Add a node for the post transforms, with edges for the events they emit."""
+    columns = 3 + (overlay.columns(ir, node) if overlay is not None else 0)
+    table = html.Table(border=0, cellspacing=0)
+    for row in ir.rows(node):
+        text = ir.row_text[row]
+        match ir.row_kind[row]:
+            case RowKind.TITLE:
+                table.add_row(
+                    [
+                        html.TableCell(
+                            html.u(text),
+                            align="CENTER",
+                            colspan=columns,
+                            bgcolor="lightyellow",
+                        )
+                    ]
+                )
+            case RowKind.POST_TRANSFORM:
+                cells = [
+                    html.TableCell(text, align="LEFT", border=1, cellpadding=3),
+                    html.TableCell(
+                        ir.row_value[row],
+                        align="LEFT",
+                        border=1,
+                        port=ir.row_port[row],
+                    ),
+                ]
+                if columns > 3:  # noqa: PLR2004
+                    cells.extend(_overlay_cells(overlay, ir, node, row))
+                table.add_row(cells)
+            case RowKind.DOC:
+                table.add_row([_doc_cell(text, colspan=columns)])
+    _add_labelled_node(ir, node, table, graph, overlay)
+
+
+def _overlay_cells(
+    overlay: Overlay, ir: GraphIR, node: int, row: int
+) -> list[html.TableCell]:
+    cells = []
+    for cell in overlay.row_cells(ir, node, row):
+        if cell.bgcolor:
+            cells.append(
+                html.TableCell(cell.text, align="RIGHT", border=1, bgcolor=cell.bgcolor)
+            )
+        else:
+            cells.append(html.TableCell(cell.text, align="RIGHT", border=1))
+    return cells
+
+
+def _doc_cell(text: str, colspan: int) -> html.TableCell:
+    return html.TableCell(html.multiline(text, "LEFT"), align="LEFT", colspan=colspan)
+
+
+def _add_labelled_node(
+    ir: GraphIR,
+    node: int,
+    table: html.Table,
+    graph: Digraph,
+    overlay: Overlay | None = None,
+) -> None:
+    """Add the outgoing edges of a node, then the node itself."""
+    names = ir.names
+    node_id = ir.node_id(node)
+    for edge in ir.edges(node):
+        tail = f"{node_id}:{ir.row_port[ir.edge_row[edge]]}"
+        head = names[ir.edge_target[edge]]
+        attrs = {}
+        if ir.edge_kind[edge] not in (EdgeKind.CALL, EdgeKind.EMIT):
+            attrs["style"] = "dashed"
+        if overlay is not None:
+            attrs.update(overlay.edge_attrs(ir, edge))
+        graph.edge(tail, head, **attrs)
+    attrs = {"shape": "box", "style": "rounded", "margin": ".2"}
+    if overlay is not None:
+        attrs.update(overlay.node_attrs(ir, node))
+    graph.node(node_id, label=html.html(str(table)), **attrs)
@@ -1,4 +1,34 @@
-from typing import Literal, TypedDict, Unpack
+"""Generate Graphviz HTML-like labels.
+
+Plain strings are escaped when they are serialized,
+whereas :class:`Markup` strings (as returned by the helper functions here,
+and by serializing a :class:`Table` or :class:`TableCell`, so tables can be nested)
+are output verbatim.
+"""
+
+from typing import Literal, NamedTuple, TypedDict, Unpack
+
+
+class Markup(str):
+    """A string of HTML-like markup, which is not escaped on output."""
+
+    __slots__ = ()
+
+
+_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTRIBUTE_ESCAPES = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}
+)
+
+
+def escape(s: str) -> Markup:
+    """Escape a string for use in a label, unless it is already markup."""
+    if isinstance(s, Markup):
+        return s
+    s = str(s)
+    if "&" in s or "<" in s or ">" in s:
+        return Markup(s.translate(_ESCAPES))
+    return Markup(s)
 
 
 def html(s: str) -> str:
@@ -6,46 +36,53 @@ def html(s: str) -> str:
     return f"<{s}>"
 
 
-def u(s: str) -> str:
+def u(s: str) -> Markup:
     """underline."""
-    return f"<U>{s}</U>"
+    return Markup(f"<U>{escape(s)}</U>")
 
 
-def o(s: str) -> str:
+def o(s: str) -> Markup:
     """underline."""
-    return f"<U>{s}</U>"
+    return Markup(f"<U>{escape(s)}</U>")
 
 
-def b(s: str) -> str:
+def b(s: str) -> Markup:
     """bold."""
-    return f"<B>{s}</B>"
+    return Markup(f"<B>{escape(s)}</B>")
 
 
-def i(s: str) -> str:
+def i(s: str) -> Markup:
     """italic."""
-    return f"<I>{s}</I>"
+    return Markup(f"<I>{escape(s)}</I>")
 
 
-def s(s: str) -> str:
+def s(s: str) -> Markup:
     """strike-through."""
-    return f"<S>{s}</S>"
+    return Markup(f"<S>{escape(s)}</S>")
 
 
-def sub(s: str) -> str:
+def sub(s: str) -> Markup:
     """Sub-script."""
-    return f"<SUB>{s}</SUB>"
+    return Markup(f"<SUB>{escape(s)}</SUB>")
 
 
-def sup(s: str) -> str:
+def sup(s: str) -> Markup:
     """Super-script."""
-    return f"<SUP>{s}</SUP>"
+    return Markup(f"<SUP>{escape(s)}</SUP>")
 
 
-def br(align: Literal["CENTER", "LEFT", "RIGHT", None] = None) -> str:
+def br(align: Literal["CENTER", "LEFT", "RIGHT", None] = None) -> Markup:
     """line break."""
     if align:
-        return f'<BR ALIGN="{align}" />'
-    return "<BR/>"
+        return Markup(f'<BR ALIGN="{align}" />')
+    return Markup("<BR/>")
+
+
+def multiline(
+    text: str, align: Literal["CENTER", "LEFT", "RIGHT", None] = None
+) -> Markup:
+    """Escape each line of a text, and join them with line breaks."""
+    return Markup(br(align).join(escape(line) for line in text.split("\n")))
 
 
 class TableParams(TypedDict):
@@ -193,53 +230,134 @@ class TableCellParams(TypedDict):
     """
 
 
+class _Attributes(NamedTuple):
+    """The serialized opening tag of an element, split around its port."""
+
+    items: tuple[tuple[str, object], ...]
+    """The attributes of the element, with a ``None`` port."""
+    start: str
+    """The opening tag up to the port value, or the full tag if there is no port."""
+    end: str
+    """The opening tag after the port value."""
+
+
+_ATTRIBUTES: dict[tuple[str, tuple], _Attributes] = {}
+
+
+def _attributes(tag: str, items: tuple[tuple[str, object], ...]) -> _Attributes:
+    """Get the serialized opening tag of an element, from its attribute items.
+
+    The value of any ``port`` item should be ``None``;
+    since ports are unique per cell, they are inserted on output,
+    so that elements with the same styling share a single cached instance.
+    """
+    if (attrs := _ATTRIBUTES.get((tag, items))) is not None:
+        return attrs
+    parts = [f"<{tag}"]
+    for key, value in items:
+        if key == "port":
+            parts[-1] += ' PORT="'
+            parts.append('"')
+            continue
+        if key == "fixedsize":
+            str_value = "TRUE" if value else "FALSE"
+        else:
+            str_value = str(value).translate(_ATTRIBUTE_ESCAPES)
+        parts[-1] += f' {key.upper()}="{str_value}"'
+    parts[-1] += ">\n"
+    attrs = _Attributes(items, parts[0], parts[1] if len(parts) > 1 else "")
+    _ATTRIBUTES[(tag, items)] = attrs
+    if tag == "TD":
+        _CELL_ATTRIBUTES[items] = attrs
+    return attrs
+
+
+_CELL_ATTRIBUTES: dict[tuple, _Attributes] = {}
+"""A direct lookup of cell attributes, for the hot path of cell creation."""
+
+
+def _start_tag(element: "TableCell | Table") -> str:
+    """Serialize the opening tag of an element."""
+    if element.port is None:
+        return element._attrs.start
+    port = str(element.port).translate(_ATTRIBUTE_ESCAPES)
+    return f"{element._attrs.start}{port}{element._attrs.end}"
+
+
+def _kwargs(element: "TableCell | Table") -> dict:
+    """Reconstruct the keyword arguments of an element."""
+    kwargs = dict(element._attrs.items)
+    if element.port is not None:
+        kwargs["port"] = element.port
+    return kwargs
+
+
 class TableCell:
     """A cell in a table."""
 
+    __slots__ = ("_attrs", "content", "port")
+
     def __init__(self, content: str, **kwargs: Unpack[TableCellParams]) -> None:
         """Create a new cell."""
         self.content = content
-        self.kwargs = kwargs
+        if (port := kwargs.get("port")) is not None:
+            kwargs["port"] = None
+        self.port = port
+        items = tuple(kwargs.items())
+        self._attrs = _CELL_ATTRIBUTES.get(items) or _attributes("TD", items)
 
-    def __repr__(self) -> str:
-        text = "<TD"
-        for key, value in self.kwargs.items():
-            if key == "fixedsize":
-                str_value = "TRUE" if value else "FALSE"
-            else:
-                str_value = str(value)  # TODO escape "
-            text += f' {key.upper()}="{str_value}"'
-        text += f">\n{self.content}\n</TD>"
-        return text
+    @property
+    def kwargs(self) -> TableCellParams:
+        """The attributes of the cell."""
+        return _kwargs(self)  # type: ignore[return-value]
+
+    def __repr__(self) -> Markup:
+        return Markup(f"{_start_tag(self)}{escape(self.content)}\n</TD>")
 
 
 class Table:
     """A table of data."""
 
+    __slots__ = ("_attrs", "port", "rows")
+
     def __init__(
         self, rows: list[list[TableCell]] | None = None, **kwargs: Unpack[TableParams]
     ) -> None:
         """Create a new table."""
-        self.kwargs = kwargs
+        if (port := kwargs.get("port")) is not None:
+            kwargs["port"] = None
+        self.port = port
+        self._attrs = _attributes("TABLE", tuple(kwargs.items()))
         self.rows = rows or []
 
+    @property
+    def kwargs(self) -> TableParams:
+        """The attributes of the table."""
+        return _kwargs(self)  # type: ignore[return-value]
+
     def add_row(self, cells: list[TableCell]) -> None:
         """Add a row to the table."""
         self.rows.append(cells)
 
-    def __repr__(self) -> str:
-        text = "<TABLE"
-        for key, value in self.kwargs.items():
-            if key == "fixedsize":
-                str_value = "TRUE" if value else "FALSE"
-            else:
-                str_value = str(value)  # TODO escape "
-            text += f' {key.upper()}="{str_value}"'
-        text += ">\n"
+    def __repr__(self) -> Markup:
+        parts = [_start_tag(self)]
         for row in self.rows:
-            text += "<TR>\n"
+            parts.append("<TR>\n")
             for cell in row:
-                text += str(cell)
-            text += "</TR>\n"
-        text += "</TABLE>\n"
-        return text
+                content = cell.content
+                if type(content) is not Markup:
+                    content = escape(content)
+                if cell.port is None:
+                    parts += (cell._attrs.start, content, "\n</TD>")
+                else:
+                    port = str(cell.port).translate(_ATTRIBUTE_ESCAPES)
+                    parts += (
+                        cell._attrs.start,
+                        port,
+                        cell._attrs.end,
+                        content,
+                        "\n</TD>",
+                    )
+            parts.append("</TR>\n")
+        parts.append("</TABLE>\n")
+        return Markup("".join(parts))
@@ -0,0 +1,135 @@
+"""Rebuild graphs, reusing the DOT statements of unchanged nodes.
+
+Only the generation of the statements is incremental:
+linking and the IR are still computed for the whole data after any change.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING
+
+from graphviz import Digraph
+
+from .graph import add_node, new_graph, warning
+from .ir import GraphIR
+from .layout import LayoutProfile
+from .linker import link
+from .models import Data, Event, Object
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+
+
+def object_fingerprint(path: str, object_data: Object, data: Data) -> str:
+    """A fingerprint of everything that the statements for an object node depend on.
+
+    As well as the object itself, this includes whether each called/overriding object
+    exists (and its type), and whether each emitted event exists,
+    since these determine the labels and edges of the node.
+    """
+    hasher = hashlib.sha256(b"object\0" + path.encode())
+    hasher.update(object_data.model_dump_json().encode())
+    for target in (
+        *(call.text for call in object_data.calls),
+        *object_data.overrides,
+    ):
+        obj = data.objects.get(target)
+        resolved = f"{target}\0{obj.type if obj else ''}\0{target in data.events}"
+        hasher.update(b"\0" + resolved.encode())
+    return hasher.hexdigest()
+
+
+def event_fingerprint(name: str, event_data: Event) -> str:
+    """A fingerprint of everything that the statements for an event node depend on."""
+    hasher = hashlib.sha256(b"event\0" + name.encode())
+    hasher.update(event_data.model_dump_json().encode())
+    return hasher.hexdigest()
+
+
+def transforms_fingerprint(data: Data, *, post: bool = False) -> str:
+    """A fingerprint of everything that the statements for a transforms node depend on.
+
+    This includes whether each emitted event exists, since it determines the edges.
+    """
+    transforms = data.post_transforms if post else data.transforms
+    hasher = hashlib.sha256(b"post_transforms" if post else b"transforms")
+    for name, tr_data in transforms.items():
+        hasher.update(f"\0{name}\0{tr_data.emit in data.events}\0".encode())
+        hasher.update(tr_data.model_dump_json().encode())
+    return hasher.hexdigest()
+
+
+class IncrementalGraph:
+    """Build graphs from successive versions of the data,
+    only regenerating the statements of nodes that have changed.
+
+    The statements of each node (its label and outgoing edges) are memoized
+    by a fingerprint of the models they were generated from.
+    The data is re-linked on every build (a single cheap pass),
+    but warnings for unresolved references are only reported for regenerated nodes.
+
+    This only saves the generation of the statements, which is the most expensive
+    part of building the graph: the fingerprints are computed for every node,
+    and if any node changed, the whole :class:`.GraphIR` is built again,
+    so a build after a single edit still costs time proportional to the whole graph.
+    """
+
+    def __init__(self) -> None:
+        self._statements: dict[str, list[str]] = {}
+        self.reused = 0
+        """The number of nodes reused in the last build."""
+        self.rebuilt = 0
+        """The number of nodes regenerated in the last build."""
+
+    def build(
+        self, data: Data | CompactData, *, layout: str | LayoutProfile | None = None
+    ) -> Digraph:
+        """Build the graph for a new version of the data.
+
+        :param layout: The layout profile, which only affects the graph attributes,
+            so does not invalidate the memoized node statements.
+        """
+        previous = self._statements
+        self._statements = {}
+        self.reused = self.rebuilt = 0
+        body: list[str] = []
+        linked = link(data)
+        diagnostics: dict[str, list[str]] = {}
+        for diagnostic in linked.diagnostics:
+            diagnostics.setdefault(diagnostic.source, []).append(diagnostic.message)
+
+        # the fingerprints and warning sources of each node, in IR order
+        nodes: list[tuple[str, tuple[str, ...]]] = [
+            (object_fingerprint(path, object_data, data), (path,))
+            for path, object_data in data.objects.items()
+        ]
+        nodes.extend(
+            (event_fingerprint(name, event_data), ())
+            for name, event_data in data.events.items()
+        )
+        if data.transforms:
+            nodes.append((transforms_fingerprint(data), tuple(data.transforms)))
+        if data.post_transforms:
+            nodes.append(
+                (transforms_fingerprint(data, post=True), tuple(data.post_transforms))
+            )
+
+        ir: GraphIR | None = None
+        for node, (fingerprint, sources) in enumerate(nodes):
+            if (statements := previous.get(fingerprint)) is not None:
+                self.reused += 1
+            else:
+                for source in sources:
+                    for message in diagnostics.get(source, ()):
+                        warning(message)
+                if ir is None:
+                    ir = GraphIR.from_data(data, linked)
+                chunk = Digraph()
+                add_node(ir, node, chunk)
+                statements = chunk.body
+                self.rebuilt += 1
+            self._statements[fingerprint] = statements
+            body.extend(statements)
+
+        return new_graph(data.comment, layout, body=body)
@@ -0,0 +1,175 @@
+"""Instrumentation of the stages of the pipeline.
+
+An :class:`Instrumentation` object can be passed to :func:`.build_main`,
+:func:`.build_formats` or :func:`.build_graph`, and receives the start and stop
+of each stage, with its wall time, CPU time and peak memory:
+
+- ``read``: reading the TOML file
+- ``load``: loading the data, which includes ``parse`` (TOML) and ``validate``
+  (pydantic) if the snapshot is out of date
+- ``focus``: restricting the data to the neighbourhood of a node, if focused
+- ``build_graph``: which includes ``link``, ``ir`` and ``emit`` (the DOT statements)
+- ``serialize``: joining the DOT statements into the source
+- ``render``: running Graphviz
+
+Stages may be nested; the stats of a stage include those of its sub-stages.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, NamedTuple, TextIO
+
+
+class StageStats(NamedTuple):
+    """The cost of a stage of the pipeline."""
+
+    name: str
+    depth: int
+    """The nesting depth of the stage (0 for top-level stages)."""
+    wall_s: float
+    cpu_s: float
+    """The CPU time of this process."""
+    child_cpu_s: float
+    """The CPU time of subprocesses (i.e. Graphviz) that finished during the stage."""
+    peak_bytes: int | None
+    """The peak memory allocated by Python during the stage,
+    above that at its start (``None`` if memory is not traced).
+    """
+
+
+class Instrumentation:
+    """Receives the start and stop of each stage of the pipeline.
+
+    Subclass this, and override :meth:`on_start` and/or :meth:`on_stop`.
+    """
+
+    trace_memory: bool = False
+    """Whether to trace Python memory allocations, with :mod:`tracemalloc`.
+    This slows down the pipeline, so is off by default.
+    """
+
+    def __init__(self) -> None:
+        self._stack: list[list[Any]] = []
+
+    def on_start(self, name: str, depth: int) -> None:
+        """Called when a stage starts."""
+
+    def on_stop(self, stats: StageStats) -> None:
+        """Called when a stage stops."""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure a stage of the pipeline."""
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        start_memory = 0
+        if tracing:
+            start_memory, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # keep the peak of the parent stage so far, before resetting it
+                self._stack[-1][0] = max(self._stack[-1][0], peak)
+            tracemalloc.reset_peak()
+        frame = [start_memory]
+        depth = len(self._stack)
+        self._stack.append(frame)
+        self.on_start(name, depth)
+        children = os.times()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            after = os.times()
+            child_cpu = (after.children_user - children.children_user) + (
+                after.children_system - children.children_system
+            )
+            self._stack.pop()
+            peak_bytes = None
+            if tracing:
+                peak = max(frame[0], tracemalloc.get_traced_memory()[1])
+                peak_bytes = peak - start_memory
+                if self._stack:
+                    self._stack[-1][0] = max(self._stack[-1][0], peak)
+            self.on_stop(StageStats(name, depth, wall, cpu, child_cpu, peak_bytes))
+
+
+def stage(
+    instrument: Instrumentation | None, name: str
+) -> AbstractContextManager[None]:
+    """Measure a stage with the instrumentation, if any."""
+    return nullcontext() if instrument is None else instrument.stage(name)
+
+
+class StageRecorder(Instrumentation):
+    """Record the stats of every stage, for a report.
+
+    :param trace_memory: Trace Python memory allocations (starting :mod:`tracemalloc`
+        if it is not already tracing).
+    """
+
+    def __init__(self, *, trace_memory: bool = False) -> None:
+        super().__init__()
+        self.trace_memory = trace_memory
+        self.stages: list[StageStats] = []
+        """The stats of each stage, in the order the stages started."""
+        self._slots: list[int] = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def on_start(self, name: str, depth: int) -> None:
+        # reserve a slot, so that stages are ordered by when they started
+        self._slots.append(len(self.stages))
+        self.stages.append(StageStats(name, depth, 0.0, 0.0, 0.0, None))
+
+    def on_stop(self, stats: StageStats) -> None:
+        self.stages[self._slots.pop()] = stats
+
+    def as_dict(self) -> dict[str, Any]:
+        """The report, as a JSON-compatible dictionary."""
+        return {
+            "stages": [stats._asdict() for stats in self.stages],
+            # the maximum resident set size of this process and of Graphviz
+            "max_rss_bytes": _max_rss(children=False),
+            "child_max_rss_bytes": _max_rss(children=True),
+        }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """The report, as a JSON string."""
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def print_report(self, file: TextIO | None = None) -> None:
+        """Print the report as a table, in the order the stages started."""
+        file = file or sys.stderr
+        print(
+            f"{'stage':<16} {'wall ms':>10} {'cpu ms':>10} {'child cpu ms':>13} "
+            f"{'peak KiB':>10}",
+            file=file,
+        )
+        for stats in self.stages:
+            peak = "-" if stats.peak_bytes is None else f"{stats.peak_bytes / 1024:.0f}"
+            print(
+                f"{'  ' * stats.depth + stats.name:<16} {stats.wall_s * 1e3:>10.2f} "
+                f"{stats.cpu_s * 1e3:>10.2f} {stats.child_cpu_s * 1e3:>13.2f} "
+                f"{peak:>10}",
+                file=file,
+            )
+
+
+def _max_rss(*, children: bool) -> int | None:
+    """The maximum resident set size, in bytes (``None`` if not available)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    max_rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
@@ -0,0 +1,312 @@
+"""A compact intermediate representation of the graph, shared by all emitters.
+
+The IR is built once from the linked data, in a single traversal.
+Node IDs are interned, and the node, row and edge tables are stored column-wise,
+in arrays (for integers) and lists of interned strings,
+rather than as a tree of per-object models.
+
+Each node has a contiguous range of rows (the rows of its label table, in order),
+and a contiguous range of edges (its outgoing edges, in emission order).
+Emitters decide how each kind of node and row is presented.
+
+This module does not import graphviz.
+"""
+
+from __future__ import annotations
+
+from array import array
+from enum import IntEnum
+import sys
+from typing import TYPE_CHECKING, NamedTuple
+
+from .linker import POST_TRANSFORMS_ID, TRANSFORMS_ID, LinkResult, link
+from .models import Data
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+
+
+class NodeKind(IntEnum):
+    """The kind of a node."""
+
+    OBJECT = 0
+    EVENT = 1
+    TRANSFORMS = 2
+    POST_TRANSFORMS = 3
+
+
+class RowKind(IntEnum):
+    """The kind of a row of a node's label."""
+
+    TITLE = 0
+    DESCRIPTION = 1
+    """A multi-line description of an object."""
+    CALL = 2
+    ENTER = 3
+    """The start of a block of calls; the value is the context, e.g. "for"."""
+    EMIT = 4
+    APPLY_TRANSFORMS = 5
+    APPLY_POST_TRANSFORMS = 6
+    OVERRIDABLE = 7
+    """The header of the overrides of an object."""
+    OVERRIDE = 8
+    CALLBACK = 9
+    """An event callback; the value is its priority."""
+    TRANSFORM = 10
+    """A transform; the value is its priority."""
+    POST_TRANSFORM = 11
+    """A post transform; the value is its formats and builders."""
+    DOC = 12
+    """A multi-line docstring of the preceding callback or transform."""
+
+
+class EdgeKind(IntEnum):
+    """The kind of an edge."""
+
+    CALL = 0
+    EMIT = 1
+    APPLY_TRANSFORMS = 2
+    APPLY_POST_TRANSFORMS = 3
+    OVERRIDE = 4
+
+
+_CALL_ROW_KINDS = {
+    "standard": RowKind.CALL,
+    "enter": RowKind.ENTER,
+    "emit": RowKind.EMIT,
+    "apply_transforms": RowKind.APPLY_TRANSFORMS,
+    "apply_post_transforms": RowKind.APPLY_POST_TRANSFORMS,
+}
+_EDGE_KINDS = {kind.name.lower(): kind for kind in EdgeKind}
+
+
+class Row(NamedTuple):
+    """A view of a row of the IR."""
+
+    kind: RowKind
+    text: str
+    value: str
+    port: str
+    indent: int
+
+
+class IREdge(NamedTuple):
+    """A view of an edge of the IR."""
+
+    source: str
+    port: str
+    target: str
+    kind: EdgeKind
+
+
+def path2name(path: str, type: str | None = None) -> str:
+    """Split a path into the module and object names."""
+    parts = path.split(".")
+    if type == "method" and len(parts) > 1:
+        return f"{parts[-2]}.{parts[-1]}()"
+    elif type in ("function", "method"):
+        return parts[-1] + "()"
+    return path
+
+
+def _strip_sphinx(name: str) -> str:
+    return name[len("sphinx.") :] if name.startswith("sphinx.") else name
+
+
+class GraphIR:
+    """The nodes, label rows and edges of the graph, stored in flat tables.
+
+    Names (node IDs and edge targets) are interned once, and referred to
+    by their index in :attr:`names`; edge targets need not have a node of their own.
+    """
+
+    def __init__(self, comment: str) -> None:
+        self.comment = comment
+        self.names: list[str] = []
+        """The interned ID of each node (and edge-only target)."""
+        self.index: dict[str, int] = {}
+        """A mapping of each name to its index."""
+        self.node_count = 0
+
+        # node table
+        self.node_name = array("I")
+        """The index of each node's ID in :attr:`names`."""
+        self.node_kind = array("B")
+        self.node_rows = array("I", [0])
+        """The start of each node's rows (with a final end offset)."""
+        self.node_edges = array("I", [0])
+        """The start of each node's edges (with a final end offset)."""
+
+        # row table
+        self.row_kind = array("B")
+        self.row_indent = array("H")
+        self.row_text: list[str] = []
+        self.row_value: list[str] = []
+        self.row_port: list[str] = []
+
+        # edge table
+        self.edge_source = array("I")
+        self.edge_row = array("I")
+        """The row of the source node that the edge leaves from."""
+        self.edge_target = array("I")
+        self.edge_kind = array("B")
+
+    @classmethod
+    def from_data(
+        cls, data: Data | CompactData, linked: LinkResult | None = None
+    ) -> GraphIR:
+        """Build the IR from the data, linking it if necessary."""
+        if linked is None:
+            linked = link(data)
+        return _build(data, linked)
+
+    def intern(self, name: str) -> int:
+        """Return the index of a name, adding it if necessary."""
+        if (index := self.index.get(name)) is None:
+            index = self.index[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return index
+
+    def _add_row(  # noqa: PLR0913
+        self,
+        kind: RowKind,
+        text: str,
+        value: str = "",
+        port: str = "",
+        indent: int = 0,
+    ) -> int:
+        self.row_kind.append(kind)
+        self.row_indent.append(indent)
+        self.row_text.append(text)
+        self.row_value.append(sys.intern(value))
+        self.row_port.append(sys.intern(port))
+        return len(self.row_kind) - 1
+
+    def _end_node(self, name: int, kind: NodeKind) -> None:
+        self.node_name.append(name)
+        self.node_kind.append(kind)
+        self.node_rows.append(len(self.row_kind))
+        self.node_edges.append(len(self.edge_kind))
+        self.node_count += 1
+
+    def node_id(self, node: int) -> str:
+        return self.names[self.node_name[node]]
+
+    def rows(self, node: int) -> range:
+        """The indices of the rows of a node."""
+        return range(self.node_rows[node], self.node_rows[node + 1])
+
+    def edges(self, node: int) -> range:
+        """The indices of the outgoing edges of a node."""
+        return range(self.node_edges[node], self.node_edges[node + 1])
+
+    def row(self, index: int) -> Row:
+        return Row(
+            RowKind(self.row_kind[index]),
+            self.row_text[index],
+            self.row_value[index],
+            self.row_port[index],
+            self.row_indent[index],
+        )
+
+    def edge(self, index: int) -> IREdge:
+        return IREdge(
+            self.names[self.edge_source[index]],
+            self.row_port[self.edge_row[index]],
+            self.names[self.edge_target[index]],
+            EdgeKind(self.edge_kind[index]),
+        )
+
+
+def _build(data: Data | CompactData, linked: LinkResult) -> GraphIR:  # noqa: PLR0912
+    ir = GraphIR(data.comment)
+
+    def add_edges(node_id: str, port_rows: dict[str, int]) -> int:
+        source = ir.intern(node_id)
+        for edge in linked.edges_by_source.get(node_id, ()):
+            ir.edge_source.append(source)
+            ir.edge_row.append(port_rows[edge.port])
+            ir.edge_target.append(ir.intern(edge.target))
+            ir.edge_kind.append(_EDGE_KINDS[edge.kind])
+        return source
+
+    for path, object_data in data.objects.items():
+        port_rows: dict[str, int] = {}
+        ir._add_row(RowKind.TITLE, path2name(path, object_data.type))
+        if object_data.description:
+            ir._add_row(RowKind.DESCRIPTION, object_data.description)
+        indent = 0
+        for call, is_ref, obj_type, port, _ in linked.calls[path]:
+            if call.type == "exit":
+                indent -= 1
+                continue
+            row = ir._add_row(
+                _CALL_ROW_KINDS[call.type],
+                path2name(call.text, obj_type) if is_ref else call.text,
+                call.context or "",
+                port,
+                indent,
+            )
+            port_rows[port] = row
+            if call.type == "enter":
+                indent += 1
+        if object_data.overrides or object_data.overridable:
+            ir._add_row(RowKind.OVERRIDABLE, "Overridable")
+            for override, port, _ in linked.overrides[path]:
+                port_rows[port] = ir._add_row(
+                    RowKind.OVERRIDE,
+                    path2name(override, object_data.type),
+                    port=port,
+                )
+        ir._end_node(add_edges(path, port_rows), NodeKind.OBJECT)
+
+    for name, event_data in data.events.items():
+        ir._add_row(RowKind.TITLE, name)
+        for callback_name, callback_data in event_data.callbacks.items():
+            if callback_data.hide:
+                continue
+            ir._add_row(
+                RowKind.CALLBACK,
+                _strip_sphinx(callback_name),
+                str(callback_data.priority),
+            )
+            if callback_data.doc:
+                ir._add_row(RowKind.DOC, callback_data.doc)
+        ir._end_node(ir.intern(name), NodeKind.EVENT)
+
+    for node_id, title, row_kind, node_kind, transforms in (
+        (
+            TRANSFORMS_ID,
+            "Transforms",
+            RowKind.TRANSFORM,
+            NodeKind.TRANSFORMS,
+            data.transforms,
+        ),
+        (
+            POST_TRANSFORMS_ID,
+            "Post Transforms",
+            RowKind.POST_TRANSFORM,
+            NodeKind.POST_TRANSFORMS,
+            data.post_transforms,
+        ),
+    ):
+        if not transforms:
+            continue
+        port_rows = {}
+        ir._add_row(RowKind.TITLE, title)
+        for tr_name, tr_data in transforms.items():
+            if tr_data.hide:
+                continue
+            value = (
+                ",".join(tr_data.formats + tr_data.builders)  # type: ignore[union-attr]
+                if node_kind == NodeKind.POST_TRANSFORMS
+                else str(tr_data.priority)
+            )
+            port_rows[tr_name] = ir._add_row(
+                row_kind, _strip_sphinx(tr_name), value, tr_name
+            )
+            if tr_data.doc:
+                ir._add_row(RowKind.DOC, tr_data.doc)
+        ir._end_node(add_edges(node_id, port_rows), node_kind)
+
+    return ir
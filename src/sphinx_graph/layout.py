@@ -0,0 +1,93 @@
+"""Layout profiles, trading the quality of the Graphviz layout against its cost.
+
+Each profile selects a layout engine, and graph attributes to tune it,
+which are added to the graph alongside ``rankdir=LR``.
+The ``default`` profile adds no attributes, so its output is unchanged.
+Use ``python scripts/bench_layout.py`` to compare the profiles as the graph grows.
+
+This module does not import graphviz.
+"""
+
+from __future__ import annotations
+
+from typing import Literal, NamedTuple
+
+
+class LayoutProfile(NamedTuple):
+    """A layout engine, and the graph attributes to tune it."""
+
+    name: str
+    engine: Literal["dot", "sfdp", "neato"]
+    graph_attr: dict[str, str]
+    description: str
+
+    def key(self) -> str:
+        """A string identifying the output of the profile, for cache keys.
+
+        Profiles with the same name but different attributes have different keys.
+        """
+        attrs = ",".join(f"{k}={v}" for k, v in sorted(self.graph_attr.items()))
+        return f"{self.name}:{self.engine}:{attrs}"
+
+
+PROFILES: dict[str, LayoutProfile] = {
+    profile.name: profile
+    for profile in (
+        LayoutProfile("default", "dot", {}, "dot, with the Graphviz defaults"),
+        LayoutProfile(
+            "fast",
+            "dot",
+            {
+                # cap the network simplex iterations, for ranking and positioning
+                "nslimit": "2",
+                "nslimit1": "2",
+                # fewer crossing minimization iterations, over fewer edges
+                "mclimit": "0.2",
+                "searchsize": "10",
+                "splines": "polyline",
+            },
+            "dot, with fewer optimization iterations and polyline edges",
+        ),
+        LayoutProfile(
+            "quality",
+            "dot",
+            {
+                "mclimit": "4",
+                "searchsize": "100",
+                "remincross": "true",
+                "splines": "spline",
+            },
+            "dot, with more crossing minimization",
+        ),
+        LayoutProfile(
+            "large",
+            "sfdp",
+            {"overlap": "prism", "splines": "false", "outputorder": "edgesfirst"},
+            "sfdp force-directed layout, with straight edges, for very large graphs",
+        ),
+        LayoutProfile(
+            "force",
+            "neato",
+            {"overlap": "prism", "splines": "false", "outputorder": "edgesfirst"},
+            "neato force-directed layout, with straight edges",
+        ),
+    )
+}
+"""The available layout profiles, by name."""
+
+DEFAULT_LAYOUT = "default"
+
+
+def get_profile(layout: str | LayoutProfile | None = None) -> LayoutProfile:
+    """Get a layout profile by name, or the default profile if ``None``.
+
+    :raises ValueError: If the profile does not exist.
+    """
+    if isinstance(layout, LayoutProfile):
+        return layout
+    try:
+        return PROFILES[layout or DEFAULT_LAYOUT]
+    except KeyError:
+        raise ValueError(
+            f"Unknown layout profile {layout!r}, expected one of {', '.join(PROFILES)}"
+        ) from None
@@ -0,0 +1,257 @@
+"""Resolve all references in the data, in a single pass.
+
+The link stage builds one symbol index across objects, events, transforms and overrides,
+then resolves every call, override and transform emit against it,
+producing the edges of the graph and a report of any dangling references.
+Graph emitters then only need to walk the resolved edges.
+
+This module does not import graphviz.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+import json
+import sys
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+from .models import Call, Data
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+
+
+TRANSFORMS_ID = "_apply_transforms"
+"""The node ID of the transforms node."""
+POST_TRANSFORMS_ID = "_apply_post_transforms"
+"""The node ID of the post transforms node."""
+
+
+def warning(message: str) -> None:
+    """Print a warning message to stderr."""
+    print(f"Warning: {message}", file=sys.stderr)
+
+
+SymbolKind = Literal["object", "event", "transform", "post_transform"]
+EdgeKind = Literal[
+    "call", "emit", "apply_transforms", "apply_post_transforms", "override"
+]
+
+
+class Symbol(NamedTuple):
+    """A named entity in the data, and where it is in the graph."""
+
+    kind: SymbolKind
+    node: str
+    """The ID of the node representing the entity."""
+    port: str | None = None
+    """The port of the entity within its node, if it does not have its own node."""
+
+
+class SymbolIndex:
+    """An index of every named entity in the data."""
+
+    def __init__(self, data: Data | CompactData) -> None:
+        self._symbols: dict[tuple[SymbolKind, str], Symbol] = {}
+        for path in data.objects:
+            self._symbols["object", path] = Symbol("object", path)
+        for name in data.events:
+            self._symbols["event", name] = Symbol("event", name)
+        for name in data.transforms:
+            self._symbols["transform", name] = Symbol("transform", TRANSFORMS_ID, name)
+        for name in data.post_transforms:
+            self._symbols["post_transform", name] = Symbol(
+                "post_transform", POST_TRANSFORMS_ID, name
+            )
+
+    def get(self, kind: SymbolKind, name: str) -> Symbol | None:
+        """Look up an entity by kind and name."""
+        return self._symbols.get((kind, name))
+
+    def __contains__(self, key: tuple[SymbolKind, str]) -> bool:
+        return key in self._symbols
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+
+class Edge(NamedTuple):
+    """A resolved edge of the graph."""
+
+    source: str
+    """The ID of the source node."""
+    port: str | None
+    """The port within the source node."""
+    target: str
+    """The ID of the target node."""
+    kind: EdgeKind
+
+
+class ResolvedCall(NamedTuple):
+    """A call of an object, resolved against the symbol index."""
+
+    call: Call
+    is_ref: bool
+    """Whether the call text is a reference to an object."""
+    obj_type: Literal["function", "method", None]
+    """The type of the called object, from its node if it has one."""
+    port: str | None
+    """The port of the call's row in the object node (exit calls have no row)."""
+    edge: Edge | None
+
+
+class Diagnostic(NamedTuple):
+    """A problem found while linking."""
+
+    code: Literal[
+        "object-not-found", "event-not-found", "override-not-found", "unknown-call"
+    ]
+    message: str
+    source: str
+    """The name of the entity containing the reference."""
+    target: str
+    """The reference that could not be resolved."""
+
+
+class Diagnostics:
+    """A report of the problems found while linking."""
+
+    def __init__(self) -> None:
+        self.items: list[Diagnostic] = []
+
+    def add(self, code: str, source: str, target: str, message: str) -> None:
+        self.items.append(Diagnostic(code, message, source, target))  # type: ignore[arg-type]
+
+    def __iter__(self) -> Iterator[Diagnostic]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def as_dicts(self) -> list[dict[str, str]]:
+        """The diagnostics, as JSON-compatible dictionaries."""
+        return [item._asdict() for item in self.items]
+
+    def to_json(self, **kwargs) -> str:
+        """The diagnostics, as a JSON string."""
+        return json.dumps(self.as_dicts(), **kwargs)
+
+
+class LinkResult:
+    """The result of linking the data."""
+
+    def __init__(self, data: Data | CompactData) -> None:
+        self.data = data
+        self.symbols = SymbolIndex(data)
+        self.calls: dict[str, list[ResolvedCall]] = {}
+        """The resolved calls of each object."""
+        self.overrides: dict[str, list[tuple[str, str, Edge | None]]] = {}
+        """The (override, port, edge) of each object's overrides."""
+        self.edges: list[Edge] = []
+        """All resolved edges, in emission order."""
+        self.edges_by_source: dict[str, list[Edge]] = {}
+        """The resolved edges, grouped by source node."""
+        self.diagnostics = Diagnostics()
+
+    def add_edge(self, edge: Edge) -> Edge:
+        self.edges.append(edge)
+        self.edges_by_source.setdefault(edge.source, []).append(edge)
+        return edge
+
+
+def link(data: Data | CompactData) -> LinkResult:  # noqa: PLR0912,PLR0915
+    """Resolve every reference in the data, in a single pass."""
+    result = LinkResult(data)
+    symbols = result.symbols
+    diagnostics = result.diagnostics
+
+    for path, object_data in data.objects.items():
+        resolved: list[ResolvedCall] = []
+        port_num = 0
+        for call in object_data.calls:
+            is_ref = call.is_ref if call.is_ref is not None else call.type == "standard"
+            obj_type = call.obj_type
+            target = symbols.get("object", call.text) if is_ref else None
+            if target is not None:
+                obj_type = data.objects[call.text].type
+            if call.type == "exit":
+                resolved.append(ResolvedCall(call, is_ref, obj_type, None, None))
+                continue
+
+            port_num += 1
+            port = str(port_num)
+            edge = None
+            match call.type:
+                case "standard" | "enter":
+                    if not is_ref:
+                        pass
+                    elif target is not None:
+                        edge = Edge(path, port, target.node, "call")
+                    elif call.warn_no_object:
+                        diagnostics.add(
+                            "object-not-found",
+                            path,
+                            call.text,
+                            f"{call.text!r} not found, called from {path!r}",
+                        )
+                case "emit":
+                    if (event := symbols.get("event", call.text)) is not None:
+                        edge = Edge(path, port, event.node, "emit")
+                    else:
+                        diagnostics.add(
+                            "event-not-found",
+                            path,
+                            call.text,
+                            f"{call.text!r} event not found, called from {path!r}",
+                        )
+                case "apply_transforms":
+                    edge = Edge(path, port, TRANSFORMS_ID, "apply_transforms")
+                case "apply_post_transforms":
+                    edge = Edge(path, port, POST_TRANSFORMS_ID, "apply_post_transforms")
+                case _:
+                    diagnostics.add(
+                        "unknown-call",
+                        path,
+                        call.text,
+                        f"Unknown call type {call.type!r}",
+                    )
+            if edge is not None:
+                result.add_edge(edge)
+            resolved.append(ResolvedCall(call, is_ref, obj_type, port, edge))
+        result.calls[path] = resolved
+
+        overrides = []
+        for override in object_data.overrides:
+            port_num += 1
+            port = str(port_num)
+            edge = None
+            if (target := symbols.get("object", override)) is not None:
+                edge = result.add_edge(Edge(path, port, target.node, "override"))
+            else:
+                diagnostics.add(
+                    "override-not-found",
+                    path,
+                    override,
+                    f"{override!r} not found, override of {path!r}",
+                )
+            overrides.append((override, port, edge))
+        result.overrides[path] = overrides
+
+    for kind, transforms, node_id in (
+        ("transform", data.transforms, TRANSFORMS_ID),
+        ("post_transform", data.post_transforms, POST_TRANSFORMS_ID),
+    ):
+        for name, tr_data in transforms.items():
+            if tr_data.hide or not tr_data.emit:
+                continue
+            if (event := symbols.get("event", tr_data.emit)) is not None:
+                result.add_edge(Edge(node_id, name, event.node, "emit"))
+            else:
+                diagnostics.add(
+                    "event-not-found",
+                    name,
+                    tr_data.emit,
+                    f"{tr_data.emit!r} event not found, emitted by {kind} {name!r}",
+                )
+
+    return result
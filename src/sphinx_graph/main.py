@@ -0,0 +1,259 @@
+"""The main entry points, to build and render the graph."""
+
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .cache import RenderCache, get_cache
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from .fragments import FragmentSet
+    from .instrument import Instrumentation
+    from .layout import LayoutProfile
+    from .overlay import Overlay
+    from .reachability import Focus
+
+
+DATA_PATH = Path(__file__).parent.joinpath("sphinx_graph.toml")
+"""The path to the data that the graph is built from."""
+
+
+def read_source() -> bytes:
+    """Read the raw data that the graph is built from."""
+    return DATA_PATH.read_bytes()
+
+
+def build_main(  # noqa: PLR0913
+    name: str = "sphinx_graph",
+    directory: Path | None = None,
+    format: str = "svg",
+    *,
+    cache: RenderCache | bool = True,
+    layout: "str | LayoutProfile | None" = None,
+    focus: "Focus | None" = None,
+    fragments: "FragmentSet | None" = None,
+    instrument: "Instrumentation | None" = None,
+) -> Path:
+    """Build the graph and render it to ``<directory>/<name>.<format>``.
+
+    :param cache: A cache of previous renders, or whether to use the default cache.
+        If the data and tool versions are unchanged,
+        the cached artifact is copied without validating or building anything.
+    :param layout: The layout profile (see :mod:`sphinx_graph.layout`).
+    :param focus: Only render the neighbourhood of a node
+        (see :mod:`sphinx_graph.reachability`).
+    :param fragments: Data fragments to merge into the data
+        (see :mod:`sphinx_graph.fragments`).
+    :param instrument: Receives the start and stop of each stage of the pipeline
+        (see :func:`build_formats`).
+    """
+    return build_formats(
+        [format],
+        name,
+        directory,
+        cache=cache,
+        layout=layout,
+        focus=focus,
+        fragments=fragments,
+        instrument=instrument,
+    )[format]
+
+
+def build_formats(  # noqa: PLR0912,PLR0913,PLR0915
+    formats: Sequence[str],
+    name: str = "sphinx_graph",
+    directory: Path | None = None,
+    *,
+    cache: RenderCache | bool = True,
+    max_workers: int | None = None,
+    layout: "str | LayoutProfile | None" = None,
+    instrument: "Instrumentation | None" = None,
+    overlay: "Overlay | None" = None,
+    focus: "Focus | None" = None,
+    fragments: "FragmentSet | None" = None,
+    compact: bool = False,
+) -> dict[str, Path]:
+    """Build the graph once and render it to ``<directory>/<name>.<format>``
+    for each format, running Graphviz for each format concurrently.
+
+    The ``json`` and ``html`` formats are written directly, without Graphviz,
+    for layout in the browser (see :mod:`sphinx_graph.export`).
+
+    :param cache: A cache of previous renders, or whether to use the default cache.
+        Only formats that are not already cached are built.
+    :param max_workers: The maximum number of concurrent Graphviz processes.
+    :param layout: The layout profile (see :mod:`sphinx_graph.layout`).
+    :param instrument: Receives the start and stop of each stage of the pipeline
+        (see :mod:`sphinx_graph.instrument`).
+        The DOT source is then built in full before rendering, rather than streamed,
+        so that building, serializing and rendering are measured separately.
+    :param overlay: Adds attributes to the nodes and edges of the rendered formats,
+        e.g. a :class:`.TimingOverlay` of a traced build.
+    :param focus: Only build the neighbourhood of a node
+        (see :mod:`sphinx_graph.reachability`),
+        so that the layout time depends on its size, rather than that of the data.
+    :param fragments: Data fragments to merge into the data
+        (see :mod:`sphinx_graph.fragments`).
+    :param compact: Load the data as compact records, without validating it
+        (see :mod:`sphinx_graph.compact`), to use less memory for very large data.
+    :raises ValueError: If the focused node does not exist,
+        or a fragment is invalid or conflicting.
+    :returns: A mapping of each format to its output path.
+    """
+    from .export import EXPORT_FORMATS
+    from .instrument import stage
+    from .layout import get_profile
+
+    profile = get_profile(layout)
+
+    with stage(instrument, "read"):
+        source = read_source()
+    directory = directory or Path.cwd()
+    outpaths = {format: directory.joinpath(f"{name}.{format}") for format in formats}
+    exports = {f: path for f, path in outpaths.items() if f in EXPORT_FORMATS}
+    missing = {f: path for f, path in outpaths.items() if f not in EXPORT_FORMATS}
+
+    keys: dict[str, str] = {}
+    cache = get_cache(cache) if missing else None
+    if cache:
+        with stage(instrument, "cache"):
+            extra = {"overlay": overlay.fingerprint()} if overlay else {}
+            if focus:
+                extra["focus"] = focus.key()
+            if fragments:
+                extra["fragments"] = fragments.digest()
+            keys, missing = cache.fetch_formats(
+                source, missing, engine=profile.engine, layout=profile.key(), **extra
+            )
+    if not missing and not exports:
+        return outpaths
+
+    with stage(instrument, "load"):
+        if compact:
+            from .compact import load_compact
+
+            model = load_compact(source=source)
+        else:
+            from .snapshot import load_data
+
+            model = load_data(source=source, instrument=instrument)
+    if fragments:
+        model = fragments.merge(model, instrument=instrument)
+    if focus:
+        from .reachability import focus_data
+
+        with stage(instrument, "focus"):
+            model = focus_data(model, focus)
+    if exports:
+        from .export import write_export
+
+        with stage(instrument, "export"):
+            for format, outpath in exports.items():
+                write_export(model, outpath, format=format)
+    if len(missing) == 1 and instrument is None:
+        from .stream import render_stream
+
+        ((format, outpath),) = missing.items()
+        render_stream(model, outpath, format=format, layout=profile, overlay=overlay)
+    elif missing:
+        from .graph import build_graph
+        from .render import render_formats
+
+        graph = build_graph(
+            model, layout=profile, instrument=instrument, overlay=overlay
+        )
+        with stage(instrument, "serialize"):
+            dot_source = graph.source
+        with stage(instrument, "render"):
+            render_formats(
+                dot_source, missing, engine=profile.engine, max_workers=max_workers
+            )
+
+    if cache:
+        with stage(instrument, "store"):
+            for format, outpath in missing.items():
+                cache.store(keys[format], format, outpath)
+    return outpaths
+
+
+async def build_main_async(
+    name: str = "sphinx_graph",
+    directory: Path | None = None,
+    format: str = "svg",
+    *,
+    cache: RenderCache | bool = True,
+    layout: "str | LayoutProfile | None" = None,
+) -> Path:
+    """Asynchronous version of :func:`build_main`.
+
+    The graph is built in a worker thread,
+    and Graphviz is run as a subprocess without blocking the event loop.
+    If the task is cancelled, the Graphviz process is killed.
+    """
+    import asyncio
+
+    from .graph import build_graph
+    from .layout import get_profile
+    from .render import run_dot_async
+    from .snapshot import load_data
+
+    profile = get_profile(layout)
+    source = read_source()
+    outpath = (directory or Path.cwd()).joinpath(f"{name}.{format}")
+
+    keys: dict[str, str] = {}
+    if cache := get_cache(cache):
+        keys, missing = await asyncio.to_thread(
+            cache.fetch_formats,
+            source,
+            {format: outpath},
+            engine=profile.engine,
+            layout=profile.key(),
+        )
+        if not missing:
+            return outpath
+
+    def _build_source() -> str:
+        return build_graph(load_data(source=source), layout=profile).source
+
+    dot_source = await asyncio.to_thread(_build_source)
+    await run_dot_async(dot_source, outpath, format=format, engine=profile.engine)
+
+    if cache:
+        await asyncio.to_thread(cache.store, keys[format], format, outpath)
+    return outpath
+
+
+def build_main_background(
+    name: str = "sphinx_graph",
+    directory: Path | None = None,
+    format: str = "svg",
+    *,
+    cache: RenderCache | bool = True,
+    layout: "str | LayoutProfile | None" = None,
+) -> "Future[Path]":
+    """Start :func:`build_main` in a background thread, and return a handle to it.
+
+    This is intended for synchronous callers, such as Sphinx event handlers,
+    which can continue working while Graphviz runs,
+    then call ``.result()`` on the handle once the output is needed.
+    """
+    from concurrent.futures import Future
+    import threading
+
+    future: Future[Path] = Future()
+
+    def _run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(
+                build_main(name, directory, format, cache=cache, layout=layout)
+            )
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=_run, name="sphinx_graph-render", daemon=True).start()
+    return future
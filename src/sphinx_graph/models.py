@@ -0,0 +1,123 @@
+"""The data models that the graph is built from."""
+
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class Data(BaseModel):
+    """The data to build the graph from."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    comment: str
+    objects: dict[str, "Object"]
+    """The objects in the graph, keyed by their fully qualified name."""
+    events: dict[str, "Event"]
+    transforms: dict[str, "Transform"]
+    post_transforms: dict[str, "PostTransform"]
+
+
+class Fragment(BaseModel):
+    """A part of the data, merged into it (see :mod:`sphinx_graph.fragments`).
+
+    Events that are already in the data have the callbacks of the fragment added.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    objects: dict[str, "Object"] = Field(default_factory=dict)
+    events: dict[str, "Event"] = Field(default_factory=dict)
+    transforms: dict[str, "Transform"] = Field(default_factory=dict)
+    post_transforms: dict[str, "PostTransform"] = Field(default_factory=dict)
+
+
+class Object(BaseModel):
+    """A python object."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    description: str = ""
+    type: Literal["function", "method"] = "method"
+    calls: list["Call"] = Field(default_factory=list)
+    overridable: bool = False
+    """Whether the object can be overridden by a subclass."""
+    overrides: list[str] = Field(default_factory=list)
+    """The subclass objects that override this object."""
+
+
+class Event(BaseModel):
+    """A sphinx event."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    callbacks: dict[str, "EventCallback"]
+
+
+class EventCallback(BaseModel):
+    """A callback for a sphinx event."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    priority: int
+    doc: str = ""
+    hide: bool = False
+    """Whether to hide the callback from the graph.
+    (mainly used for EnvironmentCollector default events)
+    """
+
+
+class Transform(BaseModel):
+    """A transform for a sphinx event."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    priority: int
+    hide: bool = False
+    doc: str = ""
+    emit: str | None = None
+
+
+class PostTransform(BaseModel):
+    """A transform for a sphinx event."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    priority: int
+    formats: list[str] = Field(default_factory=list)
+    builders: list[str] = Field(default_factory=list)
+    hide: bool = False
+    doc: str = ""
+    emit: str | None = None
+
+
+class Call(BaseModel):
+    """A call from one object to another."""
+
+    text: str
+    """The fully qualified name of the object being called."""
+
+    type: Literal[
+        "standard",
+        "enter",
+        "exit",
+        "emit",
+        "apply_transforms",
+        "apply_post_transforms",
+    ] = "standard"
+    """The type of call."""
+
+    is_ref: bool | None = None
+    """Whether the text is a reference to the object being called.
+
+    Defaults to true if type is "standard", false otherwise.
+    """
+
+    context: Literal["for", "with", "if", "elif", "else", "fork", None] = None
+    """The context of the call, if type is enter/exit."""
+
+    obj_type: Literal["function", "method", None] = None
+    """The type of the object being called."""
+
+    warn_no_object: bool = True
+    """Whether to warn if the object being called does not have its own node."""
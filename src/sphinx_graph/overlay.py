@@ -0,0 +1,193 @@
+"""Overlays, which add attributes to the nodes and edges of the graph,
+for example to show the timings of a traced build as a heatmap.
+
+This module does not import graphviz.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+from .ir import EdgeKind, GraphIR, NodeKind, RowKind, _strip_sphinx
+
+if TYPE_CHECKING:
+    from .trace import ObjectTiming, TraceProfile
+
+# white, through yellow, to red
+HEAT_COLORS = ((255, 255, 255), (255, 214, 102), (214, 48, 49))
+
+MAX_PENWIDTH = 8.0
+
+
+def heat_color(fraction: float) -> str:
+    """The color for a value between 0 (cold) and 1 (hot), as a hex string."""
+    fraction = min(max(fraction, 0.0), 1.0) * (len(HEAT_COLORS) - 1)
+    i = min(int(fraction), len(HEAT_COLORS) - 2)
+    low, high = HEAT_COLORS[i], HEAT_COLORS[i + 1]
+    t = fraction - i
+    return "#" + "".join(
+        f"{round(a + (b - a) * t):02x}" for a, b in zip(low, high, strict=False)
+    )
+
+
+def log_fraction(value: float, maximum: float) -> float:
+    """Scale a value to between 0 and 1, logarithmically,
+    so that costs spread over orders of magnitude are distinguishable.
+    """
+    if maximum <= 0 or value <= 0:
+        return 0.0
+    return math.log1p(99 * value / maximum) / math.log(100)
+
+
+class Cell(NamedTuple):
+    """An extra cell, appended to a row of the label of a node."""
+
+    text: str
+    bgcolor: str = ""
+
+
+class Overlay:
+    """Extra attributes for the nodes and edges of the graph.
+
+    The base class adds nothing; subclass this, and override the methods.
+    """
+
+    def node_attrs(self, ir: GraphIR, node: int) -> dict[str, str]:
+        """The attributes of a node, added to (or replacing) the default ones."""
+        return {}
+
+    def edge_attrs(self, ir: GraphIR, edge: int) -> dict[str, str]:
+        """The attributes of an edge, added to (or replacing) the default ones."""
+        return {}
+
+    def columns(self, ir: GraphIR, node: int) -> int:
+        """The number of extra columns in the label of a node."""
+        return 0
+
+    def row_cells(self, ir: GraphIR, node: int, row: int) -> list[Cell]:
+        """The extra cells of a row of the label of a node,
+        one for each of its :meth:`columns`.
+        Only called for the rows of callbacks, transforms and post transforms.
+        """
+        return []
+
+    def fingerprint(self) -> str:
+        """A string that changes whenever the output of the overlay does,
+        to be included in the cache key of renders.
+        """
+        return ""
+
+
+class TimingOverlay(Overlay):
+    """Color the object nodes, and scale the call edges, by their traced time,
+    and add a column of the time of each event callback and transform,
+    colored by its total.
+
+    :param profile: The timings of a traced build (see :mod:`sphinx_graph.trace`).
+    :param metric: Whether to color the nodes by their ``self`` or ``cumulative`` time.
+    """
+
+    def __init__(
+        self,
+        profile: TraceProfile,
+        *,
+        metric: Literal["self", "cumulative"] = "self",
+    ) -> None:
+        self.profile = profile
+        self.metric = metric
+        self._max_node = max(
+            (self._node_value(t) for t in profile.objects.values()), default=0.0
+        )
+        self._max_edge = max(
+            (t.cumulative_s for t in profile.edges.values()), default=0.0
+        )
+        # callback rows are labelled with the shortened path
+        self._callbacks = {
+            event: {_strip_sphinx(path): t for path, t in timings.items()}
+            for event, timings in profile.callbacks.items()
+        }
+        self._max_callback = max(
+            (
+                t.total_s
+                for timings in profile.callbacks.values()
+                for t in timings.values()
+            ),
+            default=0.0,
+        )
+        self._max_transform = max(
+            (t.total_s for t in profile.transforms.values()), default=0.0
+        )
+
+    def _node_value(self, timing: ObjectTiming) -> float:
+        return timing.self_s if self.metric == "self" else timing.cumulative_s
+
+    def node_attrs(self, ir: GraphIR, node: int) -> dict[str, str]:
+        if ir.node_kind[node] != NodeKind.OBJECT:
+            return {}
+        timing = self.profile.objects.get(ir.node_id(node))
+        if timing is None:
+            return {}
+        fraction = log_fraction(self._node_value(timing), self._max_node)
+        return {
+            "style": "rounded,filled",
+            "fillcolor": heat_color(fraction),
+            "tooltip": (
+                f"{timing.calls} calls, {timing.cumulative_s:.3f} s cumulative, "
+                f"{timing.self_s:.3f} s self"
+            ),
+        }
+
+    def edge_attrs(self, ir: GraphIR, edge: int) -> dict[str, str]:
+        if ir.edge_kind[edge] != EdgeKind.CALL:
+            return {}
+        key = (ir.names[ir.edge_source[edge]], ir.names[ir.edge_target[edge]])
+        timing = self.profile.edges.get(key)
+        if timing is None:
+            return {}
+        fraction = timing.cumulative_s / self._max_edge if self._max_edge else 0.0
+        return {
+            "penwidth": f"{1 + (MAX_PENWIDTH - 1) * fraction:.2f}",
+            "tooltip": f"{timing.calls} calls, {timing.cumulative_s:.3f} s",
+        }
+
+    def columns(self, ir: GraphIR, node: int) -> int:
+        match ir.node_kind[node]:
+            case NodeKind.EVENT:
+                return int(ir.node_id(node) in self._callbacks)
+            case NodeKind.TRANSFORMS | NodeKind.POST_TRANSFORMS:
+                return int(bool(self.profile.transforms))
+        return 0
+
+    def row_cells(self, ir: GraphIR, node: int, row: int) -> list[Cell]:
+        if ir.row_kind[row] in (RowKind.TRANSFORM, RowKind.POST_TRANSFORM):
+            return self._transform_cells(ir, row)
+        if ir.row_kind[row] != RowKind.CALLBACK:
+            return []
+        timings = self._callbacks.get(ir.node_id(node), {})
+        if (timing := timings.get(ir.row_text[row])) is None:
+            return [Cell("not called")]
+        fraction = log_fraction(timing.total_s, self._max_callback)
+        return [
+            Cell(
+                f"{timing.calls} calls, {timing.total_s * 1e3:.2f} ms "
+                f"(max {timing.max_s * 1e3:.2f} ms)",
+                heat_color(fraction),
+            )
+        ]
+
+    def _transform_cells(self, ir: GraphIR, row: int) -> list[Cell]:
+        # transform rows are labelled with the shortened path, but their port is the path
+        if (timing := self.profile.transforms.get(ir.row_port[row])) is None:
+            return [Cell("not applied")]
+        fraction = log_fraction(timing.total_s, self._max_transform)
+        return [
+            Cell(
+                f"{timing.calls} runs, {timing.total_s * 1e3:.2f} ms "
+                f"({timing.total_s / timing.calls * 1e3:.3f} ms/run)",
+                heat_color(fraction),
+            )
+        ]
+
+    def fingerprint(self) -> str:
+        return f"timing:{self.metric}:{self.profile.fingerprint()}"
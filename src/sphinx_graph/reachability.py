@@ -0,0 +1,266 @@
+"""A reachability index over the resolved edges of the graph,
+to render or query the neighbourhood of a node without the rest of the graph.
+
+The index holds adjacency lists in both directions, over the call, emit,
+override and transform edges produced by :func:`.link`,
+and can optionally precompute the transitive closure, as a bitset per node.
+
+This module does not import graphviz.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Collection, Iterator
+from typing import TYPE_CHECKING, Literal, NamedTuple, TypeVar
+
+from .linker import POST_TRANSFORMS_ID, TRANSFORMS_ID, LinkResult, link
+from .models import Data
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+
+_D = TypeVar("_D", Data, "CompactData")
+
+
+Direction = Literal["up", "down", "both"]
+"""Follow edges to their targets (``down``), sources (``up``), or both."""
+
+NodeKind = Literal["object", "event", "transforms", "post_transforms", "external"]
+
+DIRECTIONS: tuple[Direction, ...] = ("up", "down", "both")
+
+
+class Focus(NamedTuple):
+    """The neighbourhood of a node, to restrict the graph to."""
+
+    node: str
+    """The path of an object, or the name of an event."""
+    depth: int | None = 1
+    """The maximum number of edges from the node (``None`` for no limit)."""
+    direction: Direction = "both"
+
+    def key(self) -> str:
+        """A string identifying the focus, for cache keys."""
+        return f"{self.node}\0{self.depth}\0{self.direction}"
+
+    @classmethod
+    def from_key(cls, key: str) -> Focus:
+        """The focus identified by a :meth:`key`."""
+        node, depth, direction = key.split("\0")
+        return cls(node, None if depth == "None" else int(depth), direction)  # type: ignore[arg-type]
+
+
+class ReachabilityIndex:
+    """Adjacency lists over the resolved edges of the graph.
+
+    Node names are interned, and referred to by their index in :attr:`names`.
+    """
+
+    def __init__(self, linked: LinkResult) -> None:
+        data = linked.data
+        self.names: list[str] = []
+        self.index: dict[str, int] = {}
+        self.kinds: list[NodeKind] = []
+        self.successors: list[list[int]] = []
+        self.predecessors: list[list[int]] = []
+        for path in data.objects:
+            self._intern(path, "object")
+        for name in data.events:
+            self._intern(name, "event")
+        self._intern(TRANSFORMS_ID, "transforms")
+        self._intern(POST_TRANSFORMS_ID, "post_transforms")
+        seen: set[tuple[int, int]] = set()
+        for edge in linked.edges:
+            source = self._intern(edge.source, "external")
+            target = self._intern(edge.target, "external")
+            if (source, target) not in seen:
+                seen.add((source, target))
+                self.successors[source].append(target)
+                self.predecessors[target].append(source)
+        self._closure: dict[Literal["up", "down"], list[int]] = {}
+
+    @classmethod
+    def from_data(cls, data: Data | CompactData) -> ReachabilityIndex:
+        """Link the data, and index its edges."""
+        return cls(link(data))
+
+    def _intern(self, name: str, kind: NodeKind) -> int:
+        if (index := self.index.get(name)) is None:
+            index = self.index[name] = len(self.names)
+            self.names.append(name)
+            self.kinds.append(kind)
+            self.successors.append([])
+            self.predecessors.append([])
+        return index
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def kind(self, name: str) -> NodeKind:
+        return self.kinds[self.index[name]]
+
+    def _node(self, name: str) -> int:
+        try:
+            return self.index[name]
+        except KeyError:
+            raise ValueError(f"No object or event named {name!r}") from None
+
+    def _adjacent(self, node: int, direction: Direction) -> Iterator[int]:
+        if direction != "up":
+            yield from self.successors[node]
+        if direction != "down":
+            yield from self.predecessors[node]
+
+    def neighbourhood(
+        self, name: str, depth: int | None = 1, direction: Direction = "both"
+    ) -> dict[str, int]:
+        """The nodes within ``depth`` edges of a node (including itself),
+        with their distance from it, in breadth-first order.
+
+        :param depth: The maximum distance (``None`` for no limit).
+        :raises ValueError: If the node does not exist.
+        """
+        start = self._node(name)
+        distances = {start: 0}
+        frontier = [start]
+        distance = 0
+        while frontier and (depth is None or distance < depth):
+            distance += 1
+            next_frontier = []
+            for node in frontier:
+                for adjacent in self._adjacent(node, direction):
+                    if adjacent not in distances:
+                        distances[adjacent] = distance
+                        next_frontier.append(adjacent)
+            frontier = next_frontier
+        return {self.names[node]: d for node, d in distances.items()}
+
+    def reachable(
+        self,
+        name: str,
+        direction: Literal["up", "down"] = "down",
+        kinds: Collection[NodeKind] | None = None,
+    ) -> list[str]:
+        """The nodes reachable from a node (or that reach it, for ``up``),
+        excluding itself unless it is on a cycle.
+
+        Uses the transitive closure if it has been computed,
+        otherwise searches the graph.
+
+        :param kinds: Only return nodes of these kinds.
+        :raises ValueError: If the node does not exist.
+        """
+        start = self._node(name)
+        if (closure := self._closure.get(direction)) is not None:
+            bits = closure[start]
+            nodes = [i for i in range(len(self.names)) if bits >> i & 1]
+        else:
+            seen: set[int] = set()
+            stack = [start]
+            while stack:
+                for adjacent in self._adjacent(stack.pop(), direction):
+                    if adjacent not in seen:
+                        seen.add(adjacent)
+                        stack.append(adjacent)
+            nodes = sorted(seen)
+        return [
+            self.names[node]
+            for node in nodes
+            if kinds is None or self.kinds[node] in kinds
+        ]
+
+    def compute_closure(self, direction: Literal["up", "down"] = "down") -> None:
+        """Precompute the transitive closure, so that :meth:`reachable` is a lookup.
+
+        Strongly connected components are found (with Tarjan's algorithm),
+        then the reachable set of each is the union of those of its successors,
+        which are always complete first.
+        """
+        adjacency = self.successors if direction == "down" else self.predecessors
+        closure = [0] * len(self.names)
+        for component in _components(adjacency):
+            bits = 0
+            members = set(component)
+            cyclic = len(component) > 1
+            for node in component:
+                for adjacent in adjacency[node]:
+                    if adjacent in members:
+                        cyclic = True
+                    else:
+                        bits |= closure[adjacent] | 1 << adjacent
+            if cyclic:
+                for node in component:
+                    bits |= 1 << node
+            for node in component:
+                closure[node] = bits
+        self._closure[direction] = closure
+
+
+def _components(adjacency: list[list[int]]) -> Iterator[list[int]]:
+    """The strongly connected components of a graph, in reverse topological order
+    (i.e. each after every component reachable from it), found iteratively.
+    """
+    index: dict[int, int] = {}
+    lowlink: dict[int, int] = {}
+    on_stack: set[int] = set()
+    stack: list[int] = []
+    for root in range(len(adjacency)):
+        if root in index:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, i = work.pop()
+            if i == 0:
+                index[node] = lowlink[node] = len(index)
+                stack.append(node)
+                on_stack.add(node)
+            neighbours = adjacency[node]
+            while i < len(neighbours):
+                adjacent = neighbours[i]
+                i += 1
+                if adjacent not in index:
+                    work.append((node, i))
+                    work.append((adjacent, 0))
+                    break
+                if adjacent in on_stack:
+                    lowlink[node] = min(lowlink[node], index[adjacent])
+            else:
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    yield component
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+
+def focus_data(data: _D, focus: Focus, index: ReachabilityIndex | None = None) -> _D:
+    """Restrict the data to the neighbourhood of a node.
+
+    As with :func:`.filter_data`, the events emitted by the kept objects are kept.
+
+    :param index: The index of the data, if already computed.
+    :raises ValueError: If the node does not exist.
+    """
+    from .graph import filter_data
+
+    index = index or ReachabilityIndex.from_data(data)
+    nodes = index.neighbourhood(focus.node, focus.depth, focus.direction)
+    focused = filter_data(data, [name for name in nodes if name in data.objects])
+    update: dict[str, object] = {
+        "events": {
+            name: event
+            for name, event in data.events.items()
+            if name in nodes or name in focused.events
+        }
+    }
+    if TRANSFORMS_ID in nodes:
+        update["transforms"] = data.transforms
+    if POST_TRANSFORMS_ID in nodes:
+        update["post_transforms"] = data.post_transforms
+    return focused.model_copy(update=update)
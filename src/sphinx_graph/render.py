@@ -0,0 +1,105 @@
+"""Render DOT source with Graphviz subprocesses."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import subprocess
+import tempfile
+
+
+def run_dot(
+    lines: Iterable[str], outpath: Path, *, format: str = "svg", engine: str = "dot"
+) -> Path:
+    """Render DOT source by writing it, line by line, into the stdin of Graphviz.
+
+    :param lines: The DOT source, which may be a single string.
+    :param outpath: The path to write the rendered output to.
+    :param format: The output format.
+    :param engine: The layout engine.
+    :raises subprocess.CalledProcessError: If Graphviz fails.
+    """
+    outpath.parent.mkdir(parents=True, exist_ok=True)
+    cmd = ["dot", f"-K{engine}", f"-T{format}", "-o", str(outpath)]
+    # stderr goes to a file, so that a chatty Graphviz cannot block on a full pipe
+    with (
+        tempfile.TemporaryFile() as stderr,
+        subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stderr=stderr, encoding="utf8"
+        ) as proc,
+    ):
+        assert proc.stdin is not None
+        try:
+            if isinstance(lines, str):
+                proc.stdin.write(lines)
+            else:
+                proc.stdin.writelines(lines)
+        except BrokenPipeError:
+            pass  # Graphviz exited early, the error is reported below
+        finally:
+            proc.stdin.close()
+        proc.wait()
+        if proc.returncode:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(
+                proc.returncode, cmd, stderr=stderr.read().decode(errors="replace")
+            )
+    return outpath
+
+
+async def run_dot_async(
+    source: str, outpath: Path, *, format: str = "svg", engine: str = "dot"
+) -> Path:
+    """Render DOT source with a Graphviz subprocess, without blocking the event loop.
+
+    If the awaiting task is cancelled, the Graphviz process is killed.
+
+    :raises subprocess.CalledProcessError: If Graphviz fails.
+    """
+    outpath.parent.mkdir(parents=True, exist_ok=True)
+    cmd = ["dot", f"-K{engine}", f"-T{format}", "-o", str(outpath)]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        _, stderr = await proc.communicate(source.encode())
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+    if proc.returncode:
+        raise subprocess.CalledProcessError(
+            proc.returncode, cmd, stderr=stderr.decode(errors="replace")
+        )
+    return outpath
+
+
+def render_formats(
+    source: str,
+    outpaths: dict[str, Path],
+    *,
+    engine: str = "dot",
+    max_workers: int | None = None,
+) -> dict[str, Path]:
+    """Render the same DOT source to multiple formats concurrently.
+
+    One Graphviz process is run per format, in a bounded pool.
+
+    :param outpaths: A mapping of each format to its output path.
+    :param max_workers: The maximum number of concurrent Graphviz processes
+        (defaults to the number of formats).
+    :returns: A mapping of each format to its output path.
+    """
+    if len(outpaths) == 1:
+        ((format, outpath),) = outpaths.items()
+        return {format: run_dot(source, outpath, format=format, engine=engine)}
+    with ThreadPoolExecutor(max_workers or len(outpaths) or None) as executor:
+        futures = {
+            format: executor.submit(
+                run_dot, source, outpath, format=format, engine=engine
+            )
+            for format, outpath in outpaths.items()
+        }
+        return {format: future.result() for format, future in futures.items()}
@@ -0,0 +1,439 @@
+"""A local HTTP server, to explore the graph interactively.
+
+The data is loaded, validated and indexed once, when the server starts.
+Each view of the graph (its format, layout, filter and focus, and whether callbacks
+are hidden) is rendered on request, then kept in a bounded in-memory LRU cache,
+and in the on-disk render cache (see :mod:`sphinx_graph.cache`),
+so that repeated views are answered without building or rendering anything.
+Concurrent requests for the same view share one render,
+and the number of concurrent Graphviz processes is limited.
+
+Views are requested as ``/graph.<format>?focus=<name>&depth=2&direction=down``,
+with the optional parameters ``objects`` (comma-separated), ``layout``
+and ``hide_callbacks``; the index page has a form to choose them.
+
+The server is built on the standard library :mod:`http.server`,
+and is meant for local use only.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future
+import contextlib
+import html
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from graphviz import ExecutableNotFound
+
+from .cache import RenderCache, get_cache
+from .layout import PROFILES, get_profile
+from .main import read_source
+from .reachability import DIRECTIONS, Focus, ReachabilityIndex
+
+if TYPE_CHECKING:
+    from .fragments import FragmentSet
+    from .models import Data
+
+CONTENT_TYPES = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "pdf": "application/pdf",
+    "json": "application/json",
+    "html": "text/html; charset=utf-8",
+}
+"""The formats that can be requested, and their content types."""
+
+MAX_MEMORY = 64 * 1024 * 1024
+"""The default maximum total size of the renders kept in memory, in bytes."""
+
+
+class LRUCache:
+    """A thread-safe mapping of keys to bytes, bounded by their total size,
+    which evicts the least recently used entries first.
+    """
+
+    def __init__(self, max_size: int = MAX_MEMORY) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            if (content := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+            return content
+
+    def put(self, key: str, content: bytes) -> None:
+        """Add an entry, unless it is larger than the whole cache."""
+        if len(content) > self.max_size:
+            return
+        with self._lock:
+            if (old := self._entries.pop(key, None)) is not None:
+                self.size -= len(old)
+            self._entries[key] = content
+            self.size += len(content)
+            while self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class View(NamedTuple):
+    """The options of a rendered view of the graph."""
+
+    format: str = "svg"
+    layout: str = "default"
+    objects: tuple[str, ...] = ()
+    """Only show these objects (see :func:`.filter_data`)."""
+    focus: Focus | None = None
+    """Only show the neighbourhood of a node (see :func:`.focus_data`)."""
+    hide_callbacks: bool = False
+    """Show events without their callbacks."""
+
+    @classmethod
+    def from_query(cls, format: str, query: str) -> View:
+        """Parse the format and query string of a request.
+
+        :raises ValueError: If an option is not valid.
+        """
+        params = {k: v[-1] for k, v in parse_qs(query).items()}
+        if format not in CONTENT_TYPES:
+            raise ValueError(
+                f"Unknown format {format!r}, expected one of {list(CONTENT_TYPES)}"
+            )
+        if (layout := params.get("layout", "default")) not in PROFILES:
+            raise ValueError(
+                f"Unknown layout {layout!r}, expected one of {list(PROFILES)}"
+            )
+        focus = None
+        if node := params.get("focus"):
+            depth = int(params.get("depth") or 1)
+            direction = params.get("direction") or "both"
+            if direction not in DIRECTIONS:
+                raise ValueError(
+                    f"Unknown direction {direction!r}, expected one of {DIRECTIONS}"
+                )
+            focus = Focus(node, None if depth < 0 else depth, direction)  # type: ignore[arg-type]
+        return cls(
+            format,
+            layout,
+            tuple(o for o in params.get("objects", "").split(",") if o),
+            focus,
+            params.get("hide_callbacks", "") not in ("", "0", "false"),
+        )
+
+    def extra(self) -> dict[str, str]:
+        """The options that affect the output, for the render cache key."""
+        return {
+            "objects": " ".join(self.objects),
+            "focus": self.focus.key() if self.focus else "",
+            "hide_callbacks": str(self.hide_callbacks),
+        }
+
+
+def hide_callbacks(data: Data) -> Data:
+    """Hide the callbacks of every event, so that only their titles are shown."""
+    return data.model_copy(
+        update={
+            "events": {
+                name: event.model_copy(
+                    update={
+                        "callbacks": {
+                            path: callback.model_copy(update={"hide": True})
+                            for path, callback in event.callbacks.items()
+                        }
+                    }
+                )
+                for name, event in data.events.items()
+            }
+        }
+    )
+
+
+class GraphService:
+    """Render views of the graph, from data loaded once, with caching.
+
+    :param data: The data to render.
+    :param source: The raw data (and fragments) the data was loaded from,
+        for cache keys.
+    :param cache: The on-disk render cache, or whether to use the default cache.
+    :param max_memory: The maximum total size of the renders kept in memory, in bytes.
+    :param max_workers: The maximum number of concurrent Graphviz processes.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        data: Data,
+        source: bytes,
+        *,
+        cache: RenderCache | bool = True,
+        max_memory: int = MAX_MEMORY,
+        max_workers: int | None = None,
+    ) -> None:
+        self.data = data
+        self.source = source
+        self.index = ReachabilityIndex.from_data(data)
+        self.cache = get_cache(cache)
+        self.memory = LRUCache(max_memory)
+        self._keys = self.cache or RenderCache()
+        self._dot = threading.BoundedSemaphore(max_workers or os.cpu_count() or 1)
+        self._pending: dict[str, Future[bytes]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, fragments: FragmentSet | None = None, **kwargs) -> GraphService:
+        """Load the data (and merge any fragments), then create the service.
+
+        :param kwargs: Passed to the constructor.
+        """
+        from .snapshot import load_data
+
+        source = read_source()
+        data = load_data(source=source)
+        if fragments:
+            data = fragments.merge(data)
+            source += fragments.digest().encode()
+        return cls(data, source, **kwargs)
+
+    def key(self, view: View) -> str:
+        """The cache key of a view."""
+        from .export import EXPORT_FORMATS
+
+        profile = get_profile(view.layout)
+        return self._keys.key(
+            self.source,
+            format=view.format,
+            engine=None if view.format in EXPORT_FORMATS else profile.engine,
+            layout=profile.key(),
+            **view.extra(),
+        )
+
+    def view_data(self, view: View) -> Data:
+        """The data of a view, filtered and focused.
+
+        :raises ValueError: If the focused node does not exist.
+        """
+        from .graph import filter_data
+        from .reachability import focus_data
+
+        data = self.data
+        if view.objects:
+            data = filter_data(data, view.objects)
+        if view.focus:
+            # the index is of the unfiltered data
+            index = None if view.objects else self.index
+            data = focus_data(data, view.focus, index)
+        if view.hide_callbacks:
+            data = hide_callbacks(data)
+        return data
+
+    def render(self, view: View) -> tuple[str, bytes]:
+        """Render a view, or get it from the cache,
+        waiting for the render if the same view is already being rendered.
+
+        :returns: The cache key of the view, and its content.
+        :raises ValueError: If the focused node does not exist.
+        :raises subprocess.CalledProcessError: If Graphviz fails.
+        :raises OSError: If Graphviz is not installed.
+        """
+        key = self.key(view)
+        if (content := self.memory.get(key)) is not None:
+            return key, content
+        with self._lock:
+            if (pending := self._pending.get(key)) is None:
+                future = self._pending[key] = Future()
+        if pending is not None:
+            return key, pending.result()
+        try:
+            content = self._render(view, key)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            self.memory.put(key, content)
+            future.set_result(content)
+        finally:
+            with self._lock:
+                del self._pending[key]
+        return key, content
+
+    def _render(self, view: View, key: str) -> bytes:
+        from .export import EXPORT_FORMATS
+
+        if view.format in EXPORT_FORMATS:
+            from .export import dumps_json, viewer_html
+            from .ir import GraphIR
+
+            data = self.view_data(view)
+            ir = GraphIR.from_data(data)
+            if view.format == "json":
+                return dumps_json(ir).encode()
+            return viewer_html(ir, data.comment).encode()
+
+        if self.cache:
+            cached = self.cache.path(key, view.format)
+            try:
+                content = cached.read_bytes()
+            except FileNotFoundError:
+                pass
+            else:
+                os.utime(cached)
+                return content
+
+        from .render import run_dot
+        from .stream import iter_dot
+
+        profile = get_profile(view.layout)
+        dot_source = "".join(iter_dot(self.view_data(view), layout=profile))
+        with tempfile.TemporaryDirectory() as directory:
+            outpath = Path(directory, f"graph.{view.format}")
+            with self._dot:
+                run_dot(dot_source, outpath, format=view.format, engine=profile.engine)
+            if self.cache:
+                self.cache.store(key, view.format, outpath)
+            return outpath.read_bytes()
+
+
+def _index_page(service: GraphService, view: View, query: str) -> str:
+    """A page with a form to choose the view, and the rendered view."""
+    focus = view.focus or Focus("", 1, "both")
+
+    def options(values: object, selected: object) -> str:
+        return "".join(
+            f'<option{" selected" if value == selected else ""}>{value}</option>'
+            for value in values  # type: ignore[attr-defined]
+        )
+
+    names = "".join(
+        f'<option value="{html.escape(name)}">' for name in sorted(service.index.names)
+    )
+    src = f"/graph.{view.format}?{html.escape(query)}"
+    if view.format in ("svg", "html"):
+        graph = f'<object data="{src}" type="{CONTENT_TYPES[view.format]}"></object>'
+    elif view.format == "png":
+        graph = f'<img src="{src}" alt="graph">'
+    else:
+        graph = f'<a href="{src}">{src}</a>'
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(service.data.comment)}</title>
+<style>
+body {{ margin: 0; font-family: sans-serif; }}
+form {{ padding: 0.5em; background: #eee; }}
+object, img {{ display: block; width: 100%; height: calc(100vh - 3em); }}
+</style>
+</head>
+<body>
+<form>
+<input name="focus" list="names" size="50" placeholder="focus on an object or event"
+ value="{html.escape(focus.node)}">
+<datalist id="names">{names}</datalist>
+<label>depth <input name="depth" type="number" min="-1" style="width: 4em"
+ value="{-1 if focus.depth is None else focus.depth}"></label>
+<select name="direction">{options(DIRECTIONS, focus.direction)}</select>
+<select name="format">{options(CONTENT_TYPES, view.format)}</select>
+<select name="layout">{options(PROFILES, view.layout)}</select>
+<label><input name="hide_callbacks" type="checkbox" value="1"
+ {"checked" if view.hide_callbacks else ""}> hide callbacks</label>
+<button>show</button>
+</form>
+{graph}
+</body>
+</html>
+"""
+
+
+class GraphRequestHandler(BaseHTTPRequestHandler):
+    """Serve the index page, and the views of the graph."""
+
+    server: GraphServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._handle()
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        self._handle(body=False)
+
+    def _handle(self, *, body: bool = True) -> None:
+        url = urlsplit(self.path)
+        service = self.server.service
+        try:
+            if url.path == "/":
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                view = View.from_query(params.pop("format", "svg"), url.query)
+                page = _index_page(service, view, urlencode(params))
+                self._send(page.encode(), "html", body=body)
+                return
+            name, _, format = url.path.lstrip("/").rpartition(".")
+            if name != "graph":
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            view = View.from_query(format, url.query)
+            # views are identified by their key, so are unchanged if it matches
+            etag = f'"{service.key(view)}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            _, content = service.render(view)
+        except ValueError as exc:  # an invalid option, or an unknown focus
+            self.send_error(HTTPStatus.BAD_REQUEST, explain=str(exc))
+            return
+        except subprocess.CalledProcessError as exc:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, explain=exc.stderr)
+            return
+        except (OSError, ExecutableNotFound) as exc:  # e.g. Graphviz is not installed
+            self.send_error(
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                explain=f"Graphviz could not be run: {exc}",
+            )
+            return
+        self._send(content, view.format, etag, body=body)
+
+    def _send(
+        self, content: bytes, format: str, etag: str = "", *, body: bool = True
+    ) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", CONTENT_TYPES[format])
+        self.send_header("Content-Length", str(len(content)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if body:
+            self.wfile.write(content)
+
+
+class GraphServer(ThreadingHTTPServer):
+    """An HTTP server for a :class:`GraphService`."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: GraphService) -> None:
+        super().__init__(address, GraphRequestHandler)
+        self.service = service
+
+
+def serve(service: GraphService, host: str = "127.0.0.1", port: int = 8000) -> None:
+    """Serve the graph until interrupted."""
+    with GraphServer((host, port), service) as server:
+        host, port = server.server_address[:2]
+        print(f"Serving the graph on http://{host}:{port}/", file=sys.stderr)
+        with contextlib.suppress(KeyboardInterrupt):
+            server.serve_forever()
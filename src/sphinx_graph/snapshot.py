@@ -0,0 +1,141 @@
+"""Load data from a compiled snapshot, skipping TOML parsing and validation.
+
+A snapshot is a pickle of the validated models, written in the cache directory
+for the bundled data (so nothing is written into the installed package),
+and next to the TOML file for other data (or in the cache directory, if that is not writable).
+It records the modification time, size and content hash of the TOML it was made from:
+if the modification time and size match, the snapshot is loaded without reading the TOML,
+otherwise it is only used if the content hash matches.
+
+Snapshots are trusted, so should only be loaded from locations you control.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+import pickle
+import tomllib
+from typing import Any, NamedTuple
+
+from .cache import default_cache_dir
+from .instrument import Instrumentation, stage
+from .main import DATA_PATH
+from .models import Data
+
+SNAPSHOT_VERSION = 1
+"""The version of the snapshot format, incremented on incompatible changes."""
+
+
+class SnapshotHeader(NamedTuple):
+    """The header of a snapshot, identifying the data it was made from."""
+
+    version: str
+    """The snapshot format, package and pydantic versions."""
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+def _versions() -> str:
+    from pydantic import VERSION
+
+    from . import __version__
+
+    return f"{SNAPSHOT_VERSION}:{__version__}:{VERSION}"
+
+
+def snapshot_path(path: Path) -> Path:
+    """The snapshot path for a TOML file: in the cache directory for the bundled data,
+    otherwise next to the file.
+    """
+    if path.resolve() == DATA_PATH.resolve():
+        return _cache_path(path)
+    return path.with_name(f".{path.name}.snapshot")
+
+
+def _cache_path(path: Path) -> Path:
+    """The snapshot path in the cache directory,
+    for the bundled data, and for read-only data directories.
+    """
+    digest = hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:16]
+    return default_cache_dir().joinpath("snapshots", f"{path.stem}-{digest}.snapshot")
+
+
+def _read(
+    snapshot: Path, expected: SnapshotHeader
+) -> tuple[SnapshotHeader, Any] | None:
+    """Read a snapshot, if its header matches (ignoring the mtime if it is -1)."""
+    try:
+        with snapshot.open("rb") as handle:
+            header = SnapshotHeader(*pickle.load(handle))
+            if header.version != expected.version or header.size != expected.size:
+                return None
+            if expected.mtime_ns not in (-1, header.mtime_ns):
+                return None
+            if expected.sha256 and header.sha256 != expected.sha256:
+                return None
+            return header, pickle.load(handle)
+    except (OSError, EOFError, pickle.UnpicklingError, TypeError, AttributeError):
+        return None
+
+
+def _write(snapshot: Path, header: SnapshotHeader, data: object) -> bool:
+    """Write a snapshot atomically, returning whether it succeeded."""
+    temp = snapshot.with_name(f".{snapshot.name}.{os.getpid()}.tmp")
+    try:
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        with temp.open("wb") as handle:
+            pickle.dump(tuple(header), handle, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        temp.replace(snapshot)
+    except OSError:
+        temp.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def load_data(
+    path: Path | None = None,
+    *,
+    source: bytes | None = None,
+    instrument: Instrumentation | None = None,
+) -> Data:
+    """Load the data from a TOML file, via its snapshot if it is up to date.
+
+    :param path: The TOML file (defaults to the bundled data).
+    :param source: The contents of the file, if already read.
+    :param instrument: Receives the ``parse`` and ``validate`` stages,
+        if the snapshot is out of date.
+    """
+    path = path or DATA_PATH
+    stat = path.stat()
+    candidates = tuple(dict.fromkeys((snapshot_path(path), _cache_path(path))))
+
+    # fast path: the file is unchanged since the snapshot was made
+    if source is None:
+        fast = SnapshotHeader(_versions(), stat.st_mtime_ns, stat.st_size, "")
+        for snapshot in candidates:
+            if (result := _read(snapshot, fast)) is not None:
+                return result[1]
+        source = path.read_bytes()
+
+    header = SnapshotHeader(
+        _versions(), stat.st_mtime_ns, len(source), hashlib.sha256(source).hexdigest()
+    )
+    # the file may have been touched, but still have the same content
+    for snapshot in candidates:
+        if (result := _read(snapshot, header._replace(mtime_ns=-1))) is not None:
+            if result[0].mtime_ns != header.mtime_ns:
+                _write(snapshot, header, result[1])
+            return result[1]
+
+    with stage(instrument, "parse"):
+        raw = tomllib.loads(source.decode("utf8"))
+    with stage(instrument, "validate"):
+        data = Data(**raw)
+    for snapshot in candidates:
+        if _write(snapshot, header, data):
+            break
+    return data
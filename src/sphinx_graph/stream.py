@@ -0,0 +1,91 @@
+"""Stream DOT statements to a file or a Graphviz subprocess, node by node.
+
+Only the statements of a single node are held in memory at any one time
+(alongside the compact IR of the graph), rather than the full source of the graph.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+
+from graphviz import Digraph
+
+from .graph import add_node, new_graph, warning
+from .ir import GraphIR
+from .layout import LayoutProfile, get_profile
+from .linker import link
+from .models import Data
+from .overlay import Overlay
+from .render import run_dot
+
+if TYPE_CHECKING:
+    from .compact import CompactData
+
+
+def iter_dot(
+    data: Data | CompactData,
+    *,
+    layout: str | LayoutProfile | None = None,
+    overlay: Overlay | None = None,
+) -> Iterator[str]:
+    """Yield the DOT source of the graph, one statement at a time.
+
+    The output is identical to
+    ``build_graph(data, layout=layout, overlay=overlay).source``.
+    """
+    linked = link(data)
+    for diagnostic in linked.diagnostics:
+        warning(diagnostic.message)
+    ir = GraphIR.from_data(data, linked)
+
+    *head, tail = new_graph(data.comment, layout)
+    yield from head
+
+    for node in range(ir.node_count):
+        chunk = Digraph()
+        add_node(ir, node, chunk, overlay)
+        yield from chunk.body
+
+    yield tail
+
+
+def write_dot(
+    data: Data | CompactData,
+    file: TextIO | Path,
+    *,
+    layout: str | LayoutProfile | None = None,
+    overlay: Overlay | None = None,
+) -> None:
+    """Write the DOT source of the graph to a file, one statement at a time."""
+    if isinstance(file, Path):
+        with file.open("w", encoding="utf8") as handle:
+            handle.writelines(iter_dot(data, layout=layout, overlay=overlay))
+    else:
+        file.writelines(iter_dot(data, layout=layout, overlay=overlay))
+
+
+def render_stream(
+    data: Data | CompactData,
+    outpath: Path,
+    *,
+    format: str = "svg",
+    layout: str | LayoutProfile | None = None,
+    overlay: Overlay | None = None,
+) -> Path:
+    """Render the graph by streaming its DOT source into the stdin of Graphviz.
+
+    :param outpath: The path to write the rendered output to.
+    :param format: The output format.
+    :param layout: The layout profile, which also selects the layout engine.
+    :param overlay: Adds attributes to the nodes and edges.
+    :raises subprocess.CalledProcessError: If Graphviz fails.
+    """
+    profile = get_profile(layout)
+    return run_dot(
+        iter_dot(data, layout=profile, overlay=overlay),
+        outpath,
+        format=format,
+        engine=profile.engine,
+    )
@@ -0,0 +1,191 @@
+"""Generate synthetic data of configurable size, for benchmarks.
+
+The generated data is deterministic for a given seed, and valid,
+with every reference resolving, so that it exercises the whole pipeline.
+It is returned as a raw dictionary, as loaded from TOML,
+so it can be serialized with :func:`to_toml`, or validated into a :class:`.Data`.
+
+This module does not import pydantic or graphviz.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from typing import Any
+
+# the probabilities of each kind of call
+P_ENTER = 0.15
+P_EMIT = 0.1
+P_NOT_REF = 0.05
+P_EXIT = 0.3
+"""The probability of closing an open enter block, after each call."""
+
+
+def generate(  # noqa: PLR0912,PLR0913
+    *,
+    objects: int = 100,
+    calls_per_object: int = 5,
+    depth: int = 2,
+    events: int = 10,
+    callbacks_per_event: int = 3,
+    transforms: int = 10,
+    post_transforms: int = 5,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Generate a data dictionary.
+
+    :param objects: The number of objects.
+    :param calls_per_object: The number of calls of each object
+        (not counting the exits of enter blocks).
+    :param depth: The maximum nesting depth of enter/exit blocks.
+    :param events: The number of events, which are emitted by some calls.
+    :param callbacks_per_event: The number of callbacks of each event.
+    :param transforms: The number of transforms.
+    :param post_transforms: The number of post transforms.
+    :param seed: The seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    paths = [
+        f"synthetic.module{i // 20}.Class{i // 5}.method{i}" for i in range(objects)
+    ]
+    event_names = [f"synthetic-event-{i}" for i in range(events)]
+    contexts = ("for", "with", "if")
+
+    result: dict[str, Any] = {
+        "comment": f"Synthetic data ({objects} objects, seed {seed})",
+        "objects": {},
+        "events": {},
+        "transforms": {},
+        "post_transforms": {},
+    }
+    for i, path in enumerate(paths):
+        calls: list[dict[str, Any]] = []
+        open_blocks = 0
+        for _ in range(calls_per_object):
+            roll = rng.random()
+            if open_blocks < depth and roll < P_ENTER:
+                # calls mostly go forwards, so the graph is mostly acyclic
+                target = paths[rng.randrange(i, objects)]
+                calls.append(
+                    {"text": target, "type": "enter", "context": rng.choice(contexts)}
+                )
+                open_blocks += 1
+            elif event_names and roll < P_ENTER + P_EMIT:
+                calls.append({"text": rng.choice(event_names), "type": "emit"})
+            elif roll < P_ENTER + P_EMIT + P_NOT_REF:
+                calls.append({"text": f"helper_{rng.randrange(100)}", "is_ref": False})
+            else:
+                calls.append({"text": paths[rng.randrange(i, objects)]})
+            if open_blocks and rng.random() < P_EXIT:
+                calls.append({"text": "", "type": "exit"})
+                open_blocks -= 1
+        calls.extend({"text": "", "type": "exit"} for _ in range(open_blocks))
+        if i == 0 and transforms:
+            calls.append({"text": "apply transforms", "type": "apply_transforms"})
+        if i == 0 and post_transforms:
+            calls.append(
+                {"text": "apply post transforms", "type": "apply_post_transforms"}
+            )
+        obj: dict[str, Any] = {
+            "description": f"Synthetic object {i}.",
+            "type": "function" if i % 7 == 0 else "method",
+            "calls": calls,
+        }
+        if i % 10 == 0 and i + 1 < objects:
+            obj["overrides"] = [paths[i + 1]]
+        result["objects"][path] = obj
+
+    for name in event_names:
+        result["events"][name] = {
+            "callbacks": {
+                f"synthetic.callbacks.{name}_{j}": {
+                    "priority": 500,
+                    "doc": f"Callback {j} of {name}.",
+                }
+                for j in range(callbacks_per_event)
+            }
+        }
+    for i in range(transforms):
+        transform: dict[str, Any] = {"priority": rng.randrange(1000)}
+        if event_names and i == 0:
+            transform["emit"] = event_names[0]
+        result["transforms"][f"synthetic.transforms.Transform{i}"] = transform
+    for i in range(post_transforms):
+        result["post_transforms"][f"synthetic.transforms.PostTransform{i}"] = {
+            "priority": rng.randrange(1000),
+            "formats": ["html"] if i % 2 else [],
+            "builders": ["latex"] if i % 3 == 0 else [],
+        }
+    return result
+
+
+def generate_calls(total_calls: int, *, calls_per_object: int = 10, **kwargs) -> dict:
+    """Generate a data dictionary with about ``total_calls`` calls,
+    with the number of events and transforms growing with the number of objects.
+    """
+    objects = max(1, total_calls // calls_per_object)
+    kwargs.setdefault("events", max(1, objects // 20))
+    kwargs.setdefault("transforms", max(1, objects // 50))
+    kwargs.setdefault("post_transforms", max(1, objects // 100))
+    return generate(objects=objects, calls_per_object=calls_per_object, **kwargs)
+
+
+def count_calls(data: dict[str, Any]) -> int:
+    """The number of calls in a data dictionary, not counting exits."""
+    return sum(
+        call.get("type") != "exit"
+        for obj in data["objects"].values()
+        for call in obj.get("calls", [])
+    )
+
+
+def replicate(data: dict[str, Any], scale: int) -> dict[str, Any]:
+    """Replicate every object, event and transform, with references renamed to match."""
+
+    def rename(name: str, i: int) -> str:
+        return f"{name}#{i}" if i else name
+
+    result: dict[str, Any] = {"comment": data["comment"]}
+    for table in ("objects", "events", "transforms", "post_transforms"):
+        result[table] = {}
+    for i in range(scale):
+        for path, obj in data["objects"].items():
+            obj = {**obj}  # noqa: PLW2901
+            obj["calls"] = [
+                {**call, "text": rename(call["text"], i)}
+                for call in obj.get("calls", [])
+            ]
+            obj["overrides"] = [rename(o, i) for o in obj.get("overrides", [])]
+            result["objects"][rename(path, i)] = obj
+        for table in ("events", "transforms", "post_transforms"):
+            for name, value in data[table].items():
+                result[table][rename(name, i)] = value
+    return result
+
+
+def _toml_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int | float):
+        return str(value)
+    if isinstance(value, str):
+        return json.dumps(value)
+    if isinstance(value, list):
+        return "[" + ", ".join(_toml_value(v) for v in value) + "]"
+    if isinstance(value, dict):
+        items = (f"{json.dumps(k)} = {_toml_value(v)}" for k, v in value.items())
+        return "{ " + ", ".join(items) + " }"
+    raise TypeError(f"Cannot serialize {value!r}")
+
+
+def to_toml(data: dict[str, Any]) -> str:
+    """Serialize a data dictionary to TOML."""
+    lines = [f"comment = {_toml_value(data['comment'])}"]
+    for table in ("objects", "events", "transforms", "post_transforms"):
+        lines.append(f"\n[{table}]")
+        lines.extend(
+            f"{json.dumps(key)} = {_toml_value(value)}"
+            for key, value in data[table].items()
+        )
+    return "\n".join(lines) + "\n"
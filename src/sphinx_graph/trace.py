@@ -0,0 +1,851 @@
+"""Trace a real Sphinx build, recording the time spent in each object of the graph.
+
+Only the objects in :attr:`.Data.objects` are instrumented:
+on Python 3.12+ with :mod:`sys.monitoring`, enabling events for their code objects
+alone, so that the rest of the build runs at full speed;
+on older versions with :func:`sys.setprofile`, which is called for every function,
+but ignores those not in the graph.
+
+For each object the number of calls, and the cumulative and self time are recorded,
+and for each call edge (between an object and the nearest traced object
+that called it) the number of calls and the cumulative time.
+As with :mod:`cProfile`, time spent suspended in a generator
+(e.g. in the body of a ``with`` block of a context manager) is not counted.
+
+The event callbacks and the transforms of the build are also timed
+(see :class:`CallbackTimer` and :class:`TransformTimer`),
+recording the number of calls, and the total and maximum time of each.
+
+For parallel builds (``-j``), a timeline is also recorded
+(see :class:`WorkerTimeline`): the span of each chunk of documents read or written
+by a worker process, and of the serial phases of the main process,
+such as merging the environments of the workers.
+It can be exported in the Chrome trace format (see :meth:`TraceProfile.to_chrome_trace`).
+Otherwise, only the work of the main process is traced.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Collection, Iterable, Sequence, Sized
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+from types import CodeType, TracebackType
+from typing import Any, Literal, NamedTuple
+
+from .linker import warning
+from .models import Data
+
+TRACE_SUFFIX = ".trace.json"
+"""The suffix of the trace files written by the command-line."""
+
+TIMELINE_PATHS = (
+    "sphinx.builders.Builder.read",
+    "sphinx.builders.Builder._read_parallel",
+    "sphinx.environment.BuildEnvironment.merge_info_from",
+    "sphinx.builders.Builder.write",
+    "sphinx.builders.Builder._write_parallel",
+    "sphinx.builders.Builder.write_doc_serialized",
+)
+"""The objects of the main process whose calls are spans of the timeline
+(along with the objects that override them)."""
+
+
+class ObjectTiming(NamedTuple):
+    """The time spent in an object."""
+
+    calls: int
+    """The number of times the object was entered (including resumed generators)."""
+    cumulative_s: float
+    """The time from entering the object to returning, excluding recursive calls."""
+    self_s: float
+    """The cumulative time, minus that spent in the traced objects it called."""
+
+
+class EdgeTiming(NamedTuple):
+    """The time spent in the calls from one object to another."""
+
+    calls: int
+    """The number of calls (including resumed generators)."""
+    cumulative_s: float
+
+
+class CallTiming(NamedTuple):
+    """The time spent in an event callback or a transform."""
+
+    calls: int
+    total_s: float
+    max_s: float
+    """The time of the slowest call."""
+
+
+class Span(NamedTuple):
+    """A span of time in a process of the build, for the timeline."""
+
+    name: str
+    category: Literal["main", "worker", "merge"]
+    """A call of an object in the main process, a chunk of documents processed
+    by a worker process, or the merge of its result back into the main process."""
+    node: str
+    """The path of the object in the graph that the span belongs to."""
+    pid: int
+    tid: int
+    start_s: float
+    """The start time, since the start of the trace."""
+    end_s: float
+    docs: int | None = None
+    """The number of documents in the chunk, for worker and merge spans."""
+
+
+class TraceProfile:
+    """The timings recorded while tracing a build."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        objects: dict[str, ObjectTiming] | None = None,
+        edges: dict[tuple[str, str], EdgeTiming] | None = None,
+        *,
+        callbacks: dict[str, dict[str, CallTiming]] | None = None,
+        transforms: dict[str, CallTiming] | None = None,
+        spans: Sequence[Span] = (),
+        wall_s: float = 0.0,
+        unresolved: Sequence[str] = (),
+    ) -> None:
+        self.objects = objects or {}
+        """The timing of each object that was called, by path."""
+        self.edges = edges or {}
+        """The timing of each call edge, by ``(caller, callee)`` path."""
+        self.callbacks = callbacks or {}
+        """The timing of each callback that was called, by event name then path."""
+        self.transforms = transforms or {}
+        """The timing of each transform (and post transform) that was applied,
+        by path; each runs once per document (or fragment of a document).
+        """
+        self.spans = list(spans)
+        """The spans of the timeline, ordered by start time."""
+        self.wall_s = wall_s
+        """The wall time of the whole trace."""
+        self.unresolved = list(unresolved)
+        """The paths of the objects whose code could not be found, so were not traced."""
+
+    def as_dict(self) -> dict[str, Any]:
+        """The profile, as a JSON-compatible dictionary."""
+        return {
+            "wall_s": self.wall_s,
+            "objects": {path: t._asdict() for path, t in self.objects.items()},
+            "edges": [
+                {"source": source, "target": target, **t._asdict()}
+                for (source, target), t in self.edges.items()
+            ],
+            "callbacks": {
+                event: {path: t._asdict() for path, t in timings.items()}
+                for event, timings in self.callbacks.items()
+            },
+            "transforms": {path: t._asdict() for path, t in self.transforms.items()},
+            "spans": [span._asdict() for span in self.spans],
+            "unresolved": self.unresolved,
+        }
+
+    @classmethod
+    def from_dict(cls, value: dict[str, Any]) -> TraceProfile:
+        return cls(
+            {path: ObjectTiming(**t) for path, t in value["objects"].items()},
+            {
+                (t["source"], t["target"]): EdgeTiming(t["calls"], t["cumulative_s"])
+                for t in value["edges"]
+            },
+            callbacks={
+                event: {path: CallTiming(**t) for path, t in timings.items()}
+                for event, timings in value.get("callbacks", {}).items()
+            },
+            transforms={
+                path: CallTiming(**t) for path, t in value.get("transforms", {}).items()
+            },
+            spans=[Span(**span) for span in value.get("spans", ())],
+            wall_s=value.get("wall_s", 0.0),
+            unresolved=value.get("unresolved", ()),
+        )
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_json(indent=2), "utf8")
+
+    @classmethod
+    def load(cls, path: Path) -> TraceProfile:
+        return cls.from_dict(json.loads(path.read_text("utf8")))
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """The timeline, in the Chrome trace event format,
+        which can be opened with ``chrome://tracing``, Perfetto or speedscope.
+
+        Each event has the path of its graph node in ``args.node``.
+        """
+        events: list[dict[str, Any]] = []
+        processes: dict[int, str] = {}
+        for span in self.spans:
+            if span.category == "worker":
+                processes.setdefault(span.pid, f"worker {span.pid}")
+            else:
+                processes[span.pid] = "sphinx-build"
+            args: dict[str, Any] = {"node": span.node}
+            if span.docs is not None:
+                args["docs"] = span.docs
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round(span.start_s * 1e6, 3),
+                    "dur": round((span.end_s - span.start_s) * 1e6, 3),
+                    "pid": span.pid,
+                    "tid": span.tid,
+                    "args": args,
+                }
+            )
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}}
+            for pid, name in processes.items()
+        ]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace()), "utf8")
+
+    def fingerprint(self) -> str:
+        """A hash of the timings, for cache keys."""
+        return hashlib.sha256(self.to_json(sort_keys=True).encode()).hexdigest()
+
+
+def resolve_code(path: str) -> CodeType | None:
+    """Find the code object of a function or method by its fully qualified name.
+
+    Decorated functions are unwrapped, and properties resolve to their getter.
+    Returns ``None`` if the path cannot be imported, or is not a Python function.
+    """
+    parts = path.split(".")
+    obj: Any = None
+    for i in range(len(parts) - 1, 0, -1):
+        try:
+            obj = importlib.import_module(".".join(parts[:i]))
+        except ImportError:
+            continue
+        for part in parts[i:]:
+            # look in the class dict first, to get at static and class methods
+            namespace = getattr(obj, "__dict__", {})
+            if part in namespace:
+                obj = namespace[part]
+            elif (obj := getattr(obj, part, None)) is None:
+                break
+        break
+    if isinstance(obj, staticmethod | classmethod):
+        obj = obj.__func__
+    elif isinstance(obj, property):
+        obj = obj.fget
+    if not callable(obj):
+        return None
+    obj = inspect.unwrap(obj)
+    return getattr(obj, "__code__", None)
+
+
+def resolve_codes(paths: Iterable[str]) -> tuple[dict[CodeType, str], list[str]]:
+    """Resolve the code object of each path.
+
+    :returns: A mapping of each code object to its path, and the unresolved paths.
+    """
+    codes: dict[CodeType, str] = {}
+    unresolved: list[str] = []
+    for path in paths:
+        if (code := resolve_code(path)) is None:
+            unresolved.append(path)
+        else:
+            codes.setdefault(code, path)
+    return codes, unresolved
+
+
+class _ThreadState:
+    """The call stack and timings of a single thread, in nanoseconds."""
+
+    def __init__(self, span_paths: Collection[str] = ()) -> None:
+        self.span_paths = span_paths
+        self.tid = threading.get_native_id()
+        self.spans: list[tuple[str, int, int]] = []
+        """The ``(path, start, end)`` of each call of the span paths."""
+        self.stack: list[list[Any]] = []
+        """The ``[path, start, time in callees]`` of each active traced call."""
+        self.active: dict[str, int] = {}
+        """The number of active calls of each path, to detect recursion."""
+        self.objects: dict[str, list[int]] = {}
+        """The ``[calls, cumulative, self]`` of each path."""
+        self.edges: dict[tuple[str, str], list[int]] = {}
+        """The ``[calls, cumulative]`` of each edge."""
+
+    def start(self, path: str, now: int) -> None:
+        self.stack.append([path, now, 0])
+        self.active[path] = self.active.get(path, 0) + 1
+
+    def stop(self, path: str, now: int) -> None:
+        if not self.stack or self.stack[-1][0] != path:
+            return  # the call started before tracing did
+        _, start, callees = self.stack.pop()
+        elapsed = now - start
+        if path in self.span_paths:
+            self.spans.append((path, start, now))
+        self.active[path] -= 1
+        outermost = not self.active[path]
+        timing = self.objects.setdefault(path, [0, 0, 0])
+        timing[0] += 1
+        timing[2] += elapsed - callees
+        if outermost:
+            timing[1] += elapsed
+        if self.stack:
+            caller = self.stack[-1]
+            caller[2] += elapsed
+            edge = self.edges.setdefault((caller[0], path), [0, 0])
+            edge[0] += 1
+            if outermost:
+                edge[1] += elapsed
+
+
+class Tracer:
+    """Record the time spent in a set of code objects, while active.
+
+    Use as a context manager, then call :meth:`profile` for the timings.
+
+    :param codes: A mapping of each code object to trace to its path.
+    :param span_paths: The paths whose calls are recorded as spans of the timeline.
+    """
+
+    TOOL_NAME = "sphinx_graph"
+
+    def __init__(
+        self, codes: dict[CodeType, str], span_paths: Collection[str] = ()
+    ) -> None:
+        self.codes = codes
+        self.span_paths = frozenset(span_paths)
+        self.unresolved: list[str] = []
+        self.origin_ns = 0
+        """The time that tracing started, which spans are relative to."""
+        self._local = threading.local()
+        self._states: list[_ThreadState] = []
+        self._lock = threading.Lock()
+        self._tool_id: int | None = None
+        self._wall = 0
+
+    def _state(self) -> _ThreadState:
+        try:
+            return self._local.state
+        except AttributeError:
+            state = self._local.state = _ThreadState(self.span_paths)
+            with self._lock:
+                self._states.append(state)
+            return state
+
+    def _on_start(self, code: CodeType, *args: Any) -> None:
+        if (path := self.codes.get(code)) is not None:
+            self._state().start(path, time.perf_counter_ns())
+
+    def _on_stop(self, code: CodeType, *args: Any) -> None:
+        now = time.perf_counter_ns()
+        if (path := self.codes.get(code)) is not None:
+            self._state().stop(path, now)
+
+    def _profile_func(self, frame: Any, event: str, arg: Any) -> None:
+        if event == "call":
+            self._on_start(frame.f_code)
+        elif event == "return":
+            self._on_stop(frame.f_code)
+
+    def start(self) -> None:
+        self._wall = self.origin_ns = time.perf_counter_ns()
+        if sys.version_info >= (3, 12):
+            self._start_monitoring()
+        else:
+            threading.setprofile(self._profile_func)
+            sys.setprofile(self._profile_func)
+
+    def stop(self) -> None:
+        if sys.version_info >= (3, 12):
+            self._stop_monitoring()
+        else:
+            sys.setprofile(None)
+            threading.setprofile(None)  # type: ignore[arg-type]
+        self._wall = time.perf_counter_ns() - self._wall
+
+    def _start_monitoring(self) -> None:
+        monitoring = sys.monitoring
+        events = monitoring.events
+        tool_id = next(
+            (
+                i
+                for i in (monitoring.PROFILER_ID, *range(monitoring.OPTIMIZER_ID))
+                if monitoring.get_tool(i) is None
+            ),
+            None,
+        )
+        if tool_id is None:
+            raise RuntimeError("No free sys.monitoring tool ID")
+        monitoring.use_tool_id(tool_id, self.TOOL_NAME)
+        self._tool_id = tool_id
+        callbacks: dict[int, Callable[..., Any]] = {
+            events.PY_START: self._on_start,
+            events.PY_RESUME: self._on_start,
+            events.PY_RETURN: self._on_stop,
+            events.PY_YIELD: self._on_stop,
+            # these events can only be enabled globally, but are rare
+            events.PY_THROW: self._on_start,
+            events.PY_UNWIND: self._on_stop,
+        }
+        for event, callback in callbacks.items():
+            monitoring.register_callback(tool_id, event, callback)
+        local_events = (
+            events.PY_START | events.PY_RESUME | events.PY_RETURN | events.PY_YIELD
+        )
+        for code in self.codes:
+            monitoring.set_local_events(tool_id, code, local_events)
+        monitoring.set_events(tool_id, events.PY_THROW | events.PY_UNWIND)
+
+    def _stop_monitoring(self) -> None:
+        monitoring = sys.monitoring
+        if (tool_id := self._tool_id) is None:
+            return
+        monitoring.set_events(tool_id, 0)
+        for code in self.codes:
+            monitoring.set_local_events(tool_id, code, 0)
+        for event in (
+            monitoring.events.PY_START,
+            monitoring.events.PY_RESUME,
+            monitoring.events.PY_RETURN,
+            monitoring.events.PY_YIELD,
+            monitoring.events.PY_THROW,
+            monitoring.events.PY_UNWIND,
+        ):
+            monitoring.register_callback(tool_id, event, None)
+        monitoring.free_tool_id(tool_id)
+        self._tool_id = None
+
+    def __enter__(self) -> Tracer:
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+    def profile(self) -> TraceProfile:
+        """Merge the timings of all threads."""
+        objects: dict[str, list[int]] = {}
+        edges: dict[tuple[str, str], list[int]] = {}
+        spans: list[Span] = []
+        pid = os.getpid()
+        for state in self._states:
+            spans.extend(
+                Span(
+                    path.rpartition(".")[2],
+                    "main",
+                    path,
+                    pid,
+                    state.tid,
+                    (start - self.origin_ns) / 1e9,
+                    (end - self.origin_ns) / 1e9,
+                )
+                for path, start, end in state.spans
+            )
+            for path, values in state.objects.items():
+                total = objects.setdefault(path, [0, 0, 0])
+                for i, value in enumerate(values):
+                    total[i] += value
+            for key, values in state.edges.items():
+                total = edges.setdefault(key, [0, 0])
+                for i, value in enumerate(values):
+                    total[i] += value
+        return TraceProfile(
+            {
+                path: ObjectTiming(calls, cumulative / 1e9, self_ / 1e9)
+                for path, (calls, cumulative, self_) in objects.items()
+            },
+            {
+                key: EdgeTiming(calls, cumulative / 1e9)
+                for key, (calls, cumulative) in edges.items()
+            },
+            spans=sorted(spans, key=lambda span: span.start_s),
+            wall_s=self._wall / 1e9,
+            unresolved=self.unresolved,
+        )
+
+
+def _add_call(timings: dict[Any, list[int]], key: Any, elapsed: int) -> None:
+    """Add a call to the ``[calls, total, max]`` timing of a key, in nanoseconds."""
+    timing = timings.setdefault(key, [0, 0, 0])
+    timing[0] += 1
+    timing[1] += elapsed
+    timing[2] = max(timing[2], elapsed)
+
+
+def _call_timings(timings: dict[Any, list[int]]) -> dict[Any, CallTiming]:
+    return {
+        key: CallTiming(calls, total / 1e9, max_ / 1e9)
+        for key, (calls, total, max_) in timings.items()
+    }
+
+
+def callback_path(callback: Callable[..., Any]) -> str:
+    """The fully qualified name of an event callback, as used in :attr:`.Data.events`."""
+    if (owner := getattr(callback, "__self__", None)) is not None:
+        return f"{owner.__module__}.{owner.__class__.__name__}.{callback.__name__}"
+    module = getattr(callback, "__module__", None) or type(callback).__module__
+    qualname = getattr(callback, "__qualname__", None) or type(callback).__qualname__
+    return f"{module}.{qualname}"
+
+
+class CallbackTimer:
+    """Time the event callbacks of Sphinx applications, while active.
+
+    :meth:`sphinx.events.EventManager.connect` is patched, so that each listener
+    is wrapped with a timer as it is connected.
+    It must therefore be active before the application is created.
+    """
+
+    def __init__(self) -> None:
+        self._timings: dict[tuple[str, str], list[int]] = {}
+        """The ``[calls, total, max]`` of each ``(event, path)``, in nanoseconds."""
+        self._lock = threading.Lock()
+        self._original: Callable[..., int] | None = None
+
+    def wrap(self, event: str, callback: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a callback of an event with a timer."""
+        key = (event, callback_path(callback))
+        timings, lock = self._timings, self._lock
+
+        @functools.wraps(callback)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter_ns()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                with lock:
+                    _add_call(timings, key, elapsed)
+
+        return wrapper
+
+    def __enter__(self) -> CallbackTimer:
+        from sphinx.events import EventManager
+
+        original = self._original = EventManager.connect
+        timer = self
+
+        @functools.wraps(original)
+        def connect(
+            manager: EventManager, name: str, callback: Callable[..., Any], *args: Any
+        ) -> int:
+            return original(manager, name, timer.wrap(name, callback), *args)
+
+        EventManager.connect = connect  # type: ignore[method-assign]
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        from sphinx.events import EventManager
+
+        EventManager.connect = self._original  # type: ignore[method-assign]
+        self._original = None
+
+    def timings(self) -> dict[str, dict[str, CallTiming]]:
+        """The timing of each callback, by event name then path."""
+        result: dict[str, dict[str, CallTiming]] = {}
+        with self._lock:
+            for (event, path), timing in _call_timings(self._timings).items():
+                result.setdefault(event, {})[path] = timing
+        return result
+
+
+class TransformTimer:
+    """Time the transforms (and post transforms) of docutils documents, while active.
+
+    The methods of :class:`docutils.transforms.Transformer` that add transforms
+    are patched, so that the ``apply`` method of each transform class
+    is wrapped with a timer, the first time the class is added.
+    The classes are restored on exit.
+    """
+
+    def __init__(self) -> None:
+        self._timings: dict[str, list[int]] = {}
+        """The ``[calls, total, max]`` of each transform path, in nanoseconds."""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._patched: dict[type, Any] = {}
+        """The original ``apply`` in the dict of each patched class (or ``None``)."""
+        self._originals: dict[str, Callable[..., Any]] = {}
+
+    def patch(self, classes: Iterable[type]) -> None:
+        """Wrap the ``apply`` method of each transform class, if not already done."""
+        classes = [cls for cls in classes if cls not in self._patched]
+        # find every original before patching any, so that a subclass
+        # which inherits ``apply`` does not wrap the wrapper of its base class
+        originals = {cls: self._original_apply(cls) for cls in classes}
+        for cls, original in originals.items():
+            if original is None:
+                continue
+            self._patched[cls] = cls.__dict__.get("apply")
+            cls.apply = self._wrap(original)  # type: ignore[attr-defined]
+
+    def _original_apply(self, cls: type) -> Callable[..., Any] | None:
+        for klass in cls.__mro__:
+            if klass in self._patched:
+                if (original := self._patched[klass]) is not None:
+                    return original
+            elif "apply" in klass.__dict__:
+                return klass.__dict__["apply"]
+        return None
+
+    def _wrap(self, original: Callable[..., Any]) -> Callable[..., Any]:
+        timings, lock, local = self._timings, self._lock, self._local
+
+        @functools.wraps(original)
+        def apply(transform: Any, *args: Any, **kwargs: Any) -> Any:
+            if getattr(local, "current", None) is transform:
+                # a subclass calling the apply method of its base class
+                return original(transform, *args, **kwargs)
+            outer, local.current = getattr(local, "current", None), transform
+            start = time.perf_counter_ns()
+            try:
+                return original(transform, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                local.current = outer
+                cls = type(transform)
+                with lock:
+                    _add_call(timings, f"{cls.__module__}.{cls.__qualname__}", elapsed)
+
+        return apply
+
+    def __enter__(self) -> TransformTimer:
+        from docutils.transforms import Transformer
+
+        timer = self
+        self._originals = {
+            name: getattr(Transformer, name)
+            for name in ("add_transform", "add_transforms", "add_pending")
+        }
+        add_transform = self._originals["add_transform"]
+        add_transforms = self._originals["add_transforms"]
+        add_pending = self._originals["add_pending"]
+
+        def patched_add_transform(
+            transformer: Transformer, transform_class: type, *args: Any
+        ) -> None:
+            timer.patch([transform_class])
+            add_transform(transformer, transform_class, *args)
+
+        def patched_add_transforms(
+            transformer: Transformer, transform_list: Iterable[type]
+        ) -> None:
+            transform_list = list(transform_list)
+            timer.patch(transform_list)
+            add_transforms(transformer, transform_list)
+
+        def patched_add_pending(
+            transformer: Transformer, pending: Any, *args: Any
+        ) -> None:
+            timer.patch([pending.transform])
+            add_pending(transformer, pending, *args)
+
+        Transformer.add_transform = patched_add_transform  # type: ignore[method-assign]
+        Transformer.add_transforms = patched_add_transforms  # type: ignore[method-assign]
+        Transformer.add_pending = patched_add_pending  # type: ignore[method-assign]
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        from docutils.transforms import Transformer
+
+        for name, original in self._originals.items():
+            setattr(Transformer, name, original)
+        self._originals = {}
+        for cls, original in self._patched.items():
+            if original is None:
+                del cls.apply  # type: ignore[attr-defined]
+            else:
+                cls.apply = original  # type: ignore[attr-defined]
+        self._patched = {}
+
+    def timings(self) -> dict[str, CallTiming]:
+        """The timing of each transform, by path."""
+        with self._lock:
+            return _call_timings(self._timings)
+
+
+def _enclosing_path(func: Callable[..., Any]) -> str:
+    """The path of a function, or of the function it is local to."""
+    qualname = getattr(func, "__qualname__", func.__class__.__qualname__)
+    return f"{func.__module__}.{qualname.partition('.<locals>')[0]}"
+
+
+class WorkerTimeline:
+    """Record the spans of the tasks of parallel builds, while active.
+
+    :meth:`sphinx.util.parallel.ParallelTasks.add_task` is patched,
+    so that each task records its start and end time in the worker process,
+    and sends them back alongside its result.
+    The result callback (e.g. merging the environment read by the worker)
+    is also recorded, in the main process.
+    Spans are linked to the graph node of the function that started the tasks,
+    e.g. ``sphinx.builders.Builder._read_parallel``.
+    """
+
+    def __init__(self) -> None:
+        self._spans: list[tuple[str, str, str, int, int, int, int | None]] = []
+        self._original: Callable[..., None] | None = None
+
+    def __enter__(self) -> WorkerTimeline:
+        from sphinx.util.parallel import ParallelTasks
+
+        original = self._original = ParallelTasks.add_task
+        spans = self._spans
+
+        @functools.wraps(original)
+        def add_task(
+            tasks: ParallelTasks,
+            task_func: Callable[..., Any],
+            arg: Any = None,
+            result_func: Callable[[Any, Any], Any] | None = None,
+        ) -> None:
+            node = _enclosing_path(task_func)
+            docs = len(arg) if isinstance(arg, Sized) else None
+
+            def task(*args: Any) -> Any:
+                # perf_counter is a system-wide monotonic clock, shared with workers
+                start = time.perf_counter_ns()
+                result = task_func(*args)
+                return result, os.getpid(), start, time.perf_counter_ns()
+
+            def on_result(arg: Any, value: Any) -> Any:
+                result, pid, start, end = value
+                spans.append(
+                    (task_func.__name__, "worker", node, pid, start, end, docs)
+                )
+                start = time.perf_counter_ns()
+                try:
+                    if result_func is not None:
+                        return result_func(arg, result)
+                    return None
+                finally:
+                    name = getattr(result_func, "__name__", "result")
+                    spans.append(
+                        (
+                            name,
+                            "merge",
+                            node,
+                            os.getpid(),
+                            start,
+                            time.perf_counter_ns(),
+                            docs,
+                        )
+                    )
+
+            original(tasks, task, arg, on_result)
+
+        ParallelTasks.add_task = add_task  # type: ignore[method-assign]
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        from sphinx.util.parallel import ParallelTasks
+
+        ParallelTasks.add_task = self._original  # type: ignore[method-assign]
+        self._original = None
+
+    def spans(self, origin_ns: int) -> list[Span]:
+        """The recorded spans, with times relative to an origin."""
+        main_tid = threading.main_thread().native_id or 0
+        return [
+            Span(
+                name,
+                category,  # type: ignore[arg-type]
+                node,
+                pid,
+                pid if category == "worker" else main_tid,
+                (start - origin_ns) / 1e9,
+                (end - origin_ns) / 1e9,
+                docs,
+            )
+            for name, category, node, pid, start, end, docs in self._spans
+        ]
+
+
+def trace_build(
+    data: Data,
+    srcdir: Path,
+    outdir: Path,
+    *,
+    builder: str = "html",
+    sphinx_args: Sequence[str] = (),
+) -> TraceProfile:
+    """Run ``sphinx-build`` on a project in this process, tracing the objects of the data.
+
+    :param srcdir: The source directory of the project.
+    :param outdir: The output directory of the build.
+    :param builder: The name of the Sphinx builder.
+    :param sphinx_args: Further command-line arguments for ``sphinx-build``.
+        The environment is always rebuilt from scratch (``-E``),
+        so that the reading phase is traced.
+        Pass e.g. ``["-j", "4"]`` to record the timeline of a parallel build.
+    """
+    from sphinx.cmd.build import build_main
+
+    span_paths = {*TIMELINE_PATHS}
+    for path in TIMELINE_PATHS:
+        if obj := data.objects.get(path):
+            span_paths.update(obj.overrides)
+    codes, unresolved = resolve_codes(
+        [*data.objects, *sorted(span_paths - data.objects.keys())]
+    )
+    for path in unresolved:
+        warning(f"Cannot trace {path!r}: not found in this Sphinx version")
+    tracer = Tracer(codes, span_paths)
+    tracer.unresolved = unresolved
+    argv = ["-b", builder, "-E", *sphinx_args, str(srcdir), str(outdir)]
+    with (
+        CallbackTimer() as callbacks,
+        TransformTimer() as transforms,
+        WorkerTimeline() as timeline,
+        tracer,
+    ):
+        status = build_main(argv)
+    if status:
+        warning(f"sphinx-build exited with status {status}, the trace may be partial")
+    profile = tracer.profile()
+    profile.callbacks = callbacks.timings()
+    profile.transforms = transforms.timings()
+    profile.spans = sorted(
+        [*profile.spans, *timeline.spans(tracer.origin_ns)],
+        key=lambda span: span.start_s,
+    )
+    return profile
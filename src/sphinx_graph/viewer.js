@@ -0,0 +1,453 @@
+/* A dependency-free viewer for process graphs exported as JSON by sphinx_graph.
+ *
+ * The graph is laid out in the browser, with a simple layered (Sugiyama-style) layout:
+ * cycles are broken by reversing DFS back edges, nodes are assigned to layers by longest path,
+ * ordered within layers by barycenter sweeps, then placed left-to-right.
+ *
+ * Usage: SphinxGraph.render(container, graph), where graph is the exported JSON,
+ * or add elements with class "process-graph-interactive" and a data-src attribute
+ * pointing at the JSON, which are rendered on page load.
+ */
+(function (root) {
+  "use strict";
+
+  var SVG_NS = "http://www.w3.org/2000/svg";
+  var CHAR_WIDTH = 7.2;
+  var LINE_HEIGHT = 18;
+  var PAD = 8;
+  var GAP_X = 80;
+  var GAP_Y = 24;
+  var SWEEPS = 8;
+  var TITLE_COLORS = {
+    event: "lightblue",
+    transforms: "lightyellow",
+    post_transforms: "lightyellow",
+  };
+  var ROW_COLORS = {
+    emit: "lightblue",
+    apply_transforms: "lightyellow",
+    apply_post_transforms: "lightyellow",
+  };
+
+  /* The lines of text of a node, each with an optional port and background colour. */
+  function nodeLines(node) {
+    var lines = [];
+    (node.rows || []).forEach(function (row) {
+      var text = row.text;
+      var indent = new Array((row.indent || 0) * 4 + 1).join(" ");
+      switch (row.kind) {
+        case "description":
+        case "doc":
+          text.split("\n").forEach(function (line) {
+            lines.push({ text: line, muted: true });
+          });
+          return;
+        case "overridable":
+          lines.push({ text: text, italic: true });
+          return;
+        case "enter":
+          text = row.value + " " + text + ":";
+          break;
+        case "emit":
+          text = "emit " + text;
+          break;
+        case "callback":
+        case "transform":
+        case "post_transform":
+          text = row.value ? text + "  [" + row.value + "]" : text;
+          break;
+      }
+      lines.push({
+        text: indent + text,
+        port: row.port,
+        fill: ROW_COLORS[row.kind],
+        boxed: true,
+      });
+    });
+    return lines;
+  }
+
+  function measure(node) {
+    var lines = nodeLines(node);
+    var chars = node.label.length;
+    lines.forEach(function (line) {
+      chars = Math.max(chars, line.text.length);
+    });
+    node.lines = lines;
+    node.width = chars * CHAR_WIDTH + 2 * PAD;
+    node.height = (lines.length + 1) * LINE_HEIGHT + PAD;
+  }
+
+  /* Lay out the graph, setting x, y, width and height on each node. */
+  function layout(graph) {
+    var nodes = graph.elements.nodes.map(function (element) {
+      return element.data;
+    });
+    var edges = graph.elements.edges.map(function (element) {
+      return element.data;
+    });
+    var index = {};
+    nodes.forEach(function (node, i) {
+      index[node.id] = i;
+      measure(node);
+    });
+    var n = nodes.length;
+    var out = nodes.map(function () {
+      return [];
+    });
+    edges.forEach(function (edge) {
+      edge.s = index[edge.source];
+      edge.t = index[edge.target];
+      if (edge.s !== edge.t) out[edge.s].push(edge);
+    });
+
+    // break cycles: an edge to a node on the DFS stack is reversed
+    var state = new Uint8Array(n); // 0 unvisited, 1 on stack, 2 done
+    for (var start = 0; start < n; start++) {
+      if (state[start]) continue;
+      var stack = [[start, 0]];
+      state[start] = 1;
+      while (stack.length) {
+        var top = stack[stack.length - 1];
+        var v = top[0];
+        if (top[1] < out[v].length) {
+          var edge = out[v][top[1]++];
+          if (state[edge.t] === 1) edge.reversed = true;
+          else if (!state[edge.t]) {
+            state[edge.t] = 1;
+            stack.push([edge.t, 0]);
+          }
+        } else {
+          state[v] = 2;
+          stack.pop();
+        }
+      }
+    }
+
+    // longest-path layering, over a topological order of the acyclic edges
+    var succ = nodes.map(function () {
+      return [];
+    });
+    var pred = nodes.map(function () {
+      return [];
+    });
+    var indegree = new Int32Array(n);
+    edges.forEach(function (edge) {
+      if (edge.s === edge.t) return;
+      var a = edge.reversed ? edge.t : edge.s;
+      var b = edge.reversed ? edge.s : edge.t;
+      succ[a].push(b);
+      pred[b].push(a);
+      indegree[b]++;
+    });
+    var layer = new Int32Array(n);
+    var queue = [];
+    for (var i = 0; i < n; i++) if (!indegree[i]) queue.push(i);
+    for (var q = 0; q < queue.length; q++) {
+      var u = queue[q];
+      succ[u].forEach(function (w) {
+        layer[w] = Math.max(layer[w], layer[u] + 1);
+        if (!--indegree[w]) queue.push(w);
+      });
+    }
+    var layers = [];
+    for (i = 0; i < n; i++) {
+      (layers[layer[i]] = layers[layer[i]] || []).push(i);
+    }
+    layers = layers.filter(Boolean);
+
+    // order within layers, by the barycenter of neighbours in the adjacent layer
+    var position = new Float64Array(n);
+    function number(nodesInLayer) {
+      nodesInLayer.forEach(function (v, p) {
+        position[v] = p;
+      });
+    }
+    layers.forEach(number);
+    function sweep(from, to, step, neighbours) {
+      for (var l = from; l !== to; l += step) {
+        var barycenter = {};
+        layers[l].forEach(function (v) {
+          var adjacent = neighbours[v];
+          if (!adjacent.length) {
+            barycenter[v] = position[v];
+            return;
+          }
+          var sum = 0;
+          adjacent.forEach(function (w) {
+            sum += position[w];
+          });
+          barycenter[v] = sum / adjacent.length;
+        });
+        layers[l].sort(function (a, b) {
+          return barycenter[a] - barycenter[b];
+        });
+        number(layers[l]);
+      }
+    }
+    for (var s = 0; s < SWEEPS; s++) {
+      sweep(1, layers.length, 1, pred);
+      sweep(layers.length - 2, -1, -1, succ);
+    }
+
+    // coordinates: layers left to right, nodes pulled towards their predecessors
+    var x = 0;
+    layers.forEach(function (nodesInLayer) {
+      var width = 0;
+      var bottom = -Infinity;
+      nodesInLayer.forEach(function (v) {
+        var node = nodes[v];
+        var desired = bottom === -Infinity ? 0 : bottom;
+        if (pred[v].length) {
+          var sum = 0;
+          pred[v].forEach(function (w) {
+            sum += nodes[w].y + nodes[w].height / 2;
+          });
+          desired = Math.max(desired, sum / pred[v].length - node.height / 2);
+        }
+        node.x = x;
+        node.y = bottom === -Infinity ? desired : Math.max(desired, bottom);
+        bottom = node.y + node.height + GAP_Y;
+        width = Math.max(width, node.width);
+      });
+      x += width + GAP_X;
+    });
+    return { nodes: nodes, edges: edges };
+  }
+
+  function el(tag, attributes, parent) {
+    var element = document.createElementNS(SVG_NS, tag);
+    Object.keys(attributes).forEach(function (key) {
+      element.setAttribute(key, attributes[key]);
+    });
+    if (parent) parent.appendChild(element);
+    return element;
+  }
+
+  function portY(node, port) {
+    for (var i = 0; port && i < node.lines.length; i++) {
+      if (node.lines[i].port === port) {
+        return node.y + (i + 1.5) * LINE_HEIGHT + PAD / 2;
+      }
+    }
+    return node.y + LINE_HEIGHT / 2 + PAD / 2;
+  }
+
+  function drawNode(node, parent) {
+    var group = el("g", { class: "sg-node sg-" + node.kind }, parent);
+    el(
+      "rect",
+      {
+        x: node.x,
+        y: node.y,
+        width: node.width,
+        height: node.height,
+        rx: 6,
+        fill: "white",
+        stroke: "black",
+      },
+      group
+    );
+    var titleFill = TITLE_COLORS[node.kind];
+    if (titleFill) {
+      el(
+        "rect",
+        {
+          x: node.x + PAD / 2,
+          y: node.y + PAD / 2,
+          width: node.width - PAD,
+          height: LINE_HEIGHT,
+          fill: titleFill,
+        },
+        group
+      );
+    }
+    var title = el(
+      "text",
+      {
+        x: node.x + node.width / 2,
+        y: node.y + PAD / 2 + LINE_HEIGHT * 0.75,
+        "text-anchor": "middle",
+        "text-decoration": "underline",
+      },
+      group
+    );
+    title.textContent = node.label;
+    node.lines.forEach(function (line, i) {
+      var y = node.y + PAD / 2 + (i + 1) * LINE_HEIGHT;
+      if (line.boxed) {
+        el(
+          "rect",
+          {
+            x: node.x + PAD / 2,
+            y: y,
+            width: node.width - PAD,
+            height: LINE_HEIGHT,
+            fill: line.fill || "none",
+            stroke: "black",
+            "stroke-width": 0.5,
+          },
+          group
+        );
+      }
+      var text = el(
+        "text",
+        {
+          x: node.x + PAD,
+          y: y + LINE_HEIGHT * 0.75,
+          "font-style": line.italic ? "italic" : "normal",
+          fill: line.muted ? "#444" : "black",
+        },
+        group
+      );
+      text.textContent = line.text;
+    });
+    var tooltip = el("title", {}, group);
+    tooltip.textContent = node.id;
+    return group;
+  }
+
+  function drawEdge(edge, nodes, parent) {
+    var source = nodes[edge.s];
+    var target = nodes[edge.t];
+    var x1 = source.x + source.width;
+    var y1 = portY(source, edge.port);
+    var x2 = target.x;
+    var y2 = target.y + LINE_HEIGHT / 2 + PAD / 2;
+    var bend = Math.max(GAP_X / 2, Math.abs(x2 - x1) / 3);
+    return el(
+      "path",
+      {
+        d:
+          "M" + x1 + "," + y1 +
+          " C" + (x1 + bend) + "," + y1 +
+          " " + (x2 - bend) + "," + y2 +
+          " " + x2 + "," + y2,
+        fill: "none",
+        stroke: "black",
+        "stroke-dasharray": edge.kind === "call" || edge.kind === "emit" ? "" : "5,4",
+        "marker-end": "url(#sg-arrow)",
+        class: "sg-edge",
+      },
+      parent
+    );
+  }
+
+  /* Render a graph into a container element, with drag to pan and wheel to zoom. */
+  function render(container, graph) {
+    var laid = layout(graph);
+    var width = 0;
+    var height = 0;
+    laid.nodes.forEach(function (node) {
+      width = Math.max(width, node.x + node.width);
+      height = Math.max(height, node.y + node.height);
+    });
+    var svg = el("svg", {
+      class: "sg-graph",
+      width: "100%",
+      height: "100%",
+      "font-family": "monospace",
+      "font-size": 12,
+    });
+    var marker = el(
+      "marker",
+      {
+        id: "sg-arrow",
+        viewBox: "0 0 10 10",
+        refX: 10,
+        refY: 5,
+        markerWidth: 8,
+        markerHeight: 8,
+        orient: "auto",
+      },
+      el("defs", {}, svg)
+    );
+    el("path", { d: "M0,0 L10,5 L0,10 z" }, marker);
+    var edgeLayer = el("g", {}, svg);
+    var nodeLayer = el("g", {}, svg);
+    var edgesByNode = laid.nodes.map(function () {
+      return [];
+    });
+    laid.edges.forEach(function (edge) {
+      var path = drawEdge(edge, laid.nodes, edgeLayer);
+      edgesByNode[edge.s].push(path);
+      edgesByNode[edge.t].push(path);
+    });
+    laid.nodes.forEach(function (node, i) {
+      var group = drawNode(node, nodeLayer);
+      group.addEventListener("mouseenter", function () {
+        edgesByNode[i].forEach(function (path) {
+          path.setAttribute("stroke", "crimson");
+          path.setAttribute("stroke-width", 2);
+        });
+      });
+      group.addEventListener("mouseleave", function () {
+        edgesByNode[i].forEach(function (path) {
+          path.setAttribute("stroke", "black");
+          path.setAttribute("stroke-width", 1);
+        });
+      });
+    });
+
+    var view = { x: -PAD, y: -PAD, w: width + 2 * PAD, h: height + 2 * PAD };
+    function update() {
+      svg.setAttribute("viewBox", [view.x, view.y, view.w, view.h].join(" "));
+    }
+    update();
+    svg.addEventListener("wheel", function (event) {
+      event.preventDefault();
+      var rect = svg.getBoundingClientRect();
+      var scale = event.deltaY > 0 ? 1.1 : 1 / 1.1;
+      var fx = (event.clientX - rect.left) / rect.width;
+      var fy = (event.clientY - rect.top) / rect.height;
+      view.x += view.w * fx * (1 - scale);
+      view.y += view.h * fy * (1 - scale);
+      view.w *= scale;
+      view.h *= scale;
+      update();
+    });
+    var drag = null;
+    svg.addEventListener("pointerdown", function (event) {
+      drag = { x: event.clientX, y: event.clientY };
+      svg.setPointerCapture(event.pointerId);
+    });
+    svg.addEventListener("pointermove", function (event) {
+      if (!drag) return;
+      var rect = svg.getBoundingClientRect();
+      view.x -= ((event.clientX - drag.x) * view.w) / rect.width;
+      view.y -= ((event.clientY - drag.y) * view.h) / rect.height;
+      drag = { x: event.clientX, y: event.clientY };
+      update();
+    });
+    svg.addEventListener("pointerup", function () {
+      drag = null;
+    });
+    container.appendChild(svg);
+    return svg;
+  }
+
+  function renderAll() {
+    var elements = document.querySelectorAll(".process-graph-interactive[data-src]");
+    Array.prototype.forEach.call(elements, function (container) {
+      fetch(container.getAttribute("data-src"))
+        .then(function (response) {
+          return response.json();
+        })
+        .then(function (graph) {
+          render(container, graph);
+        })
+        .catch(function (error) {
+          container.textContent = "The process graph could not be loaded: " + error;
+        });
+    });
+  }
+
+  root.SphinxGraph = { layout: layout, render: render, renderAll: renderAll };
+  if (typeof document !== "undefined") {
+    if (document.readyState === "loading") {
+      document.addEventListener("DOMContentLoaded", renderAll);
+    } else {
+      renderAll();
+    }
+  }
+})(this);
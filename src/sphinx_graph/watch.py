@@ -0,0 +1,311 @@
+"""Watch the data for changes, and re-render the graph incrementally.
+
+The parsed data and the statements of each node (see :class:`.IncrementalGraph`)
+are kept in memory between renders.
+After a change, the watcher waits for edits to settle (debouncing),
+then only re-renders if the data changed semantically,
+i.e. not for changes of formatting or comments, nor for edits that were undone.
+If Graphviz is still rendering a previous version when a newer one is ready,
+it is killed.
+
+Files are watched with Linux inotify (via :mod:`ctypes`), or else by polling.
+Their directories are watched, so that editors which save by replacing
+the file are handled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+import contextlib
+import ctypes
+import ctypes.util
+import hashlib
+import os
+from pathlib import Path
+import struct
+import subprocess
+import sys
+import time
+
+from .incremental import IncrementalGraph
+from .layout import LayoutProfile, get_profile
+from .main import DATA_PATH
+from .models import Data
+from .render import run_dot_async
+
+DEBOUNCE_S = 0.2
+"""The time to wait for edits to settle, before rebuilding."""
+
+POLL_INTERVAL_S = 0.5
+"""The interval between checks of the files, when inotify is not available."""
+
+# from <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+"""The ``wd, mask, cookie, len`` header of an inotify event, followed by the name."""
+
+
+class InotifyWatcher:
+    """Watch files for changes, with Linux inotify.
+
+    :raises OSError: If inotify is not available.
+    """
+
+    def __init__(self, paths: Sequence[Path]) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._names: dict[int, set[str]] = {}
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        for path in paths:
+            directory = os.fsencode(path.resolve().parent)
+            wd = libc.inotify_add_watch(self._fd, directory, mask)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"Cannot watch {path.parent}")
+            self._names.setdefault(wd, set()).add(path.name)
+
+    def _read_changes(self) -> bool:
+        """Read all pending events, returning whether any were for a watched file."""
+        changed = False
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buffer):
+                wd, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if os.fsdecode(name) in self._names.get(wd, ()):
+                    changed = True
+
+    async def wait(self) -> None:
+        """Wait until a watched file changes."""
+        loop = asyncio.get_running_loop()
+        while True:
+            ready: asyncio.Future[None] = loop.create_future()
+            loop.add_reader(self._fd, _set_done, ready)
+            try:
+                await ready
+            finally:
+                loop.remove_reader(self._fd)
+            if self._read_changes():
+                return
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _set_done(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class PollingWatcher:
+    """Watch files for changes, by polling their modification time and size."""
+
+    def __init__(
+        self, paths: Sequence[Path], interval: float = POLL_INTERVAL_S
+    ) -> None:
+        self.paths = paths
+        self.interval = interval
+        self._state = self._stat()
+
+    def _stat(self) -> list[tuple[int, int] | None]:
+        state: list[tuple[int, int] | None] = []
+        for path in self.paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                state.append(None)
+            else:
+                state.append((stat.st_mtime_ns, stat.st_size))
+        return state
+
+    async def wait(self) -> None:
+        """Wait until a watched file changes."""
+        while True:
+            await asyncio.sleep(self.interval)
+            if (state := self._stat()) != self._state:
+                self._state = state
+                return
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(paths: Sequence[Path]) -> InotifyWatcher | PollingWatcher:
+    """Watch files with inotify if available, otherwise by polling."""
+    try:
+        return InotifyWatcher(paths)
+    except (OSError, AttributeError):  # not Linux, or no inotify in libc
+        return PollingWatcher(paths)
+
+
+class WatchSession:
+    """The state kept between renders: the data, and the statements of each node.
+
+    :param outpaths: A mapping of each format to its output path.
+    :param path: The TOML file of the data.
+    :param layout: The layout profile (see :mod:`sphinx_graph.layout`).
+    :param fragments: Data fragment files to merge into the data,
+        which are watched too (see :mod:`sphinx_graph.fragments`).
+    """
+
+    def __init__(
+        self,
+        outpaths: dict[str, Path],
+        path: Path = DATA_PATH,
+        *,
+        layout: str | LayoutProfile | None = None,
+        fragments: Sequence[Path] = (),
+    ) -> None:
+        self.outpaths = outpaths
+        self.path = path
+        self.fragments = fragments
+        self.profile = get_profile(layout)
+        self.graph = IncrementalGraph()
+        self.data: Data | None = None
+        self._source_hash = ""
+        self._dot_source = ""
+
+    def update(self) -> tuple[Data, str] | None:
+        """Reload the data, returning it with the new DOT source,
+        or ``None`` if the graph is unchanged, or the data is invalid.
+        """
+        from .fragments import FragmentSet
+        from .snapshot import load_data
+
+        try:
+            source = self.path.read_bytes()
+            fragments = FragmentSet(self.fragments)
+        except FileNotFoundError:
+            return None  # e.g. in the middle of being replaced
+        source_hash = hashlib.sha256(source).hexdigest() + fragments.digest()
+        if source_hash == self._source_hash:
+            return None
+        self._source_hash = source_hash
+        try:
+            data = fragments.merge(load_data(self.path, source=source))
+        except ValueError as exc:  # including TOML and validation errors
+            print(f"Error: invalid data: {exc}", file=sys.stderr)
+            return None
+        if data == self.data:
+            return None  # only formatting or comments changed
+        self.data = data
+        dot_source = self.graph.build(data, layout=self.profile).source
+        if dot_source == self._dot_source:
+            return None
+        self._dot_source = dot_source
+        return data, dot_source
+
+    async def render(self, data: Data, dot_source: str) -> None:
+        """Render each format, replacing the outputs atomically.
+
+        The ``json`` and ``html`` formats are written directly, without Graphviz.
+        If Graphviz fails for a format, the error is printed,
+        and the other formats are still rendered.
+        """
+        from .export import EXPORT_FORMATS, write_export
+
+        start = time.perf_counter()
+        rendered = []
+        for format, outpath in self.outpaths.items():
+            if format in EXPORT_FORMATS:
+                write_export(data, outpath, format=format)
+                rendered.append(outpath)
+                continue
+            temp = outpath.with_name(f".{outpath.name}.{os.getpid()}.tmp")
+            try:
+                await run_dot_async(
+                    dot_source, temp, format=format, engine=self.profile.engine
+                )
+            except subprocess.CalledProcessError as exc:
+                print(f"Error: Graphviz failed: {exc.stderr}", file=sys.stderr)
+                temp.unlink(missing_ok=True)
+                continue
+            except asyncio.CancelledError:
+                temp.unlink(missing_ok=True)
+                raise
+            temp.replace(outpath)
+            rendered.append(outpath)
+        if rendered:
+            print(
+                f"Rendered {', '.join(map(str, rendered))} "
+                f"({self.graph.rebuilt} nodes rebuilt, {self.graph.reused} reused) "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+
+
+async def _settle(watcher: InotifyWatcher | PollingWatcher, debounce: float) -> None:
+    """Wait until there have been no changes for ``debounce`` seconds."""
+    while True:
+        try:
+            await asyncio.wait_for(watcher.wait(), debounce)
+        except TimeoutError:
+            return
+
+
+async def watch_async(session: WatchSession, *, debounce: float = DEBOUNCE_S) -> None:
+    """Render the graph, then re-render it whenever the data changes, until cancelled."""
+    paths = [session.path, *session.fragments]
+    watcher = open_watcher(paths)
+    print(
+        f"Watching {', '.join(map(str, paths))} ({type(watcher).__name__}), "
+        "press Ctrl+C to stop",
+        file=sys.stderr,
+    )
+    render: asyncio.Task[None] | None = None
+    try:
+        while True:
+            if (update := session.update()) is not None:
+                if render is not None and not render.done():
+                    render.cancel()
+                    print(
+                        "Cancelled the render of the previous version", file=sys.stderr
+                    )
+                render = asyncio.create_task(session.render(*update))
+            await watcher.wait()
+            await _settle(watcher, debounce)
+    finally:
+        if render is not None:
+            render.cancel()
+        watcher.close()
+
+
+def watch_formats(  # noqa: PLR0913
+    formats: Sequence[str],
+    name: str = "sphinx_graph",
+    directory: Path | None = None,
+    *,
+    path: Path = DATA_PATH,
+    layout: str | LayoutProfile | None = None,
+    fragments: Sequence[Path] = (),
+    debounce: float = DEBOUNCE_S,
+) -> None:
+    """Render the graph to ``<directory>/<name>.<format>`` for each format,
+    then re-render it whenever the data changes, until interrupted.
+    """
+    directory = directory or Path.cwd()
+    directory.mkdir(parents=True, exist_ok=True)
+    session = WatchSession(
+        {format: directory.joinpath(f"{name}.{format}") for format in formats},
+        path,
+        layout=layout,
+        fragments=fragments,
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(watch_async(session, debounce=debounce))